@@ -0,0 +1,103 @@
+# aggregates.py - Precomputed per-cluster aggregate cube
+# ------------------------------------------------------------
+# The overview cards and the feature comparison only ever need per-cluster
+# summaries of the engagement features. They are computed in a single groupby
+# pass per data version, so a rerun reads a handful of rows no matter how many
+# students the file has.
+import pandas as pd
+
+# Row label used for the whole population (matches the explorer's "All" option)
+OVERALL = "All"
+
+FEATURE_STATS = ["sum", "mean", "std", "q25", "median", "q75"]
+QUANTILES = {"q25": 0.25, "median": 0.5, "q75": 0.75}
+
+
+class ClusterCube:
+    """Count, share and feature statistics for every cluster plus ``OVERALL``.
+
+    ``table`` is indexed by cluster label (then ``OVERALL``) and has
+    ``(stat, feature)`` columns, with ``("count", "")`` and ``("pct", "")``
+    holding the group size and its share of all students.
+    """
+
+    def __init__(self, table, cluster_col, feature_cols, version=None):
+        self.table = table
+        # Identifies the data the cube was built from (used as a cache key)
+        self.version = version
+        self.cluster_col = cluster_col
+        self.feature_cols = list(feature_cols)
+
+    @property
+    def clusters(self):
+        return [g for g in self.table.index if g != OVERALL]
+
+    @property
+    def counts(self):
+        return self.table.loc[self.clusters, ("count", "")].astype(int).rename("count")
+
+    @property
+    def pct(self):
+        return self.table.loc[self.clusters, ("pct", "")].rename("pct")
+
+    def stat(self, name, group=OVERALL):
+        """Return ``name`` (e.g. "mean") for every feature of ``group`` as a Series"""
+        return self.table.loc[group, name][self.feature_cols]
+
+    def means(self, group=OVERALL):
+        return self.stat("mean", group)
+
+    def cluster_stat(self, name):
+        """Return a clusters x features frame of ``name`` (the "All" view table)"""
+        frame = self.table.loc[self.clusters, name][self.feature_cols]
+        frame.index.name = self.cluster_col
+        frame.columns.name = None
+        return frame
+
+    def cluster_means(self):
+        return self.cluster_stat("mean")
+
+
+def _feature_stats(grouped_or_frame, feature_cols, by_group):
+    parts = {}
+    for stat in FEATURE_STATS:
+        if stat in QUANTILES:
+            value = grouped_or_frame.quantile(QUANTILES[stat])
+        else:
+            value = getattr(grouped_or_frame, stat)()
+        if not by_group:
+            value = value.to_frame(OVERALL).T
+        parts[stat] = value[feature_cols].astype(float)
+    return pd.concat(parts, axis=1)
+
+
+def build_cluster_cube(data):
+    """Build the ClusterCube for a loaded Dataset (see data_loader.Dataset)"""
+    df = data.df
+    cluster_col = data.cluster_col
+    feature_cols = data.feature_cols
+    total = data.total_students
+
+    counts = df.groupby(cluster_col, observed=True).size().sort_index()
+    counts.index = counts.index.astype(object)
+    counts.loc[OVERALL] = total
+    sizes = pd.DataFrame({
+        ("count", ""): counts.astype(float),
+        ("pct", ""): (counts / total * 100).round(1) if total else counts * 0.0,
+    })
+
+    if feature_cols:
+        per_cluster = _feature_stats(df.groupby(cluster_col, observed=True)[feature_cols], feature_cols, True)
+        overall = _feature_stats(df[feature_cols], feature_cols, False)
+        stats = pd.concat([per_cluster, overall])
+        stats.index = stats.index.astype(object)
+        table = sizes.join(stats)
+    else:
+        table = sizes
+    table.columns = pd.MultiIndex.from_tuples(table.columns)
+    return ClusterCube(table, cluster_col, feature_cols, data.version)
+
+
+def get_cluster_cube(data):
+    """Return the cube for ``data``, built at most once per data version"""
+    return data.memo("cluster_cube", build_cluster_cube)
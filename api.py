@@ -0,0 +1,315 @@
+# api.py - Read-only JSON API over the cached cluster data
+# ------------------------------------------------------------
+# Other systems (LMS, notifications) need cluster assignments and aggregates
+# without going through the Streamlit UI. This is a small stdlib HTTP server
+# that reads the same process-wide caches as the dashboard (load_dataset,
+# ClusterCube, SearchIndex, sorted positions), so a request costs a lookup
+# plus serializing one page.
+#
+# Every response carries an ETag derived from the data version and the
+# request, so If-None-Match is answered with 304 before any work is done.
+#
+# Run next to the dashboard (same process, shared caches) by setting
+# DASHBOARD_API_PORT, or on its own:
+#   python api.py --port 8600
+#
+# Endpoints (all GET, optional ?cohort=<name>):
+#   /api/cohorts                       cohort names and the default
+#   /api/clusters                      clusters with student counts and shares
+#   /api/means                         per-cluster and overall feature means
+#   /api/students                      ?cluster= &name= &match=prefix|contains
+#                                      &<column>=v1,v2 &sort= &order=asc|desc
+#                                      &page= &page_size= &fields=
+#   /api/recommendations               ?cluster= (optional)
+#
+# Student lists need DASHBOARD_API_TOKEN to be set and sent as
+# "Authorization: Bearer <token>"; when it is set, every endpoint needs it.
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from aggregates import OVERALL, get_cluster_cube
+from cohorts import default_cohort, discover_cohorts
+from data_loader import DataError, load_dataset
+from recommendations import RECOMMENDATIONS, map_cluster_label
+from search_index import get_search_index
+from table_view import ALL, PAGE_SIZES, page_count, page_frame, sorted_positions
+
+API_TOKEN = os.environ.get("DASHBOARD_API_TOKEN")
+MAX_PAGE_SIZE = 1000
+# Changes whenever the recommendation texts change
+RECOMMENDATIONS_VERSION = hashlib.sha1(json.dumps(RECOMMENDATIONS, sort_keys=True).encode()).hexdigest()[:12]
+
+_server = None
+_server_started = False
+_server_lock = threading.Lock()
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ------------------------------------------------------------
+# Request helpers
+# ------------------------------------------------------------
+def _param(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+def _int_param(query, name, default, lo=1, hi=None):
+    raw = _param(query, name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ApiError(400, "%s must be an integer" % name)
+    value = max(lo, value)
+    return min(value, hi) if hi is not None else value
+
+
+def _dataset(query):
+    cohorts = discover_cohorts()
+    name = _param(query, "cohort") or default_cohort(cohorts)
+    if name not in cohorts:
+        raise ApiError(404, "unknown cohort %r" % name)
+    try:
+        return name, load_dataset(cohorts[name])
+    except FileNotFoundError:
+        raise ApiError(404, "cohort %r is not available" % name)
+    except DataError as e:
+        raise ApiError(500, str(e))
+
+
+def _cluster_param(query, data):
+    cluster = _param(query, "cluster", ALL)
+    if cluster != ALL and cluster not in data.cluster_counts.index:
+        raise ApiError(404, "unknown cluster %r" % cluster)
+    return cluster
+
+
+def _etag(*parts):
+    return '"%s"' % hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+
+# ------------------------------------------------------------
+# Endpoints: each returns (etag, build) so a matching If-None-Match never builds
+# ------------------------------------------------------------
+def cohorts_endpoint(query):
+    cohorts = discover_cohorts()
+    payload = {"cohorts": list(cohorts), "default": default_cohort(cohorts)}
+    return _etag("cohorts", payload), lambda: payload
+
+
+def clusters_endpoint(query):
+    cohort, data = _dataset(query)
+
+    def build():
+        cube = get_cluster_cube(data)
+        return {
+            "cohort": cohort,
+            "version": data.version,
+            "total_students": data.total_students,
+            "clusters": [
+                {"name": str(name), "students": int(count), "pct": float(cube.pct[name])}
+                for name, count in cube.counts.items()
+            ],
+        }
+
+    return _etag("clusters", data.version), build
+
+
+def means_endpoint(query):
+    cohort, data = _dataset(query)
+
+    def build():
+        cube = get_cluster_cube(data)
+        means = {str(c): {f: float(v) for f, v in cube.means(c).items()} for c in cube.clusters}
+        return {
+            "cohort": cohort,
+            "version": data.version,
+            "features": cube.feature_cols,
+            "clusters": means,
+            "overall": {f: float(v) for f, v in cube.means(OVERALL).items()} if cube.feature_cols else {},
+        }
+
+    return _etag("means", data.version), build
+
+
+def students_endpoint(query):
+    cohort, data = _dataset(query)
+    df = data.df
+    cluster = _cluster_param(query, data)
+    page = _int_param(query, "page", 1)
+    page_size = _int_param(query, "page_size", PAGE_SIZES[1], hi=MAX_PAGE_SIZE)
+    name = (_param(query, "name") or "").strip()
+    match = _param(query, "match", "prefix")
+    sort_col = _param(query, "sort")
+    if sort_col is not None and sort_col not in df.columns:
+        raise ApiError(400, "unknown sort column %r" % sort_col)
+    ascending = _param(query, "order", "asc") != "desc"
+
+    fields = [data.applicant_col, data.cluster_col] + data.feature_cols
+    if _param(query, "fields"):
+        fields = _param(query, "fields").split(",")
+        unknown = [f for f in fields if f not in df.columns]
+        if unknown:
+            raise ApiError(400, "unknown fields: %s" % ", ".join(unknown))
+    fields = [f for f in fields if f]
+
+    index = get_search_index(data)
+    reserved = {"cohort", "cluster", "page", "page_size", "name", "match", "sort", "order", "fields"}
+    filters = {}
+    for col, values in query.items():
+        if col in reserved:
+            continue
+        if col not in index.bitmaps:
+            raise ApiError(400, "cannot filter on %r" % col)
+        by_text = {str(v): v for v in index.bitmaps[col]}
+        filters[col] = [by_text[v] for v in values[-1].split(",") if v in by_text] or [None]
+
+    def build():
+        if name or filters:
+            if cluster != ALL:
+                filters[data.cluster_col] = cluster
+            positions = index.query(filters, name, "contains" if match == "contains" else "prefix")
+            ordered = sorted_positions(data, cluster, sort_col, ascending, positions=positions)
+        else:
+            ordered = sorted_positions(data, cluster, sort_col, ascending)
+        frame = page_frame(df, ordered, page, page_size, fields)
+        return {
+            "cohort": cohort,
+            "version": data.version,
+            "cluster": cluster,
+            "total": int(len(ordered)),
+            "page": min(page, page_count(len(ordered), page_size)),
+            "pages": page_count(len(ordered), page_size),
+            "page_size": page_size,
+            "students": json.loads(frame.to_json(orient="records", force_ascii=False)),
+        }
+
+    return _etag("students", data.version, sorted(query.items())), build
+
+
+def recommendations_endpoint(query):
+    cluster = _param(query, "cluster")
+
+    def build():
+        if cluster is None:
+            return {"recommendations": RECOMMENDATIONS}
+        key = map_cluster_label(cluster)
+        if key not in RECOMMENDATIONS:
+            raise ApiError(404, "no recommendations for %r" % cluster)
+        return {"cluster": cluster, "persona": key, "recommendations": RECOMMENDATIONS[key]}
+
+    return _etag("recommendations", RECOMMENDATIONS_VERSION, cluster), build
+
+
+ROUTES = {
+    "/api/cohorts": (cohorts_endpoint, False),
+    "/api/clusters": (clusters_endpoint, False),
+    "/api/means": (means_endpoint, False),
+    "/api/students": (students_endpoint, True),
+    "/api/recommendations": (recommendations_endpoint, False),
+}
+
+
+# ------------------------------------------------------------
+# HTTP server
+# ------------------------------------------------------------
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "ClusterAPI/1.0"
+
+    def _authorized(self, sensitive):
+        if API_TOKEN is None:
+            return not sensitive
+        header = self.headers.get("Authorization", "")
+        return header.startswith("Bearer ") and hmac.compare_digest(header[7:].encode(), API_TOKEN.encode())
+
+    def _send(self, status, body=None, etag=None, head=False):
+        data = b"" if body is None else json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "private, no-cache")
+        if status != 304:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if not head and status != 304:
+            self.wfile.write(data)
+
+    def _handle(self, head=False):
+        url = urlsplit(self.path)
+        route = ROUTES.get(url.path.rstrip("/"))
+        if route is None:
+            return self._send(404, {"error": "not found"}, head=head)
+        endpoint, sensitive = route
+        if not self._authorized(sensitive):
+            message = "set DASHBOARD_API_TOKEN to enable this endpoint" if API_TOKEN is None else "missing or invalid token"
+            return self._send(403 if API_TOKEN is None else 401, {"error": message}, head=head)
+        try:
+            etag, build = endpoint(parse_qs(url.query))
+            if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+                return self._send(304, etag=etag)
+            return self._send(200, build(), etag=etag, head=head)
+        except ApiError as e:
+            return self._send(e.status, {"error": str(e)}, head=head)
+        except Exception:
+            self.log_error("error serving %s", self.path)
+            return self._send(500, {"error": "internal error"}, head=head)
+
+    def do_GET(self):
+        self._handle()
+
+    def do_HEAD(self):
+        self._handle(head=True)
+
+    def log_request(self, code="-", size="-"):
+        # Errors are still logged through log_error()
+        pass
+
+
+def make_server(host="127.0.0.1", port=8600):
+    return ThreadingHTTPServer((host, port), ApiHandler)
+
+
+def start_in_background(host="127.0.0.1", port=8600):
+    """Start the API in a daemon thread of this process, once.
+
+    Returns the server, or None if the port could not be bound (e.g. another
+    app process already serves it); later calls do not retry.
+    """
+    global _server, _server_started
+    with _server_lock:
+        if not _server_started:
+            _server_started = True
+            try:
+                _server = make_server(host, port)
+            except OSError:
+                _server = None
+            else:
+                threading.Thread(target=_server.serve_forever, name="cluster-api", daemon=True).start()
+    return _server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the read-only cluster data API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    args = parser.parse_args(argv)
+    server = make_server(args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port}/api/clusters")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
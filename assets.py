@@ -0,0 +1,136 @@
+# assets.py - Compile-once CSS theme and pre-rendered HTML fragments
+# ------------------------------------------------------------
+# Everything a rerun sends to the browser is sent again on the next rerun, so
+# invariant markup should be small and built once. The theme in
+# assets/theme.css is minified once per process into one <style> element.
+# That element is identical on every rerun and larger than
+# global.minCachedMessageSize (.streamlit/config.toml), so Streamlit's
+# message cache sends it once per session and afterwards only its hash.
+# (Streamlit's static file serving would send the CSS as text/plain with
+# nosniff, which browsers refuse as a stylesheet.)
+#
+# Fragments that never change (hero banners, the welcome page text,
+# recommendation cards) are rendered here at import time.
+import os
+import re
+import threading
+import textwrap
+
+from recommendations import RECOMMENDATIONS
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+THEME_SOURCE = os.path.join(APP_DIR, "assets", "theme.css")
+
+_theme = None
+_theme_lock = threading.Lock()
+
+
+# ------------------------------------------------------------
+# CSS theme
+# ------------------------------------------------------------
+def minify_css(css):
+    """Drop comments and redundant whitespace (no selector rewriting)"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    # Whitespace before ':' is kept: "div :hover" and "div:hover" differ
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+def theme_html(source=THEME_SOURCE):
+    """The minified theme as a <style> element, compiled once per process"""
+    global _theme
+    if _theme is None:
+        with _theme_lock:
+            if _theme is None:
+                with open(source, encoding="utf-8") as f:
+                    _theme = "<style>%s</style>" % minify_css(f.read())
+    return _theme
+
+
+# ------------------------------------------------------------
+# Pre-rendered fragments
+# ------------------------------------------------------------
+def _fragment(html):
+    """Dedented, single-line markup (Markdown would treat indentation as code)"""
+    return re.sub(r">\s+<", "><", textwrap.dedent(html).strip())
+
+
+WELCOME_HERO_HTML = _fragment("""
+    <div class="welcome-container">
+        <h1 class="welcome-title">🎓 Student Engagement Clustering Dashboard</h1>
+        <p class="welcome-subtitle">Unlock insights into student learning patterns with advanced clustering analytics</p>
+    </div>
+""")
+
+# One Markdown block per welcome page column
+WELCOME_COLUMNS = [textwrap.dedent(text).strip() for text in (
+    """
+    ### 🔍 Pattern Recognition
+    Our advanced clustering algorithm analyzes student behavior patterns including video engagement, pause frequency, likes, and forum participation to identify distinct learning groups.
+
+    ### 📈 Engagement Metrics
+    **Analysis based on:**
+    - Video play frequency
+    - Pause patterns
+    - Like interactions
+    - Forum participation
+    """,
+    """
+    ### 📊 Data-Driven Insights
+    Transform raw engagement metrics into actionable insights. Understand how different student groups interact with course materials and identify areas for improvement.
+
+    ### 💡 Educator Benefits
+    - Identify at-risk students early
+    - Customize intervention strategies
+    - Improve course effectiveness
+    - Enhance student outcomes
+    """,
+    """
+    ### 🎯 Personalized Learning
+    Enable targeted interventions by understanding the unique characteristics of each student cluster. Tailor your teaching approach to meet diverse learning needs.
+
+    ### 👥 Student Groups Identified
+    **The Enthusiasts:** Highly engaged students\\
+    **Steady Learners:** Consistent participants\\
+    **Silent Observers:** Passive but present\\
+    **Disengaged:** Need extra support
+    """,
+)]
+
+WELCOME_ABOUT_HTML = _fragment("""
+    <div style="text-align: center; color: #6b7a90; padding: 1rem; background: #f8f9fa; border-radius: 10px; margin: 1rem 0;">
+        <p><strong>About This Tool:</strong> This dashboard uses machine learning clustering techniques to group students based on their engagement patterns. The insights help educators understand diverse learning behaviors and implement targeted teaching strategies.</p>
+        <p style="margin-top: 1rem;"><em>Developed by Oluwatudimu Emmanuel Tobi - IFS/19/0622</em></p>
+    </div>
+""")
+
+DASHBOARD_HERO_HTML = _fragment("""
+    <div class="hero">
+      <h1>🎓 Student Engagement Clustering Dashboard</h1>
+      <p class="m-0">Group students by engagement and get educator-ready recommendations. (Login required to view personal details)</p>
+    </div>
+""")
+
+
+def _rec_card(title, recs):
+    items = "".join("<li>%s</li>" % r for r in recs)
+    return '<div class="rec-card"><h4 class="m-0">%s</h4><ul>%s</ul></div>' % (title, items)
+
+
+# Recommendation key -> card, and every card inside one grid (the "All" view)
+REC_CARDS = {key: _rec_card(key, recs) for key, recs in RECOMMENDATIONS.items()}
+REC_GRID_HTML = '<div class="rec-grid">%s</div>' % "".join(REC_CARDS.values())
+
+
+def rec_grid_html(key):
+    """Grid holding the card for one recommendation key (None if unknown)"""
+    card = REC_CARDS.get(key)
+    return None if card is None else '<div class="rec-grid">%s</div>' % card
+
+
+def stat_card_html(name, count, pct):
+    return ('<div class="stat-card"><div class="stat-title">%s</div>'
+            '<div class="stat-number">%d</div><div class="stat-pct">%s%%</div></div>') % (name, count, pct)
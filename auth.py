@@ -0,0 +1,426 @@
+# auth.py - Password hashing, user stores and signed session tokens
+# ------------------------------------------------------------
+# Login used to compare against one hardcoded username/password, and a login
+# could not expire or be revoked. Now:
+#
+# - Users live in a pluggable store (in memory, a JSON file or SQLite) with
+#   salted scrypt hashes, so a stolen store does not reveal passwords and
+#   every guess costs tens of milliseconds.
+# - A successful login issues a session token signed with a shared secret
+#   (DASHBOARD_SECRET_KEY). The dashboard keeps it in session_state and in an
+#   HttpOnly cookie (see session_cookie.py), and re-validates it
+#   periodically, so any replica holding the secret can resume the session.
+# - Logout revokes the token's id in the session store, which also holds the
+#   one-time codes that hand a new token to the cookie endpoint.
+#
+# All three settings are required; get_authenticator() raises ConfigError
+# when one is missing, rather than falling back to per-process state:
+#   DASHBOARD_SECRET_KEY     at least MIN_SECRET_BYTES of random text
+#   DASHBOARD_USER_STORE     "file:<path>" or "sqlite:<path>"
+#   DASHBOARD_SESSION_STORE  "sqlite:<path>" on a volume every replica can reach
+#
+# There is no built-in account. Adding a user:
+#   python auth.py sqlite:auth.db add alice --role admin
+import argparse
+import base64
+import getpass
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 14, 8, 1
+PBKDF2_ITERATIONS = 600000
+SALT_BYTES = 16
+SESSION_HOURS = float(os.environ.get("DASHBOARD_SESSION_HOURS", "12"))
+# Seconds a one-time login code can be redeemed for its token
+CODE_SECONDS = 60
+MIN_SECRET_BYTES = 32
+
+
+class ConfigError(Exception):
+    """The login settings in the environment are missing or unusable"""
+
+
+# ------------------------------------------------------------
+# Password hashing
+# ------------------------------------------------------------
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def hash_password(password):
+    """Salted slow hash as "scrypt$n$r$p$salt$hash" (PBKDF2 if scrypt is unavailable)"""
+    salt = os.urandom(SALT_BYTES)
+    if hasattr(hashlib, "scrypt"):
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P)
+        return "scrypt$%d$%d$%d$%s$%s" % (SCRYPT_N, SCRYPT_R, SCRYPT_P, _b64(salt), _b64(digest))
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PBKDF2_ITERATIONS)
+    return "pbkdf2_sha256$%d$%s$%s" % (PBKDF2_ITERATIONS, _b64(salt), _b64(digest))
+
+
+def verify_password(password, encoded):
+    """True if ``password`` matches a hash from hash_password (constant-time compare)"""
+    try:
+        scheme, *params = encoded.split("$")
+        if scheme == "scrypt":
+            n, r, p, salt, expected = params
+            digest = hashlib.scrypt(password.encode(), salt=_unb64(salt), n=int(n), r=int(r), p=int(p))
+        elif scheme == "pbkdf2_sha256":
+            iterations, salt, expected = params
+            digest = hashlib.pbkdf2_hmac("sha256", password.encode(), _unb64(salt), int(iterations))
+        else:
+            return False
+        # binascii.Error from a malformed stored hash is a ValueError too
+        expected = _unb64(expected)
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(digest, expected)
+
+
+# A hash to verify against when the user does not exist, so unknown and known
+# usernames take the same time to reject
+_DUMMY_HASH = None
+
+
+def _dummy_hash():
+    global _DUMMY_HASH
+    if _DUMMY_HASH is None:
+        _DUMMY_HASH = hash_password(secrets.token_hex(8))
+    return _DUMMY_HASH
+
+
+# ------------------------------------------------------------
+# User stores
+# ------------------------------------------------------------
+class User:
+    def __init__(self, username, password_hash, roles=()):
+        self.username = username
+        self.password_hash = password_hash
+        self.roles = tuple(roles)
+
+
+class MemoryUserStore:
+    """Users held in this process (lost on restart)"""
+
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def get(self, username):
+        with self._lock:
+            return self._users.get(username)
+
+    def add(self, username, password, roles=()):
+        user = User(username, hash_password(password), roles)
+        with self._lock:
+            self._users[username] = user
+        return user
+
+
+class FileUserStore:
+    """Users in a JSON file {"name": {"password": <hash>, "roles": [...]}}, re-read when it changes"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._key = None
+        self._users = {}
+
+    def _load(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._users, self._key = {}, None
+            return
+        key = (st.st_size, st.st_mtime_ns)
+        if key != self._key:
+            with open(self.path, encoding="utf-8") as f:
+                raw = json.load(f)
+            self._users = {name: User(name, u["password"], u.get("roles", ())) for name, u in raw.items()}
+            self._key = key
+
+    def get(self, username):
+        with self._lock:
+            self._load()
+            return self._users.get(username)
+
+    def add(self, username, password, roles=()):
+        user = User(username, hash_password(password), roles)
+        with self._lock:
+            self._load()
+            self._users[username] = user
+            raw = {u.username: {"password": u.password_hash, "roles": list(u.roles)} for u in self._users.values()}
+            tmp = "%s.tmp%d" % (self.path, os.getpid())
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(raw, f, indent=2)
+            os.replace(tmp, self.path)
+            self._key = None
+        return user
+
+
+class _Sqlite:
+    """One connection per thread to a SQLite file"""
+
+    def __init__(self, path, schema):
+        self.path = path
+        self._local = threading.local()
+        with self.connect() as conn:
+            conn.executescript(schema)
+
+    def connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10)
+        return conn
+
+
+class SqliteUserStore(_Sqlite):
+    """Users in a SQLite table (safe to share between replicas on one volume)"""
+
+    def __init__(self, path):
+        super().__init__(path, "CREATE TABLE IF NOT EXISTS users ("
+                               "username TEXT PRIMARY KEY, password_hash TEXT NOT NULL, roles TEXT NOT NULL DEFAULT '')")
+
+    def get(self, username):
+        row = self.connect().execute(
+            "SELECT username, password_hash, roles FROM users WHERE username = ?", (username,)).fetchone()
+        if row is None:
+            return None
+        return User(row[0], row[1], [r for r in row[2].split(",") if r])
+
+    def add(self, username, password, roles=()):
+        user = User(username, hash_password(password), roles)
+        with self.connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO users VALUES (?, ?, ?)", (username, user.password_hash, ",".join(roles)))
+        return user
+
+
+# ------------------------------------------------------------
+# Session (revocation) stores
+# ------------------------------------------------------------
+class MemorySessionStore:
+    """Revoked session ids and login codes of this process"""
+
+    def __init__(self):
+        self._revoked = {}
+        self._codes = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, sid, expires):
+        with self._lock:
+            now = time.time()
+            # Forget revocations of tokens that have expired anyway
+            for old in [s for s, exp in self._revoked.items() if exp < now]:
+                del self._revoked[old]
+            self._revoked[sid] = expires
+
+    def is_revoked(self, sid):
+        with self._lock:
+            return sid in self._revoked
+
+    def put_code(self, code, token, expires):
+        with self._lock:
+            now = time.time()
+            for old in [c for c, (_, exp) in self._codes.items() if exp < now]:
+                del self._codes[old]
+            self._codes[code] = (token, expires)
+
+    def take_code(self, code):
+        """The token stored under ``code`` if it has not expired; a code works once"""
+        with self._lock:
+            token, expires = self._codes.pop(code, (None, 0))
+        return token if expires >= time.time() else None
+
+
+class SqliteSessionStore(_Sqlite):
+    """Revoked session ids and login codes in SQLite, shared by every replica"""
+
+    def __init__(self, path):
+        super().__init__(path, "CREATE TABLE IF NOT EXISTS revoked_sessions (sid TEXT PRIMARY KEY, expires REAL NOT NULL);"
+                               "CREATE TABLE IF NOT EXISTS login_codes (code TEXT PRIMARY KEY, token TEXT NOT NULL, expires REAL NOT NULL)")
+
+    def revoke(self, sid, expires):
+        with self.connect() as conn:
+            conn.execute("DELETE FROM revoked_sessions WHERE expires < ?", (time.time(),))
+            conn.execute("INSERT OR REPLACE INTO revoked_sessions VALUES (?, ?)", (sid, expires))
+
+    def is_revoked(self, sid):
+        return self.connect().execute("SELECT 1 FROM revoked_sessions WHERE sid = ?", (sid,)).fetchone() is not None
+
+    def put_code(self, code, token, expires):
+        with self.connect() as conn:
+            conn.execute("DELETE FROM login_codes WHERE expires < ?", (time.time(),))
+            conn.execute("INSERT INTO login_codes VALUES (?, ?, ?)", (code, token, expires))
+
+    def take_code(self, code):
+        """The token stored under ``code`` if it has not expired; a code works once"""
+        with self.connect() as conn:
+            # Delete and read in one statement, so two replicas cannot both redeem it
+            row = conn.execute("DELETE FROM login_codes WHERE code = ? RETURNING token, expires", (code,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+
+def open_user_store(spec):
+    if spec == "memory":
+        return MemoryUserStore()
+    kind, _, path = spec.partition(":")
+    if kind == "file" and path:
+        return FileUserStore(path)
+    if kind == "sqlite" and path:
+        return SqliteUserStore(path)
+    raise ValueError("unknown user store %r (use memory, file:<path> or sqlite:<path>)" % spec)
+
+
+def open_session_store(spec):
+    if spec == "memory":
+        return MemorySessionStore()
+    kind, _, path = spec.partition(":")
+    if kind == "sqlite" and path:
+        return SqliteSessionStore(path)
+    raise ValueError("unknown session store %r (use memory or sqlite:<path>)" % spec)
+
+
+# ------------------------------------------------------------
+# Authenticator: login, signed tokens, logout
+# ------------------------------------------------------------
+class Session:
+    """Validated token claims"""
+
+    def __init__(self, claims, token):
+        self.token = token
+        self.sid = claims["sid"]
+        self.username = claims["sub"]
+        self.roles = tuple(claims.get("roles", ()))
+        self.expires = claims["exp"]
+
+
+class Authenticator:
+    def __init__(self, users, sessions, secret, session_hours=SESSION_HOURS):
+        self.users = users
+        self.sessions = sessions
+        self._secret = secret if isinstance(secret, bytes) else secret.encode()
+        self.session_seconds = session_hours * 3600
+
+    def _sign(self, payload):
+        return _b64(hmac.new(self._secret, payload.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self, user):
+        now = time.time()
+        claims = {"sub": user.username, "roles": list(user.roles), "sid": secrets.token_hex(12),
+                  "iat": int(now), "exp": int(now + self.session_seconds)}
+        payload = _b64(json.dumps(claims, separators=(",", ":")).encode())
+        return "%s.%s" % (payload, self._sign(payload))
+
+    def login(self, username, password):
+        """Return a signed token, or None if the credentials are wrong"""
+        user = self.users.get(username) if username else None
+        if user is None:
+            verify_password(password, _dummy_hash())
+            return None
+        if not verify_password(password, user.password_hash):
+            return None
+        return self.issue(user)
+
+    def validate(self, token):
+        """Return the Session for a valid, unexpired, unrevoked token, else None"""
+        try:
+            payload, signature = token.split(".")
+        except (AttributeError, ValueError):
+            return None
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return None
+        try:
+            claims = json.loads(_unb64(payload))
+        except ValueError:
+            return None
+        if claims.get("exp", 0) < time.time() or self.sessions.is_revoked(claims.get("sid")):
+            return None
+        return Session(claims, token)
+
+    def logout(self, token):
+        session = self.validate(token)
+        if session is not None:
+            self.sessions.revoke(session.sid, session.expires)
+
+    def issue_code(self, token):
+        """One-time code that redeem_code() trades for ``token`` within CODE_SECONDS.
+
+        Lets the browser fetch the session cookie without the token itself
+        passing through the page.
+        """
+        code = secrets.token_urlsafe(24)
+        self.sessions.put_code(code, token, time.time() + CODE_SECONDS)
+        return code
+
+    def redeem_code(self, code):
+        """The still-valid token issued for ``code``, else None"""
+        token = self.sessions.take_code(code) if code else None
+        return token if token is not None and self.validate(token) is not None else None
+
+
+_authenticator = None
+_authenticator_lock = threading.Lock()
+
+
+def authenticator_from_env(environ=os.environ):
+    """Build an Authenticator from the DASHBOARD_* settings; ConfigError if any is missing.
+
+    In-memory stores are refused: users and logouts would differ per replica
+    and vanish on restart.
+    """
+    names = ("DASHBOARD_SECRET_KEY", "DASHBOARD_USER_STORE", "DASHBOARD_SESSION_STORE")
+    missing = [name for name in names if not environ.get(name)]
+    if missing:
+        raise ConfigError("Login is not configured: set %s (see auth.py)." % ", ".join(missing))
+    secret = environ["DASHBOARD_SECRET_KEY"]
+    if len(secret.encode()) < MIN_SECRET_BYTES:
+        raise ConfigError("DASHBOARD_SECRET_KEY must be at least %d bytes long." % MIN_SECRET_BYTES)
+    user_spec = environ["DASHBOARD_USER_STORE"]
+    session_spec = environ["DASHBOARD_SESSION_STORE"]
+    if "memory" in (user_spec, session_spec):
+        raise ConfigError("DASHBOARD_USER_STORE and DASHBOARD_SESSION_STORE must be shared stores, not memory.")
+    try:
+        return Authenticator(open_user_store(user_spec), open_session_store(session_spec), secret)
+    except (ValueError, OSError, sqlite3.Error) as e:
+        raise ConfigError("Cannot open the login stores: %s" % e)
+
+
+def get_authenticator():
+    """Return the process-wide Authenticator (see authenticator_from_env)"""
+    global _authenticator
+    with _authenticator_lock:
+        if _authenticator is None:
+            _authenticator = authenticator_from_env()
+        return _authenticator
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage dashboard users in a file or SQLite store.")
+    parser.add_argument("store", help="file:<path> or sqlite:<path>")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="add or replace a user")
+    add.add_argument("username")
+    add.add_argument("--role", action="append", default=[], help="e.g. admin (repeatable)")
+    args = parser.parse_args(argv)
+
+    store = open_user_store(args.store)
+    password = getpass.getpass("Password for %s: " % args.username)
+    if password != getpass.getpass("Repeat password: "):
+        parser.error("passwords do not match")
+    store.add(args.username, password, args.role)
+    print(f"Saved {args.username} to {args.store}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# bench_dashboard.py - Headless benchmarks of the dashboard's data paths
+# ------------------------------------------------------------
+# Times the work a dashboard rerun (or its first request per data version)
+# does, without Streamlit or a browser, on synthetic cohorts of increasing
+# size: loading, aggregation, filtering, interpretation, export, figure
+# building, clustering, the 2-D projection, cluster quality metrics,
+# similar-student lookups and engagement-to-outcome analytics. Results are
+# written as JSON so runs before and after a change can be compared.
+#
+# Usage:
+#   python benchmarks/bench_dashboard.py                       # 10k,100k,1M
+#   python benchmarks/bench_dashboard.py --sizes 10k,100k,1M,10M --out after.json
+#   python benchmarks/bench_dashboard.py --sizes 100k --compare before.json
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import aggregates  # noqa: E402
+import cluster_quality  # noqa: E402
+import data_loader  # noqa: E402
+import export  # noqa: E402
+import interpretation  # noqa: E402
+import neighbors  # noqa: E402
+import outcomes  # noqa: E402
+import projection  # noqa: E402
+import risk_crosstab  # noqa: E402
+import search_index  # noqa: E402
+import table_view  # noqa: E402
+from snapshot import HAVE_PYARROW  # noqa: E402
+from synthetic import generate, parse_size, write  # noqa: E402
+
+try:
+    import figures
+except ImportError:  # plotly not installed
+    figures = None
+
+DEFAULT_SIZES = "10k,100k,1M"
+
+# Paths that cost O(n) per call are only repeated a few times at large sizes
+MAX_REPEAT_ROWS = 2000000
+
+
+def timed(fn, repeat):
+    """Run ``fn`` ``repeat`` times; returns (timings in ms, last result)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - t) * 1000)
+    return times, result
+
+
+def fresh(data):
+    """A Dataset sharing ``data``'s frame but with empty per-version caches"""
+    clone = data_loader.Dataset(data.path, data.key, data.df, data.cluster_descriptions, version=data.version)
+    return clone
+
+
+def bench_size(n, repeat, workdir, seed=0):
+    results = []
+
+    def add(group, name, times, **extra):
+        row = {
+            "rows": n, "group": group, "name": name, "repeat": len(times),
+            "min_ms": round(min(times), 3),
+            "median_ms": round(statistics.median(times), 3),
+            "mean_ms": round(statistics.fmean(times), 3),
+        }
+        row.update(extra)
+        results.append(row)
+        print(f"  {group:<14} {name:<34} median {row['median_ms']:>11.3f} ms")
+
+    reps = repeat if n <= MAX_REPEAT_ROWS else 1
+
+    # --- Loading ---
+    frame = generate(n, seed=seed)
+    csv_path = write(frame, os.path.join(workdir, f"students_{n}.csv"))
+    del frame
+
+    def load_csv():
+        data_loader.clear_cache()
+        return data_loader.load_dataset(csv_path, prefer_snapshot=False)
+
+    times, data = timed(load_csv, reps)
+    add("load", "csv (cold)", times, file_bytes=os.path.getsize(csv_path))
+    times, _ = timed(lambda: data_loader.load_dataset(csv_path, prefer_snapshot=False), max(repeat, 5))
+    add("load", "csv (cached, rerun)", times)
+    add("load", "frame memory", [0.0], bytes=int(data.df.memory_usage(deep=True).sum()))
+
+    if HAVE_PYARROW:
+        snap_path = write(pd.read_csv(csv_path), os.path.join(workdir, f"students_{n}.parquet"))
+
+        def load_snapshot():
+            data_loader.clear_cache()
+            return data_loader.load_dataset(snap_path)
+
+        times, _ = timed(load_snapshot, reps)
+        add("load", "parquet snapshot (cold)", times, file_bytes=os.path.getsize(snap_path))
+        data_loader.clear_cache()
+        data = data_loader.load_dataset(csv_path, prefer_snapshot=False)
+
+    # --- Aggregation ---
+    times, cube = timed(lambda: aggregates.build_cluster_cube(data), reps)
+    add("aggregation", "cluster cube (build)", times)
+    times, _ = timed(lambda: aggregates.get_cluster_cube(data), max(repeat, 5))
+    add("aggregation", "cluster cube (cached)", times)
+    times, _ = timed(lambda: risk_crosstab.build_risk_cube(data), reps)
+    add("aggregation", "risk cube (build)", times)
+
+    # --- Filtering ---
+    selected = cube.clusters[0]
+    times, _ = timed(lambda: table_view.cluster_positions(fresh(data), selected), reps)
+    add("filtering", "cluster positions (build)", times)
+    times, positions = timed(lambda: table_view.cluster_positions(data, selected), max(repeat, 5))
+    add("filtering", "cluster positions (cached)", times)
+    times, _ = timed(lambda: table_view.sorted_positions(fresh(data), selected, "CGPA", False), reps)
+    add("filtering", "sorted positions (build)", times)
+    ordered = table_view.sorted_positions(data, selected, "CGPA", False)
+    times, _ = timed(lambda: table_view.page_frame(data.df, ordered, 3, 50, [data.applicant_col, data.cluster_col] + data.feature_cols), max(repeat, 5))
+    add("filtering", "page of 50 rows", times)
+    times, index = timed(lambda: search_index.SearchIndex(data), reps)
+    add("filtering", "search index (build)", times)
+    query = {"Probation": "Yes", "Result": "Fail", data.cluster_col: selected}
+    times, _ = timed(lambda: index.query(query), max(repeat, 20))
+    add("filtering", "3-way filter query", times)
+    times, _ = timed(lambda: index.query(query, name="Student 12"), max(repeat, 20))
+    add("filtering", "filter + name prefix query", times)
+
+    # --- Interpretation ---
+    times, interpretations = timed(lambda: interpretation.Interpretations(cube), max(repeat, 20))
+    add("interpretation", "all clusters (render)", times)
+    times, _ = timed(lambda: interpretation.get_interpretations(cube).text(selected), max(repeat, 20))
+    add("interpretation", "callout (cached)", times)
+
+    # --- Export ---
+    for fmt in export.EXPORT_FORMATS:
+        times, payload = timed(lambda: export.export_bytes(data, positions, fmt), reps)
+        add("export", f"{fmt} (selected cluster)", times, bytes=len(payload))
+
+    # --- Figures ---
+    if figures is not None:
+        def build_figures():
+            figures.clear_cache()
+            figures.distribution_figure(cube)
+            figures.comparison_figure(cube, selected)
+
+        times, _ = timed(build_figures, max(repeat, 5))
+        add("figures", "distribution + comparison (build)", times)
+        times, _ = timed(lambda: (figures.distribution_figure(cube), figures.comparison_figure(cube, selected)), max(repeat, 5))
+        add("figures", "distribution + comparison (cached)", times)
+
+    # --- Clustering ---
+    times, _ = timed(lambda: data_loader.recluster_dataset(fresh(data), method="minibatch"), reps)
+    add("clustering", "mini-batch k-means", times)
+
+    # --- Projection ---
+    for method in ("svd", "randomized"):
+        times, _ = timed(lambda: projection.get_embedding(fresh(data), method=method), reps)
+        add("projection", f"PCA ({method})", times)
+    times, _ = timed(lambda: projection.get_embedding_sample(fresh(data)), reps)
+    add("projection", "PCA + density sample", times)
+
+    # --- Cluster quality ---
+    times, _ = timed(lambda: cluster_quality.get_cluster_quality(fresh(data)), reps)
+    add("quality", "silhouette (sampled) + Davies-Bouldin", times)
+
+    # --- Similar students ---
+    times, knn = timed(lambda: neighbors.NeighborIndex(fresh(data)), reps)
+    add("neighbors", "index build", times)
+    rows = iter(np.random.default_rng(seed).integers(0, n, size=1000))
+    times, _ = timed(lambda: knn.query([next(rows)], neighbors.DEFAULT_K), max(repeat, 20))
+    add("neighbors", f"{neighbors.DEFAULT_K}-NN query", times)
+
+    # --- Engagement vs outcomes ---
+    times, _ = timed(lambda: outcomes.OutcomeAnalytics(data), reps)
+    add("outcomes", "correlations + pass rates + grade distributions", times)
+
+    data_loader.clear_cache()
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def compare(results, baseline_path):
+    """Print median time ratios against a previous JSON run"""
+    with open(baseline_path) as f:
+        baseline = {(r["rows"], r["group"], r["name"]): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path} (ratio < 1 is faster):")
+    for r in results:
+        old = baseline.get((r["rows"], r["group"], r["name"]))
+        if old is None or not old["median_ms"]:
+            continue
+        ratio = r["median_ms"] / old["median_ms"]
+        print(f"  {r['rows']:>10,} {r['group']:<14} {r['name']:<34} {old['median_ms']:>10.3f} -> {r['median_ms']:>10.3f} ms  x{ratio:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's data paths on synthetic cohorts.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated row counts (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed repetitions per path (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="previous JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes.split(","):
+            n = parse_size(size)
+            print(f"{n:,} rows")
+            results += bench_size(n, args.repeat, workdir, seed=args.seed)
+
+    report = {"environment": environment(), "results": results}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
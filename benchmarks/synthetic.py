@@ -0,0 +1,107 @@
+# synthetic.py - Synthetic student cohorts at benchmark scale
+# ------------------------------------------------------------
+# Reproduces the schema of clustered_students.csv and, per cluster, the value
+# distribution of every column, so aggregates, filters and exports behave as
+# they would on a real cohort of the requested size. Columns are sampled
+# independently within each cluster (cross-column correlations beyond the
+# cluster are not kept).
+#
+# Usage:
+#   python benchmarks/synthetic.py 100k students_100k.csv
+#   python benchmarks/synthetic.py 1M students_1m.parquet
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import DEFAULT_DATA_PATH  # noqa: E402
+from snapshot import is_snapshot, write_snapshot  # noqa: E402
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), DEFAULT_DATA_PATH)
+NAME_COL = "ApplicantName"
+CLUSTER_COL = "Cluster"
+SIZE_SUFFIXES = {"k": 1000, "m": 1000000}
+
+
+def parse_size(text):
+    """'10k' -> 10000, '1M' -> 1000000, '250' -> 250"""
+    text = str(text).strip().lower()
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def _names(n):
+    if pa is not None:
+        ids = pa.array(np.arange(1, n + 1)).cast(pa.string())
+        return pd.Series(pd.arrays.ArrowStringArray(pc.binary_join_element_wise("Student ", ids, "")))
+    return pd.Series(["Student %d" % i for i in range(1, n + 1)])
+
+
+def generate(n, seed=0, source=FIXTURE):
+    """Return an n-row frame with the source file's schema and per-cluster distributions"""
+    rng = np.random.default_rng(seed)
+    src = pd.read_csv(source)
+
+    cluster_ids, cluster_sizes = np.unique(src[CLUSTER_COL], return_counts=True)
+    cluster_of_row = rng.choice(len(cluster_ids), size=n, p=cluster_sizes / cluster_sizes.sum())
+    # Group rows by cluster so each column can be sampled one cluster at a time
+    cluster_of_row.sort()
+    bounds = np.searchsorted(cluster_of_row, np.arange(len(cluster_ids) + 1))
+
+    out = {}
+    for col in src.columns:
+        if col == NAME_COL:
+            out[col] = _names(n)
+            continue
+        if col == CLUSTER_COL:
+            out[col] = cluster_ids[cluster_of_row]
+            continue
+        values = pd.unique(src[col])
+        codes = np.empty(n, dtype=np.int32)
+        for i, cid in enumerate(cluster_ids):
+            observed = src.loc[src[CLUSTER_COL] == cid, col]
+            freq = observed.value_counts(normalize=True).reindex(values, fill_value=0).to_numpy()
+            codes[bounds[i]:bounds[i + 1]] = rng.choice(len(values), size=bounds[i + 1] - bounds[i], p=freq)
+        if pd.api.types.is_integer_dtype(src[col].dtype):
+            out[col] = np.asarray(values)[codes]
+        else:
+            out[col] = pd.Categorical.from_codes(codes, categories=list(values))
+
+    frame = pd.DataFrame(out, columns=src.columns)
+    # Shuffle so clusters are interleaved as in a real export
+    return frame.iloc[rng.permutation(n)].reset_index(drop=True)
+
+
+def write(frame, path):
+    """Write ``frame`` as CSV or, for .parquet/.feather paths, as a snapshot"""
+    if is_snapshot(path):
+        write_snapshot(frame, path)
+    else:
+        frame.to_csv(path, index=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic student cohort.")
+    parser.add_argument("size", help="number of rows, e.g. 10k, 100k, 1M, 10M")
+    parser.add_argument("out", help="output .csv, .parquet or .feather file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    write(generate(parse_size(args.size), seed=args.seed), args.out)
+    print(f"Wrote {args.out} ({os.path.getsize(args.out):,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
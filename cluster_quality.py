@@ -0,0 +1,152 @@
+# cluster_quality.py - How well separated the clusters are
+# ------------------------------------------------------------
+# Quality metrics for the cluster labels on the standardized engagement
+# features (the same matrix the cluster map projects, see projection.py):
+#
+# - Silhouette: exact silhouette needs every pairwise distance, O(n^2). It is
+#   estimated on a stratified sample instead. Each cluster contributes at
+#   least MIN_PER_CLUSTER rows, and per-row scores are weighted back to the
+#   cluster's share of the roster. Distances are computed in row blocks
+#   against the sample and reduced to per-cluster sums with one matrix
+#   product, so memory stays at block x sample.
+# - Davies-Bouldin: exact, from centroids and mean distances to them (O(n)).
+# - Per-cluster dispersion and centroid separation.
+#
+# Results are memoized on the Dataset, so each data version is scored once.
+import numpy as np
+import pandas as pd
+
+from clustering import sq_distances
+from projection import feature_matrix
+
+SAMPLE_SIZE = 4000
+MIN_PER_CLUSTER = 100
+BLOCK_ROWS = 1024
+
+# Mean silhouette -> reading shown in the dashboard (lowest bound first)
+SILHOUETTE_BANDS = [
+    (-1.0, "No substantial structure: the clusters overlap heavily; re-clustering is due."),
+    (0.25, "Weak structure: clusters overlap noticeably; consider re-clustering."),
+    (0.5, "Reasonable structure: clusters are distinct with some overlap."),
+    (0.7, "Strong structure: clusters are well separated."),
+]
+
+
+def silhouette_reading(score):
+    text = SILHOUETTE_BANDS[0][1]
+    for bound, reading in SILHOUETTE_BANDS:
+        if score >= bound:
+            text = reading
+    return text
+
+
+def stratified_sample(codes, k, size=SAMPLE_SIZE, min_per_cluster=MIN_PER_CLUSTER, seed=0):
+    """Row positions with a proportional share per cluster (at least ``min_per_cluster`` each)"""
+    rng = np.random.default_rng(seed)
+    counts = np.bincount(codes, minlength=k)
+    take = np.minimum(counts, np.maximum(np.round(counts / counts.sum() * size).astype(np.int64), min_per_cluster))
+    order = np.argsort(codes, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rows = [rng.choice(order[s:s + c], size=t, replace=False) for s, c, t in zip(starts, counts, take) if t]
+    return np.sort(np.concatenate(rows)) if rows else np.empty(0, dtype=np.int64)
+
+
+def silhouette_samples(Z, codes, k, block_rows=BLOCK_ROWS):
+    """Silhouette of every row of ``Z`` against the other rows of ``Z`` (exact within ``Z``)"""
+    counts = np.bincount(codes, minlength=k).astype(np.float64)
+    onehot = np.zeros((len(Z), k))
+    onehot[np.arange(len(Z)), codes] = 1.0
+    scores = np.zeros(len(Z))
+    for start in range(0, len(Z), block_rows):
+        block = Z[start:start + block_rows]
+        own = codes[start:start + len(block)]
+        # Sum of distances from each row to every cluster: one product per block
+        sums = np.sqrt(sq_distances(block, Z)) @ onehot
+        rows = np.arange(len(block))
+        same = counts[own] - 1
+        a = np.divide(sums[rows, own], same, out=np.zeros(len(block)), where=same > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            other = sums / counts
+        other[rows, own] = np.inf
+        other[:, counts == 0] = np.inf
+        b = other.min(axis=1)
+        denom = np.maximum(a, b)
+        s = np.divide(b - a, denom, out=np.zeros(len(block)), where=(denom > 0) & np.isfinite(b))
+        s[same == 0] = 0.0  # a cluster of one has silhouette 0 by convention
+        scores[start:start + len(block)] = s
+    return scores
+
+
+class ClusterQuality:
+    """Silhouette (sampled), Davies-Bouldin and per-cluster dispersion of one labelling"""
+
+    def __init__(self, Z, labels, clusters, sample_size=SAMPLE_SIZE, seed=0):
+        codes = np.asarray(labels, dtype=np.int64)
+        k = len(clusters)
+        n = len(Z)
+        counts = np.bincount(codes, minlength=k)
+        sums = np.zeros((k, Z.shape[1]))
+        for j in range(Z.shape[1]):
+            sums[:, j] = np.bincount(codes, weights=Z[:, j], minlength=k)
+        centroids = sums / np.maximum(counts, 1)[:, None]
+
+        # Dispersion: distance of every row to its own centroid (exact, O(n))
+        to_centroid = np.sqrt(((Z - centroids[codes]) ** 2).sum(axis=1))
+        mean_dist = np.bincount(codes, weights=to_centroid, minlength=k) / np.maximum(counts, 1)
+        rms = np.sqrt(np.bincount(codes, weights=to_centroid ** 2, minlength=k) / np.maximum(counts, 1))
+
+        present = counts > 0
+        sep = np.sqrt(sq_distances(centroids, centroids))
+        np.fill_diagonal(sep, np.inf)
+        sep[:, ~present] = np.inf
+        nearest = sep.argmin(axis=1)
+
+        # Davies-Bouldin: mean over clusters of the worst (S_i + S_j) / M_ij
+        if present.sum() > 1:
+            with np.errstate(divide="ignore"):
+                ratio = (mean_dist[:, None] + mean_dist[None, :]) / sep
+            self.davies_bouldin = float(ratio[present][:, present].max(axis=1).mean())
+        else:
+            self.davies_bouldin = float("nan")
+
+        # Silhouette on a stratified sample, weighted back to cluster shares
+        rows = stratified_sample(codes, k, sample_size, seed=seed)
+        self.n_rows = n
+        self.sample_size = len(rows)
+        sample_codes = codes[rows]
+        scores = silhouette_samples(Z[rows], sample_codes, k)
+        taken = np.bincount(sample_codes, minlength=k)
+        per_cluster = np.bincount(sample_codes, weights=scores, minlength=k) / np.maximum(taken, 1)
+        if present.sum() > 1:
+            self.silhouette = float((per_cluster * counts).sum() / n)
+        else:
+            self.silhouette = float("nan")
+
+        names = pd.Index([str(c) for c in clusters], name="Cluster")
+        self.clusters = names
+        self.table = pd.DataFrame({
+            "Students": counts,
+            "Silhouette": per_cluster,
+            "Mean distance to centroid": mean_dist,
+            "RMS radius": rms,
+            "Nearest cluster": [names[j] if present.sum() > 1 else "" for j in nearest],
+            "Distance to nearest centroid": np.where(np.isfinite(sep.min(axis=1)), sep.min(axis=1), np.nan),
+        }, index=names)[present]
+        np.fill_diagonal(sep, 0.0)
+        self.separation = pd.DataFrame(sep, index=names, columns=names).loc[present, present]
+
+    @property
+    def reading(self):
+        return silhouette_reading(self.silhouette)
+
+
+def build_cluster_quality(data, sample_size=SAMPLE_SIZE, seed=0):
+    Z, _ = feature_matrix(data)
+    codes, clusters = pd.factorize(data.df[data.cluster_col], sort=True)
+    known = codes >= 0
+    return ClusterQuality(Z[known], codes[known], list(clusters), sample_size, seed)
+
+
+def get_cluster_quality(data):
+    """Return the ClusterQuality of ``data``, computed once per data version"""
+    return data.memo("cluster_quality", build_cluster_quality)
@@ -0,0 +1,253 @@
+# clustering.py - Vectorized k-means engine for the engagement features
+# ------------------------------------------------------------
+# Recomputes clusters on Played/Paused/Likes/Segment directly in the app, so a
+# new weekly export does not need an offline notebook step. Features are
+# standardized, clustered with k-means (k-means++ init) or mini-batch k-means,
+# and the resulting centroids are named after the four personas the
+# recommendations are written for.
+import numpy as np
+import pandas as pd
+
+from recommendations import PERSONA_DESCRIPTIONS, PERSONA_LABELS
+
+DEFAULT_K = 4
+METHODS = ("kmeans", "minibatch")
+
+# Rows per block when assigning points to centroids, to bound temporary memory
+ASSIGN_CHUNK = 262144
+
+# Persona ranking from the centroid profile: the most/least engaged centroids
+# are the Enthusiasts/Disengaged; of the two in between, the one that interacts
+# (Likes, Segment) less than it watches (Played, Paused) is the Silent Observers.
+VIEWING_FEATURES = ("Played", "Paused")
+INTERACTION_FEATURES = ("Likes", "Segment")
+
+
+class ClusteringResult:
+    """Labels and centroids of one clustering run.
+
+    ``labels`` holds a cluster id per row (0 = most engaged centroid),
+    ``names`` the matching display labels and ``centroids`` a frame of
+    centroid coordinates in the original feature units, indexed by id.
+    """
+
+    def __init__(self, labels, names, centroids, inertia, n_iter, method):
+        self.labels = labels
+        self.names = names
+        self.centroids = centroids
+        self.inertia = inertia
+        self.n_iter = n_iter
+        self.method = method
+
+    @property
+    def k(self):
+        return len(self.names)
+
+    @property
+    def descriptions(self):
+        """Cluster id -> description text, for personas that have one"""
+        desc = {}
+        for cid, name in enumerate(self.names):
+            for key, label in PERSONA_LABELS.items():
+                if label == name:
+                    desc[cid] = PERSONA_DESCRIPTIONS[key]
+        return pd.Series(desc, name="Cluster Description", dtype=object).rename_axis("Cluster")
+
+
+# ------------------------------------------------------------
+# Core numerics
+# ------------------------------------------------------------
+def standardize(X):
+    """Return (Z, mean, scale) with zero-variance columns left unscaled"""
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    return (X - mean) / scale, mean, scale
+
+
+def sq_distances(X, C):
+    """Squared euclidean distances between rows of X and rows of C.
+
+    Uses ||x||^2 - 2 x.c + ||c||^2 so the work is a single matrix product.
+    """
+    d = (X * X).sum(axis=1)[:, None] - 2.0 * (X @ C.T) + (C * C).sum(axis=1)[None, :]
+    np.maximum(d, 0.0, out=d)
+    return d
+
+
+def assign(X, C):
+    """Return (labels, squared distance to the nearest centroid) for every row"""
+    n = len(X)
+    labels = np.empty(n, dtype=np.int32)
+    dist = np.empty(n, dtype=np.float64)
+    cc = (C * C).sum(axis=1)
+    for start in range(0, n, ASSIGN_CHUNK):
+        chunk = X[start:start + ASSIGN_CHUNK]
+        # ||x||^2 is the same for every centroid, so it only matters for the
+        # reported distance, not for the argmin
+        block = chunk @ C.T
+        block *= -2.0
+        block += cc
+        lab = block.argmin(axis=1)
+        labels[start:start + len(chunk)] = lab
+        dist[start:start + len(chunk)] = np.take_along_axis(block, lab[:, None], axis=1)[:, 0] + np.einsum("ij,ij->i", chunk, chunk)
+    np.maximum(dist, 0.0, out=dist)
+    return labels, dist
+
+
+def kmeans_plus_plus(X, k, rng):
+    """k-means++ seeding: each new centre is drawn proportionally to D(x)^2"""
+    n = len(X)
+    centers = np.empty((k, X.shape[1]), dtype=np.float64)
+    centers[0] = X[rng.integers(n)]
+    closest = sq_distances(X, centers[:1])[:, 0]
+    for i in range(1, k):
+        total = closest.sum()
+        if total <= 0:
+            # Fewer distinct points than clusters: reuse random rows
+            centers[i] = X[rng.integers(n)]
+            continue
+        idx = rng.choice(n, p=closest / total)
+        centers[i] = X[idx]
+        np.minimum(closest, sq_distances(X, centers[i:i + 1])[:, 0], out=closest)
+    return centers
+
+
+def _centroid_sums(X, labels, k):
+    sums = np.zeros((k, X.shape[1]), dtype=np.float64)
+    for j in range(X.shape[1]):
+        sums[:, j] = np.bincount(labels, weights=X[:, j], minlength=k)
+    return sums, np.bincount(labels, minlength=k)
+
+
+def kmeans(X, k=DEFAULT_K, n_init=None, max_iter=100, tol=1e-4, seed=0):
+    """Lloyd's k-means with k-means++ init; returns (centers, labels, inertia, n_iter).
+
+    ``n_init`` defaults to 4 restarts on small data and a single run on large
+    data, where k-means++ seeding alone is reliable and each run is costly.
+    """
+    rng = np.random.default_rng(seed)
+    if n_init is None:
+        n_init = 4 if len(X) <= 100000 else 1
+    tol = tol * float(X.var(axis=0).mean() or 1.0)
+    best = None
+    for _ in range(n_init):
+        centers = kmeans_plus_plus(X, k, rng)
+        for it in range(1, max_iter + 1):
+            labels, dist = assign(X, centers)
+            sums, counts = _centroid_sums(X, labels, k)
+            new = centers.copy()
+            filled = counts > 0
+            new[filled] = sums[filled] / counts[filled, None]
+            if not filled.all():
+                # Re-seed empty clusters at the points farthest from their centre
+                empty = np.flatnonzero(~filled)
+                far = np.argpartition(dist, len(dist) - len(empty))[len(dist) - len(empty):]
+                new[empty] = X[far]
+            shift = ((new - centers) ** 2).sum()
+            centers = new
+            if shift <= tol:
+                break
+        labels, dist = assign(X, centers)
+        inertia = float(dist.sum())
+        if best is None or inertia < best[2]:
+            best = (centers, labels, inertia, it)
+    return best
+
+
+def minibatch_kmeans(X, k=DEFAULT_K, batch_size=4096, max_iter=200, tol=1e-4, seed=0):
+    """Mini-batch k-means (Sculley 2010); returns (centers, labels, inertia, n_iter).
+
+    Each step moves every centre towards the mean of its batch points with a
+    per-centre learning rate of 1/count, so cost per step is O(batch_size * k).
+    """
+    rng = np.random.default_rng(seed)
+    n = len(X)
+    tol = tol * float(X.var(axis=0).mean() or 1.0)
+    init_rows = rng.choice(n, size=min(n, max(10 * k, 3 * batch_size)), replace=False)
+    centers = kmeans_plus_plus(X[init_rows], k, rng)
+    seen = np.zeros(k, dtype=np.float64)
+    quiet = 0
+    for it in range(1, max_iter + 1):
+        batch = X[rng.integers(n, size=min(batch_size, n))]
+        labels = sq_distances(batch, centers).argmin(axis=1)
+        sums, counts = _centroid_sums(batch, labels, k)
+        seen += counts
+        hit = counts > 0
+        new = centers.copy()
+        new[hit] += (sums[hit] - counts[hit, None] * centers[hit]) / seen[hit, None]
+        shift = ((new - centers) ** 2).sum()
+        centers = new
+        # Stop once the centres have stayed put for a few consecutive batches
+        quiet = quiet + 1 if shift <= tol else 0
+        if quiet >= 5:
+            break
+    labels, dist = assign(X, centers)
+    return centers, labels, float(dist.sum()), it
+
+
+# ------------------------------------------------------------
+# Personas
+# ------------------------------------------------------------
+def persona_names(centroids, feature_cols):
+    """Name standardized centroids, ordered most to least engaged.
+
+    With exactly four clusters the personas from recommendations.py are used;
+    otherwise clusters are called "Cluster 0", "Cluster 1", ... by engagement.
+    """
+    k = len(centroids)
+    if k != len(PERSONA_LABELS):
+        return ["Cluster %d" % i for i in range(k)]
+
+    view = [feature_cols.index(f) for f in VIEWING_FEATURES if f in feature_cols]
+    inter = [feature_cols.index(f) for f in INTERACTION_FEATURES if f in feature_cols]
+    middle = [1, 2]
+    if view and inter:
+        lean = centroids[1:3, inter].mean(axis=1) - centroids[1:3, view].mean(axis=1)
+        middle = [1, 2] if lean[0] >= lean[1] else [2, 1]
+
+    names = [None] * k
+    names[0] = PERSONA_LABELS["The Enthusiasts"]
+    names[middle[0]] = PERSONA_LABELS["The Steady Learners"]
+    names[middle[1]] = PERSONA_LABELS["The Silent Observers"]
+    names[3] = PERSONA_LABELS["The Disengaged"]
+    return names
+
+
+def fit_engagement_clusters(df, feature_cols, k=DEFAULT_K, method="kmeans", seed=0):
+    """Cluster ``df`` on ``feature_cols`` and return a ClusteringResult"""
+    if method not in METHODS:
+        raise ValueError("Unknown clustering method %r (expected one of %s)" % (method, ", ".join(METHODS)))
+    if not feature_cols:
+        raise ValueError("No engagement features available to cluster on.")
+
+    X = df[feature_cols].to_numpy(dtype=np.float64)
+    k = min(k, len(X))
+    Z, mean, scale = standardize(X)
+    if method == "minibatch":
+        centers, labels, inertia, n_iter = minibatch_kmeans(Z, k, seed=seed)
+    else:
+        centers, labels, inertia, n_iter = kmeans(Z, k, seed=seed)
+
+    # Renumber clusters from most to least engaged so ids are stable across runs
+    order = np.argsort(-centers.mean(axis=1), kind="stable")
+    remap = np.empty(k, dtype=np.int32)
+    remap[order] = np.arange(k, dtype=np.int32)
+    centers = centers[order]
+    labels = remap[labels]
+
+    names = persona_names(centers, list(feature_cols))
+    centroids = pd.DataFrame(centers * scale + mean, columns=list(feature_cols))
+    centroids.index.name = "Cluster"
+    return ClusteringResult(labels, names, centroids, inertia, n_iter, method)
+
+
+def label_frame(df, result):
+    """Return ``df`` with its Cluster / Cluster Name columns taken from ``result``"""
+    out = df.copy(deep=False)
+    out["Cluster"] = pd.to_numeric(pd.Series(result.labels, index=df.index), downcast="integer")
+    names = pd.Categorical.from_codes(result.labels, categories=result.names)
+    out["Cluster Name"] = pd.Series(names, index=df.index).cat.reorder_categories(sorted(result.names))
+    if "Cluster Description" in out.columns:
+        out = out.drop(columns=["Cluster Description"])
+    return out
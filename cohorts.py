@@ -0,0 +1,137 @@
+# cohorts.py - Discovery of cohort files in a data directory
+# ------------------------------------------------------------
+# One deployment serves many modules and terms. Every CSV (or Parquet/Feather
+# snapshot) under the data directory is a cohort; a CSV and its snapshot count
+# as one, since load_dataset() already prefers a fresh snapshot. Discovery only
+# lists file names, and CohortInfo reads just the header or footer metadata of
+# a file, once per file version, so the picker never parses a whole cohort.
+# Frames are loaded when a cohort is selected (see data_loader.load_dataset).
+import os
+import threading
+import time
+
+import pandas as pd
+
+from data_loader import DEFAULT_DATA_PATH, EXPECTED_FEATURES, file_key, resolve_source
+from snapshot import FEATHER_EXTENSIONS, HAVE_PYARROW, SNAPSHOT_EXTENSIONS, is_snapshot
+
+# Directory scanned for cohort files (subdirectories included)
+DATA_DIR = os.environ.get("DASHBOARD_DATA_DIR", "data")
+COHORT_EXTENSIONS = (".csv",) + SNAPSHOT_EXTENSIONS
+
+# Directory listings are reused for this many seconds
+SCAN_TTL = 10.0
+
+_scan_cache = {}
+_info_cache = {}
+_lock = threading.Lock()
+
+
+def _cohort_name(path, data_dir):
+    rel = os.path.relpath(path, data_dir)
+    if rel.startswith(os.pardir):
+        rel = os.path.basename(path)
+    return os.path.splitext(rel)[0].replace(os.sep, " / ")
+
+
+def _scan(data_dir, default):
+    found = {}
+    if os.path.isdir(data_dir):
+        for root, dirs, files in os.walk(data_dir):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for fname in files:
+                if os.path.splitext(fname)[1].lower() in COHORT_EXTENSIONS and not fname.startswith("."):
+                    path = os.path.abspath(os.path.join(root, fname))
+                    stem = os.path.splitext(path)[0]
+                    # A snapshot next to its CSV is the same cohort: keep the CSV
+                    if not is_snapshot(path) or stem not in found:
+                        found[stem] = path
+    if default and os.path.exists(default):
+        path = os.path.abspath(default)
+        found.setdefault(os.path.splitext(path)[0], path)
+
+    cohorts = {_cohort_name(path, data_dir): path for path in found.values()}
+    return dict(sorted(cohorts.items()))
+
+
+def discover_cohorts(data_dir=DATA_DIR, default=DEFAULT_DATA_PATH):
+    """Return {cohort name: path} for every cohort file, sorted by name.
+
+    ``default`` (the single file the app used to read) is included when it
+    exists, so a deployment without a data directory keeps working.
+    """
+    key = (os.path.abspath(data_dir), default)
+    now = time.monotonic()
+    with _lock:
+        cached = _scan_cache.get(key)
+        if cached is not None and now - cached[0] < SCAN_TTL:
+            return cached[1]
+    cohorts = _scan(data_dir, default)
+    with _lock:
+        _scan_cache[key] = (now, cohorts)
+    return cohorts
+
+
+def default_cohort(cohorts, default=DEFAULT_DATA_PATH):
+    """Name of the cohort to select first: ``default`` if discovered"""
+    target = os.path.abspath(default)
+    for name, path in cohorts.items():
+        if path == target:
+            return name
+    return next(iter(cohorts), None)
+
+
+class CohortInfo:
+    """Columns, row count (if known without parsing) and size of one file version"""
+
+    def __init__(self, key, columns, rows=None):
+        self.key = key
+        self.path = key[0]
+        self.bytes = key[1]
+        self.columns = list(columns)
+        self.rows = rows
+        self.cluster_col = "Cluster Name" if "Cluster Name" in self.columns else ("Cluster" if "Cluster" in self.columns else None)
+        self.feature_cols = [c for c in EXPECTED_FEATURES if c in self.columns]
+
+    @property
+    def format(self):
+        if not is_snapshot(self.path):
+            return "CSV"
+        return "Feather" if os.path.splitext(self.path)[1].lower() in FEATHER_EXTENSIONS else "Parquet"
+
+    def describe(self):
+        parts = []
+        if self.rows is not None:
+            parts.append(f"{self.rows:,} students")
+        size = f"{self.bytes / 1e6:,.1f} MB" if self.bytes >= 1e6 else f"{self.bytes / 1e3:,.0f} KB"
+        parts.append(f"{size} {self.format}")
+        if self.cluster_col is None:
+            parts.append("clustered on load")
+        return " · ".join(parts)
+
+
+def _read_info(key):
+    path = key[0]
+    if is_snapshot(path) and HAVE_PYARROW:
+        if os.path.splitext(path)[1].lower() in FEATHER_EXTENSIONS:
+            import pyarrow.ipc as ipc
+            with ipc.open_file(path) as reader:
+                return CohortInfo(key, reader.schema.names)
+        import pyarrow.parquet as pq
+        meta = pq.read_metadata(path)
+        return CohortInfo(key, meta.schema.to_arrow_schema().names, meta.num_rows)
+    return CohortInfo(key, pd.read_csv(path, nrows=0).columns)
+
+
+def cohort_info(path):
+    """Return the CohortInfo of the file ``load_dataset(path)`` would read"""
+    key = file_key(resolve_source(os.path.abspath(path)))
+    with _lock:
+        info = _info_cache.get(key[0])
+        if info is not None and info.key == key:
+            return info
+    info = _read_info(key)
+    with _lock:
+        # Replacing the entry drops the previous version of the file
+        _info_cache[key[0]] = info
+    return info
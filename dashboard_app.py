@@ -1,12 +1,46 @@
 # dashboard_app.py - Mobile-Responsive with Welcome Interface
 # ------------------------------------------------------------
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
-import plotly.express as px
 import numpy as np
+import functools
 import json
 import os
 import re
+import time
+
+from aggregates import OVERALL, get_cluster_cube
+from api import start_in_background as start_api
+from assets import (
+    DASHBOARD_HERO_HTML, REC_GRID_HTML, WELCOME_ABOUT_HTML, WELCOME_COLUMNS, WELCOME_HERO_HTML,
+    rec_grid_html, stat_card_html, theme_html
+)
+from auth import ConfigError, get_authenticator
+from cluster_quality import get_cluster_quality
+from cohorts import DATA_DIR, cohort_info, default_cohort, discover_cohorts
+from data_loader import DEFAULT_DATA_PATH, DataError, Dataset, cache_info, load_dataset, recluster_dataset
+from export import EXPORT_FORMATS, export_bytes, export_filename, export_mime
+from figures import (
+    comparison_figure, distribution_figure, embedding_figure, grade_distribution_figure, migration_sankey_figure,
+    outcome_correlation_figure, pass_rate_figure, risk_heatmap_figure, trend_figure
+)
+from interpretation import get_interpretations
+from migration import get_migration
+from neighbors import DEFAULT_K as DEFAULT_NEIGHBORS, MAX_K as MAX_NEIGHBORS, get_neighbor_index
+from outcomes import get_outcome_analytics
+from profiling import profiler
+from projection import GRADE_FEATURES, get_embedding_sample
+from recommendations import map_cluster_label
+from risk_crosstab import get_risk_cube
+from search_index import get_search_index
+import session_cookie
+from streaming import get_stream
+from table_view import PAGE_SIZES, cluster_positions, page_count, page_frame, sorted_positions
+from trends import TREND_METRICS, get_trends, series_snapshots, trend_table
+
+# --- Rerun profiling: section timings and payload sizes (see profiling.py) ---
+perf = profiler.start()
 
 # --- Page config ---
 st.set_page_config(
@@ -16,343 +50,58 @@ st.set_page_config(
 )
 
 # --- Mobile-Responsive CSS theme ---
-st.markdown("""
-<style>
-:root{
-  --brand-primary:#1e88e5;
-  --brand-primary-strong:#1565c0;
-  --brand-soft:#eaf2ff;
-  --text-dark:#1f2a44;
-  --text-on-primary:#ffffff;
-  --surface:#ffffff;
-  --muted:#6b7a90;
-}
-
-/* Mobile-first responsive design */
-* {
-  box-sizing: border-box;
-}
-
-/* App background */
-.stApp {
-  background: linear-gradient(135deg, #f7fbff, #eef4fb 45%, #f7fbff);
-}
-
-/* Mobile responsive adjustments */
-@media (max-width: 768px) {
-  .main .block-container {
-    padding: 1rem;
-    max-width: 100%;
-  }
-  
-  /* Make columns stack on mobile */
-  div[data-testid="column"] {
-    width: 100% !important;
-    flex: 1 1 100% !important;
-    min-width: 100% !important;
-  }
-  
-  /* Adjust font sizes for mobile */
-  h1 { font-size: 1.5rem !important; }
-  h2 { font-size: 1.3rem !important; }
-  h3 { font-size: 1.1rem !important; }
-  
-  /* Mobile-friendly buttons */
-  .stButton > button {
-    width: 100%;
-    padding: 0.75rem 1rem;
-    font-size: 1rem;
-  }
-  
-  /* Mobile input fields */
-  .stTextInput > div > div > input {
-    font-size: 16px;
-  }
-}
-
-/* Welcome Section Styles */
-.welcome-container {
-  background: linear-gradient(135deg, #1e88e5 0%, #1565c0 50%, #0d47a1 100%);
-  color: white;
-  border-radius: 20px;
-  padding: 2.5rem 2.5rem 0.5rem 2.5rem;
-  margin-bottom: 1rem;
-  box-shadow: 0 20px 60px rgba(21,101,192,0.25);
-  text-align: center;
-  position: relative;
-}
-
-.welcome-title {
-  font-size: 3rem;
-  font-weight: 800;
-  margin: 0 0 1rem 0;
-  text-shadow: 0 2px 4px rgba(0,0,0,0.1);
-}
-
-.welcome-subtitle {
-  font-size: 1.4rem;
-  margin: 0 0 0.75rem 0;
-  opacity: 0.95;
-  line-height: 1.4;
-}
-
-/* Enhanced Discover Button Container */
-.discover-button-container {
-  display: flex;
-  justify-content: center;
-  align-items: center;
-  margin: 0.25rem 0 1.5rem 0;
-  padding: 0.25rem;
-}
-
-/* Custom styling for the discover button with floating animation */
-.stButton > button[data-testid="baseButton-primary"] {
-  background: linear-gradient(135deg, #ff6b35, #f7931e) !important;
-  border: none !important;
-  color: white !important;
-  font-size: 1.4rem !important;
-  font-weight: 700 !important;
-  padding: 1.2rem 3rem !important;
-  border-radius: 50px !important;
-  box-shadow: 0 8px 25px rgba(255,107,53,0.4) !important;
-  transition: all 0.3s ease !important;
-  text-transform: uppercase !important;
-  letter-spacing: 0.5px !important;
-  min-height: 65px !important;
-  position: relative !important;
-  overflow: hidden !important;
-}
-
-.stButton > button[data-testid="baseButton-primary"]:hover {
-  transform: translateY(-3px) !important;
-  box-shadow: 0 12px 35px rgba(255,107,53,0.5) !important;
-  background: linear-gradient(135deg, #ff8a65, #ffb74d) !important;
-}
-
-.stButton > button[data-testid="baseButton-primary"]:active {
-  transform: translateY(-1px) !important;
-  box-shadow: 0 6px 20px rgba(255,107,53,0.4) !important;
-}
+perf.mark("css")
+# Minified once per process (assets/theme.css); browsers that have it only get its hash
+st.markdown(theme_html(), unsafe_allow_html=True)
 
-/* Enhanced floating animation - combination of pulse and gentle float */
-@keyframes float {
-  0%, 100% {
-    transform: translateY(0px);
-    box-shadow: 0 8px 25px rgba(255,107,53,0.4);
-  }
-  25% {
-    transform: translateY(-5px);
-    box-shadow: 0 12px 30px rgba(255,107,53,0.5);
-  }
-  50% {
-    transform: translateY(-8px);
-    box-shadow: 0 15px 35px rgba(255,107,53,0.6), 0 0 0 10px rgba(255,107,53,0.1);
-  }
-  75% {
-    transform: translateY(-3px);
-    box-shadow: 0 10px 28px rgba(255,107,53,0.5);
-  }
-}
-
-@keyframes glow {
-  0%, 100% {
-    box-shadow: 0 8px 25px rgba(255,107,53,0.4);
-  }
-  50% {
-    box-shadow: 0 8px 25px rgba(255,107,53,0.6), 0 0 0 15px rgba(255,107,53,0.1);
-  }
-}
-
-.stButton > button[data-testid="baseButton-primary"] {
-  animation: float 3s ease-in-out infinite, glow 2s ease-in-out infinite;
-}
-
-/* Mobile responsive button */
-@media (max-width: 768px) {
-  .welcome-container {
-    padding: 1.5rem 1.5rem 0.5rem 1.5rem;
-  }
-  
-  .welcome-title {
-    font-size: 2.2rem;
-  }
-  
-  .welcome-subtitle {
-    font-size: 1.1rem;
-  }
-  
-  .stButton > button[data-testid="baseButton-primary"] {
-    font-size: 1.2rem !important;
-    padding: 1rem 2.5rem !important;
-    min-height: 60px !important;
-  }
-  
-  .discover-button-container {
-    margin: 0.25rem 0 1rem 0;
-    padding: 0.25rem;
-  }
-}
-
-/* Cards */
-.blue-card {
-  background: var(--brand-soft);
-  border: 1px solid #c7ddff;
-  border-radius: 18px;
-  padding: 1.5rem;
-  box-shadow: 0 8px 24px rgba(17,69,158,0.08);
-  margin-bottom: 1.5rem;
-}
-
-.chart-card {
-  background: var(--surface);
-  border: 2px solid var(--brand-primary-strong);
-  border-radius: 18px;
-  padding: 1rem;
-  box-shadow: 0 8px 24px rgba(17,69,158,0.10);
-  margin-bottom: 1.5rem;
-}
-
-/* Stat cards */
-.stat-card {
-  background: linear-gradient(180deg,#eaf2ff,#dfeaff);
-  border: 1px solid #c7ddff;
-  border-radius: 14px;
-  padding: 1rem;
-  text-align: center;
-  box-shadow: 0 6px 16px rgba(17,69,158,0.08);
-  margin-bottom: 1rem;
-}
-
-.stat-title { 
-  font-weight:700; 
-  font-size:0.95rem; 
-  color:var(--text-dark); 
-  margin-bottom:6px; 
-}
-
-.stat-number { 
-  font-weight:800; 
-  font-size:1.4rem; 
-  color:var(--brand-primary-strong); 
-  margin:0; 
-}
-
-.stat-pct { 
-  font-weight:700; 
-  color:#365a9c; 
-}
-
-/* Hero */
-.hero {
-  background: linear-gradient(120deg,var(--brand-primary),var(--brand-primary-strong));
-  color: var(--text-on-primary);
-  border-radius: 22px;
-  padding: 1.5rem;
-  box-shadow: 0 14px 36px rgba(21,101,192,0.20);
-  margin-bottom: 1.5rem;
-}
-
-.hero h1 { 
-  margin:0; 
-  font-size:1.7rem; 
-  font-weight:700; 
-}
-
-/* Section chip */
-.section-chip {
-  display:inline-flex; 
-  align-items:center; 
-  gap:8px; 
-  background:var(--brand-soft);
-  border:1px solid #c7ddff; 
-  border-radius:999px; 
-  padding:6px 12px; 
-  font-weight:600; 
-  color:var(--text-dark);
-  margin-bottom:10px;
-}
-
-.section-chip .icon { 
-  background: var(--brand-primary); 
-  color:var(--text-on-primary); 
-  border-radius:999px; 
-  width:22px; 
-  height:22px; 
-  display:inline-flex; 
-  align-items:center; 
-  justify-content:center; 
-  font-size:12px;
-}
-
-/* Callout */
-.callout {
-  background: linear-gradient(180deg,#f3f9ff,#edf6ff);
-  border:1px solid #cfe2ff;
-  border-left:6px solid var(--brand-primary-strong);
-  border-radius:14px; 
-  padding:14px;
-  box-shadow: 0 8px 20px rgba(17,69,158,0.08);
-  color:var(--text-dark);
-  margin: 1rem 0;
-}
+# ------------------------------------------------------------
+# Data source
+# ------------------------------------------------------------
+DATA_PATH = DEFAULT_DATA_PATH
 
-/* Recommendation cards */
-.rec-grid { 
-  display: grid;
-  grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-  gap: 1rem;
-  margin-top: 1rem;
-}
+# Explorer table: "sort" option that keeps the file's row order
+FILE_ORDER = "(file order)"
 
-@media (max-width: 768px) {
-  .rec-grid {
-    grid-template-columns: 1fr;
-  }
-}
+# Student attributes offered as filters in the explorer
+SEARCH_FILTER_COLUMNS = ["Probation", "RemoteStudent", "HighRisk", "AtRisk", "TermExceeded", "Result", "CGPA", "ESE", "AttemptCount"]
 
-.rec-card {
-  background:var(--surface);
-  border:1px solid #d9e5ff;
-  border-radius:14px;
-  padding:1rem;
-  box-shadow:0 8px 22px rgba(17,69,158,0.06);
-}
+# Append-only CSV log of live engagement events (ApplicantName,Feature,Delta)
+EVENTS_PATH = "engagement_events.csv"
 
-/* Login card */
-.login-wrapper { 
-  display:flex; 
-  justify-content:center; 
-  margin: 1.5rem 0; 
+# Where cluster labels come from -> clustering method (None = the file's labels)
+CLUSTER_SOURCES = {
+    "From file": None,
+    "Recomputed (k-means)": "kmeans",
+    "Recomputed (mini-batch)": "minibatch",
 }
 
-.login-card {
-  background: linear-gradient(180deg,#eaf2ff,#dfeaff);
-  border:1px solid #c7ddff;
-  border-radius:18px;
-  padding:1.5rem;
-  width: 100%;
-  max-width: 420px;
-  box-shadow:0 12px 36px rgba(17,69,158,0.12);
-}
-
-.login-card h3 { 
-  margin-top:0; 
-  color:var(--text-dark); 
-}
-
-/* Utility classes */
-.m-0 { margin:0; }
-.mb-8 { margin-bottom:8px; }
-.text-center { text-align: center; }
-
-</style>
-""", unsafe_allow_html=True)
-
 # ------------------------------------------------------------
-# Hardcoded credentials
+# Authentication (see auth.py)
 # ------------------------------------------------------------
-HARDCODED_USERNAME = "educator"
-HARDCODED_PASSWORD = "1234"
+# The secret and the shared user/session stores are required: without them
+# the app shows the configuration error instead of running with local state
+try:
+    authenticator = get_authenticator()
+except ConfigError as e:
+    st.error(f"🔒 {e}")
+    perf.finish()
+    st.stop()
+
+# The signed session token is kept in session_state and in an HttpOnly cookie
+# (see session_cookie.py), never in the URL, so it cannot leak through browser
+# history, logs, Referer headers or shared links.
+session_cookie.install(authenticator)
+# Seconds a validated token is trusted before it is checked again (expiry, logout elsewhere)
+SESSION_RECHECK_SECONDS = 60
+
+# Users who can see the rerun performance panel (comma-separated), besides
+# users with the "admin" role; nobody is an admin unless listed
+ADMIN_USERS = {u.strip() for u in os.environ.get("DASHBOARD_ADMINS", "").split(",") if u.strip()}
+
+# Read-only JSON API served from this process, sharing its data caches (see api.py)
+API_PORT = os.environ.get("DASHBOARD_API_PORT")
+if API_PORT:
+    start_api(os.environ.get("DASHBOARD_API_HOST", "127.0.0.1"), int(API_PORT))
 
 # ------------------------------------------------------------
 # Session state initialization
@@ -363,18 +112,76 @@ if "selected_cluster" not in st.session_state:
     st.session_state.selected_cluster = "All"
 if "show_dashboard" not in st.session_state:
     st.session_state.show_dashboard = False
+if "table_sort_col" not in st.session_state:
+    st.session_state.table_sort_col = FILE_ORDER
+if "table_page_size" not in st.session_state:
+    st.session_state.table_page_size = PAGE_SIZES[0]
+if "table_page" not in st.session_state:
+    st.session_state.table_page = 1
+
+# ------------------------------------------------------------
+# Login sessions
+# ------------------------------------------------------------
+def start_session(session, new_login=False):
+    if new_login:
+        # The browser trades this one-time code for the session cookie (see sync_cookie)
+        st.session_state.cookie_script = session_cookie.login_script(authenticator.issue_code(session.token))
+    st.session_state.auth_token = session.token
+    st.session_state.auth_checked = time.time()
+    st.session_state.logged_in = True
+    st.session_state.username = session.username
+    st.session_state.roles = session.roles
+
+
+def end_session():
+    for k in ["auth_token", "auth_checked", "username", "roles", "login_username", "login_password"]:
+        st.session_state.pop(k, None)
+    st.session_state.logged_in = False
+
+
+def restore_session():
+    """Re-validate this browser's session token; cheap HMAC check, at most once per SESSION_RECHECK_SECONDS.
+
+    A new browser session (reload, new tab, another replica) starts from the
+    session cookie sent with the page request.
+    """
+    token = st.session_state.get("auth_token")
+    if token is None:
+        token = st.context.cookies.get(session_cookie.COOKIE_NAME)
+        # A cookie that failed once (expired, logged out) stays in this page's request
+        if token is None or token == st.session_state.get("rejected_cookie"):
+            return
+    elif time.time() - st.session_state.get("auth_checked", 0) < SESSION_RECHECK_SECONDS:
+        return
+    session = authenticator.validate(token)
+    if session is None:
+        end_session()
+        st.session_state.rejected_cookie = st.context.cookies.get(session_cookie.COOKIE_NAME)
+        return
+    start_session(session)
+
+
+def sync_cookie():
+    """Run a pending login/logout cookie request from the browser (zero-height component)"""
+    script = st.session_state.pop("cookie_script", None)
+    if script is not None:
+        components.html(script, height=0)
+
+
+def is_admin():
+    return st.session_state.get("username") in ADMIN_USERS or "admin" in st.session_state.get("roles", ())
+
+
+restore_session()
+sync_cookie()
 
 # ------------------------------------------------------------
 # Welcome Page Function
 # ------------------------------------------------------------
 def show_welcome_page():
+    perf.mark("welcome_hero")
     # Hero section with enhanced styling
-    st.markdown("""
-    <div class="welcome-container">
-        <h1 class="welcome-title">🎓 Student Engagement Clustering Dashboard</h1>
-        <p class="welcome-subtitle">Unlock insights into student learning patterns with advanced clustering analytics</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(WELCOME_HERO_HTML, unsafe_allow_html=True)
     
     # Enhanced centered discover button with better visibility
     st.markdown('<div class="discover-button-container">', unsafe_allow_html=True)
@@ -394,64 +201,27 @@ def show_welcome_page():
     
     st.markdown("---")
     
+    perf.mark("welcome_content")
     # Use streamlit components instead of pure HTML
     st.markdown("## What is Student Engagement Clustering?")
     
-    # Create cards using streamlit columns
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown("""
-        ### 🔍 Pattern Recognition
-        Our advanced clustering algorithm analyzes student behavior patterns including video engagement, pause frequency, likes, and forum participation to identify distinct learning groups.
-        """)
-        
-        st.markdown("""
-        ### 📈 Engagement Metrics
-        **Analysis based on:**
-        - Video play frequency
-        - Pause patterns  
-        - Like interactions
-        - Forum participation
-        """)
-    
-    with col2:
-        st.markdown("""
-        ### 📊 Data-Driven Insights
-        Transform raw engagement metrics into actionable insights. Understand how different student groups interact with course materials and identify areas for improvement.
-        """)
-        
-        st.markdown("""
-        ### 💡 Educator Benefits
-        - Identify at-risk students early
-        - Customize intervention strategies
-        - Improve course effectiveness
-        - Enhance student outcomes
-        """)
-    
-    with col3:
-        st.markdown("""
-        ### 🎯 Personalized Learning
-        Enable targeted interventions by understanding the unique characteristics of each student cluster. Tailor your teaching approach to meet diverse learning needs.
-        """)
-        
-        st.markdown("""
-        ### 👥 Student Groups Identified
-        **The Enthusiasts:** Highly engaged students  
-        **Steady Learners:** Consistent participants  
-        **Silent Observers:** Passive but present  
-        **Disengaged:** Need extra support
-        """)
+    # Create cards using streamlit columns (text pre-rendered in assets.py)
+    for col, text in zip(st.columns(3), WELCOME_COLUMNS):
+        with col:
+            st.markdown(text)
     
     st.markdown("---")
     
     # About section
-    st.markdown("""
-    <div style="text-align: center; color: #6b7a90; padding: 1rem; background: #f8f9fa; border-radius: 10px; margin: 1rem 0;">
-        <p><strong>About This Tool:</strong> This dashboard uses machine learning clustering techniques to group students based on their engagement patterns. The insights help educators understand diverse learning behaviors and implement targeted teaching strategies.</p>
-        <p style="margin-top: 1rem;"><em>Developed by Oluwatudimu Emmanuel Tobi - IFS/19/0622</em></p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(WELCOME_ABOUT_HTML, unsafe_allow_html=True)
+
+def reset_cohort_state():
+    """Forget selections that refer to the previous cohort's values"""
+    for k in list(st.session_state.keys()):
+        if k.startswith(("filter_", "migration_", "movers_", "similar_", "outcome_")) or k in ("search_name", "export_request", "risk_breakdown"):
+            del st.session_state[k]
+    st.session_state.table_sort_col = FILE_ORDER
+    st.session_state.table_page = 1
 
 # ------------------------------------------------------------
 # Main Dashboard Function
@@ -463,39 +233,76 @@ def show_dashboard():
         if st.button("← Welcome", key="back_welcome", help="Back to welcome page"):
             st.session_state.show_dashboard = False
             st.rerun()
-    
-    # Load data
+
+    perf.mark("load")
+    # Cohort files in the data directory; only the selected one is loaded
+    cohorts = discover_cohorts()
+    data_path = DATA_PATH
+    if len(cohorts) > 1:
+        if st.session_state.get("cohort") not in cohorts:
+            st.session_state.cohort = default_cohort(cohorts)
+        with col2:
+            cohort = st.selectbox("📂 Cohort", list(cohorts), key="cohort", on_change=reset_cohort_state)
+        data_path = cohorts[cohort]
+
+    # Load data (parsed once per file version and shared by all sessions)
     try:
-        df = pd.read_csv("clustered_students.csv")
+        data = load_dataset(data_path)
+        if len(cohorts) > 1:
+            # Read the file's header too, so a missing file gets the message below
+            with col2:
+                st.caption(cohort_info(data_path).describe())
     except FileNotFoundError:
-        st.error("clustered_students.csv not found in the app folder. Put it next to this file and rerun.")
+        st.error(f"{os.path.basename(data_path)} not found. Put it next to this file (or in the {DATA_DIR}/ folder) and rerun.")
         st.stop()
-
-    # Normalize cluster column name
-    cluster_col = "Cluster Name" if "Cluster Name" in df.columns else ("Cluster" if "Cluster" in df.columns else None)
-    if cluster_col is None:
-        st.error("No 'Cluster' or 'Cluster Name' column found in the CSV.")
+    except DataError as e:
+        st.error(str(e))
         st.stop()
+    # Fragment reruns check these to tell whether their data is still current
+    st.session_state.loaded_file = (data_path, data.version)
 
-    # Ensure friendly applicant column
-    applicant_col = "ApplicantName" if "ApplicantName" in df.columns else ("Applicant Name" if "Applicant Name" in df.columns else None)
-
-    # Determine which numeric features are available
-    expected_features = ['Played', 'Paused', 'Likes', 'Segment']
-    feature_cols = [c for c in expected_features if c in df.columns]
-
-    # Helpful derived values
-    total_students = len(df)
-    cluster_counts = df[cluster_col].value_counts().sort_index()
-    cluster_pct = (cluster_counts / total_students * 100).round(1)
-
+    perf.mark("overview")
     # HERO + OVERVIEW + CLUSTER CHART
-    st.markdown(f"""
-    <div class="hero">
-      <h1>🎓 Student Engagement Clustering Dashboard</h1>
-      <p class="m-0">Group students by engagement and get educator-ready recommendations. (Login required to view personal details)</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(DASHBOARD_HERO_HTML, unsafe_allow_html=True)
+
+    # Cluster labels: as shipped in the file, or recomputed by the in-app engine
+    with st.expander("⚙️ Clustering engine"):
+        cluster_source = st.radio(
+            "Cluster labels",
+            list(CLUSTER_SOURCES),
+            key="cluster_source",
+            horizontal=True,
+            disabled=not data.feature_cols,
+            help="Recompute clusters on Played/Paused/Likes/Segment instead of using the labels in the file"
+        )
+        method = CLUSTER_SOURCES[cluster_source]
+        if method is not None and data.feature_cols:
+            data = recluster_dataset(data, method=method)
+            st.caption(f"{data.clustering.k} clusters, {data.clustering.n_iter} iterations, inertia {data.clustering.inertia:,.1f}")
+            st.dataframe(data.clustering.centroids.round(2).set_axis(data.clustering.names), use_container_width=True)
+
+    feature_cols = data.feature_cols
+    st.session_state.data_version = data.version
+
+    # Helpful derived values (precomputed once per data version)
+    cube = get_cluster_cube(data)
+    total_students = data.total_students
+    cluster_counts = cube.counts
+    cluster_pct = cube.pct
+
+    # Live engagement events, if an event log is present, update the aggregates
+    # incrementally instead of re-reading or re-clustering the cohort
+    stream = None
+    if feature_cols and os.path.exists(EVENTS_PATH):
+        stream = get_stream(data)
+        stream.poll(EVENTS_PATH)
+        if stream.n_events:
+            cube = stream.to_cube()
+            total_students = int(cube.table.loc[OVERALL, ("count", "")])
+            cluster_counts = cube.counts
+            cluster_pct = cube.pct
+    # Interpretation sentences for every cluster, rendered once per cube version
+    interpretations = get_interpretations(cube) if feature_cols else None
 
     # Overview cards
     with st.container():
@@ -513,41 +320,22 @@ def show_dashboard():
         for i, (name, cnt) in enumerate(list(cluster_counts.items())[:min(4, len(cols)-1)]):
             with cols[i+1]:
                 pct = cluster_pct[name]
-                st.markdown(
-                    f"""
-                    <div class="stat-card">
-                      <div class="stat-title">{name}</div>
-                      <div class="stat-number">{int(cnt)}</div>
-                      <div class="stat-pct">{pct}%</div>
-                    </div>
-                    """, unsafe_allow_html=True
-                )
+                st.markdown(stat_card_html(name, int(cnt), pct), unsafe_allow_html=True)
+
+        if stream is not None and stream.n_events:
+            st.caption(f"Live: {stream.n_events:,} engagement events applied, {stream.n_refits} centroid refits.")
 
         st.markdown('</div>', unsafe_allow_html=True)
 
-    # Cluster distribution chart
-    cluster_counts_df = cluster_counts.reset_index()
-    cluster_counts_df.columns = [cluster_col, 'Number of Students']
-    fig = px.bar(
-        cluster_counts_df,
-        x=cluster_col,
-        y='Number of Students',
-        color=cluster_col,
-        text='Number of Students',
-        color_discrete_sequence=px.colors.qualitative.Set2
-    )
-    fig.update_layout(
-        height=360, 
-        margin=dict(l=10, r=10, t=40, b=20), 
-        showlegend=False,
-        font=dict(size=10)  # Smaller font for mobile
-    )
-    fig.update_traces(textposition='outside')
+    perf.mark("distribution_chart")
+    # Cluster distribution chart (built once per aggregate version, shared by all sessions)
+    fig = distribution_figure(cube).figure
 
     st.markdown('<div class="chart-card">', unsafe_allow_html=True)
     st.plotly_chart(fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
+    perf.mark("login")
     # LOGIN BOX
     if not st.session_state.logged_in:
         st.markdown('<div class="login-wrapper">', unsafe_allow_html=True)
@@ -565,8 +353,10 @@ def show_dashboard():
             st.write("")
 
         if login_btn:
-            if uname == HARDCODED_USERNAME and pwd == HARDCODED_PASSWORD:
-                st.session_state.logged_in = True
+            # Slow hash: checked once per login, the token is trusted afterwards
+            token = authenticator.login(uname.strip(), pwd)
+            if token is not None:
+                start_session(authenticator.validate(token), new_login=True)
                 st.success("✅ Login successful — sensitive sections are now visible.")
                 st.rerun()
             else:
@@ -587,44 +377,154 @@ def show_dashboard():
     logout_col1, logout_col2 = st.columns([1, 5])
     with logout_col1:
         if st.button("Logout"):
-            for k in ["login_username", "login_password"]:
-                if k in st.session_state:
-                    del st.session_state[k]
-            st.session_state.logged_in = False
+            if "auth_token" in st.session_state:
+                authenticator.logout(st.session_state.auth_token)
+            end_session()
+            st.session_state.cookie_script = session_cookie.logout_script()
             st.success("Logged out. The sensitive sections are hidden again.")
             st.rerun()
 
+    # Sections below are fragments: a widget inside one reruns only that
+    # fragment, with the data passed in here as long as it is still current
+    # (see section_fragment)
+    cluster_sections(data, cube, interpretations)
+    if feature_cols:
+        cluster_map_section(data)
+        cluster_quality_section(data)
+        outcomes_section(data)
+    risk_section(data)
+
+    # Trends and migration across snapshots of this cohort (weekly exports in the same folder)
+    snapshots = series_snapshots(cohorts, data_path)
+    if len(snapshots) > 1:
+        trends_section(snapshots, feature_cols)
+        migration_section(snapshots, data_path)
+
+    # Footer caption
+    st.caption("Tip: Use the cluster explorer to select a group and download the list for targeted interventions and quick response from online educators. Developed by Oluwatudimu Emmanuel Tobi - IFS/19/0622")
+
+    # Admin-only rerun performance panel
+    if is_admin():
+        perf.mark("performance_panel")
+        show_performance_panel()
+
+# ------------------------------------------------------------
+# Dashboard sections (fragments)
+# ------------------------------------------------------------
+def fragment_is_stale(args):
+    """True if a fragment rerun would show data a full rerun no longer would.
+
+    Fragment reruns reuse the arguments of the last full rerun: the cohort
+    file may have been replaced since, or the session may have moved to
+    another dataset.
+    """
+    loaded = st.session_state.get("loaded_file")
+    if loaded is not None:
+        path, version = loaded
+        try:
+            if load_dataset(path).version != version:
+                return True
+        except (OSError, DataError):
+            return True
+    current = st.session_state.get("data_version")
+    return any(isinstance(a, Dataset) and a.version != current for a in args)
+
+
+def section_fragment(func):
+    """st.fragment that profiles its partial reruns as their own records.
+
+    A fragment rerun only runs the fragment, so it re-checks the login and
+    that its data is current first; otherwise the whole app reruns.
+    """
+    @st.fragment
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        global perf
+        if not perf.finished:
+            # Part of a full rerun: timed by the rerun's own trace
+            return func(*args, **kwargs)
+        restore_session()
+        if not st.session_state.logged_in or fragment_is_stale(args):
+            st.rerun(scope="app")
+        perf = profiler.start(f"fragment:{func.__name__}")
+        try:
+            return func(*args, **kwargs)
+        finally:
+            perf.finish()
+    return run
+
+
+@section_fragment
+def cluster_sections(data, cube, interpretations):
+    """Explorer, feature comparison and recommendations: everything that depends on the selected cluster"""
+    df = data.df
+    cluster_col = data.cluster_col
+    applicant_col = data.applicant_col
+    feature_cols = data.feature_cols
+
+    perf.mark("explorer")
     # SECTION 2: Explore students by cluster
     st.markdown('<div class="blue-card">', unsafe_allow_html=True)
     st.markdown('<div class="section-chip mb-8"><span class="icon">🔎</span>Explore students by cluster</div>', unsafe_allow_html=True)
 
-    cluster_options = ["All"] + list(cluster_counts.index)
+    cluster_options = ["All"] + list(cube.counts.index)
     selected_cluster = st.selectbox("Choose a cluster to explore:", cluster_options, index=0)
 
-    if selected_cluster == "All":
-        subset = df.copy()
+    # Search by name and filter on student attributes (bitmap index, built once per data version)
+    search_index = get_search_index(data)
+    filters = {}
+    with st.expander("🔍 Search and filter students"):
+        name_query = ""
+        match_anywhere = False
+        if applicant_col:
+            search_col1, search_col2 = st.columns([3, 1])
+            with search_col1:
+                name_query = st.text_input("Student name", key="search_name", placeholder="e.g. Student 12").strip()
+            with search_col2:
+                st.write("")
+                match_anywhere = st.checkbox("Match anywhere in name", key="search_contains")
+        filter_cols = [c for c in SEARCH_FILTER_COLUMNS if c in search_index.bitmaps]
+        filter_grid = st.columns(3)
+        for i, col in enumerate(filter_cols):
+            with filter_grid[i % 3]:
+                chosen = st.multiselect(col, search_index.values(col), key=f"filter_{col}")
+                if chosen:
+                    filters[col] = chosen
+
+    # Row positions into the cached frame (no copy); rows are only
+    # materialized for what is actually displayed
+    if name_query or filters:
+        if selected_cluster != "All":
+            filters[cluster_col] = selected_cluster
+        positions = search_index.query(filters, name_query, "contains" if match_anywhere else "prefix")
+        selection = (selected_cluster, name_query, match_anywhere, tuple((c, tuple(v) if isinstance(v, list) else v) for c, v in sorted(filters.items())))
     else:
-        subset = df[df[cluster_col] == selected_cluster].copy()
+        positions = cluster_positions(data, selected_cluster)
+        selection = selected_cluster
 
-    st.write(f"Showing **{len(subset)}** students ({(len(subset)/total_students*100):.1f}% of total)")
+    st.write(f"Showing **{len(positions)}** students ({(len(positions)/data.total_students*100):.1f}% of total)")
 
     # Columns to show
     cols_to_show = []
     if applicant_col:
         cols_to_show.append(applicant_col)
     cols_to_show += [cluster_col] + feature_cols
-    cols_to_show = [c for c in cols_to_show if c in subset.columns]
+    cols_to_show = [c for c in cols_to_show if c in df.columns]
 
     # Show sample
-    st.dataframe(subset[cols_to_show].head(6), height=260, use_container_width=True)
+    st.dataframe(page_frame(df, positions, 1, 6, cols_to_show), height=260, use_container_width=True)
+
+    # Sorting and paging rerun only the table, and nothing is computed while it is hidden
+    if st.toggle("Show full table and download", key="show_full_table"):
+        full_table_section(data, selected_cluster, selection, positions, cols_to_show)
 
-    with st.expander("Show full table and download"):
-        st.dataframe(subset[cols_to_show], height=380, use_container_width=True)
-        csv = subset.to_csv(index=False).encode('utf-8')
-        st.download_button("Download shown students (CSV)", csv, "students_subset.csv", "text/csv")
+    # Nearest neighbors on engagement and grades, across all clusters
+    if applicant_col and feature_cols and st.toggle("👥 Find similar students", key="show_similar"):
+        similar_students_section(data)
 
     st.markdown('</div>', unsafe_allow_html=True)
 
+    perf.mark("comparison")
     # SECTION 3: Feature comparison
     st.markdown('<div class="blue-card">', unsafe_allow_html=True)
     st.markdown('<div class="section-chip"><span class="icon">📈</span>Feature comparison: selected cluster vs overall</div>', unsafe_allow_html=True)
@@ -632,169 +532,359 @@ def show_dashboard():
     if len(feature_cols) == 0:
         st.info("No numeric engagement features (Played/Paused/Likes/Segment) were found in the CSV to compare.")
     else:
-        overall_mean = df[feature_cols].mean()
-
         if selected_cluster == "All":
-            cluster_means = df.groupby(cluster_col)[feature_cols].mean().round(2)
+            cluster_means = cube.cluster_means().round(2)
             st.dataframe(cluster_means, use_container_width=True)
+
+            st.markdown("**Interpretation by cluster**")
+            st.dataframe(interpretations.summary(), use_container_width=True)
         else:
-            cluster_mean = subset[feature_cols].mean()
-            compare_df = pd.DataFrame({
-                'Feature': feature_cols,
-                'Selected cluster mean': cluster_mean.values,
-                'Overall mean': overall_mean.values
-            })
-
-            fig2 = px.bar(
-                compare_df.melt(id_vars='Feature', var_name='Group', value_name='Value'),
-                x='Feature', y='Value', color='Group', barmode='group',
-                title=f"Selected cluster ({selected_cluster}) vs overall",
-                color_discrete_sequence=px.colors.qualitative.Set2
-            )
-            fig2.update_layout(
-                height=380, 
-                margin=dict(l=10, r=10, t=40, b=20), 
-                plot_bgcolor="white", 
-                paper_bgcolor="white",
-                font=dict(size=10)
-            )
-            
+            fig2 = comparison_figure(cube, selected_cluster).figure
+
             st.markdown('<div class="chart-card mb-12">', unsafe_allow_html=True)
             st.plotly_chart(fig2, use_container_width=True)
             st.markdown('</div>', unsafe_allow_html=True)
 
             # Interpretation
-            interpretation_parts = []
-            for feature in feature_cols:
-                cluster_val = cluster_mean[feature]
-                overall_val = overall_mean[feature]
-                if overall_val != 0:
-                    diff_pct = ((cluster_val - overall_val) / overall_val) * 100
-                    if abs(diff_pct) >= 5:
-                        direction = "more" if diff_pct > 0 else "fewer"
-                        if feature.lower() == "played":
-                            feature_name = "videos"
-                            action_word = "watch"
-                        elif feature.lower() == "paused":
-                            feature_name = "pauses"
-                            action_word = "have"
-                        elif feature.lower() == "likes":
-                            feature_name = "likes"
-                            action_word = "give"
-                        elif feature.lower() == "segment":
-                            feature_name = "forum messages"
-                            action_word = "post"
-                        else:
-                            feature_name = feature
-                            action_word = "have"
-
-                        interpretation_parts.append(
-                            f"{selected_cluster} {action_word} {abs(diff_pct):.0f}% {direction} {feature_name} than average"
-                        )
-
-            if interpretation_parts:
-                if len(interpretation_parts) > 1:
-                    last_part = interpretation_parts.pop()
-                    interpretation_text = ", ".join(interpretation_parts) + f", but {last_part}"
-                else:
-                    interpretation_text = interpretation_parts[0]
-            else:
-                interpretation_text = "This cluster's engagement is close to the overall average across the features."
+            interpretation_text = interpretations.text(selected_cluster)
 
             st.markdown(f'<div class="callout"><strong>Interpretation:</strong> {interpretation_text}.</div>', unsafe_allow_html=True)
 
     st.markdown('</div>', unsafe_allow_html=True)
 
+    perf.mark("recommendations")
     # SECTION 4: Educator insights & recommendations
     st.markdown('<div class="blue-card">', unsafe_allow_html=True)
     st.markdown('<div class="section-chip"><span class="icon">💡</span>Educator insights & recommended actions</div>', unsafe_allow_html=True)
 
-    # Recommendations
-    recommendations = {
-        "The Enthusiasts": [
-            "Offer advanced readings or enrichment activities.",
-            "Invite them as peer mentors or group leaders.",
-            "Give formative challenges to keep them engaged."
-        ],
-        "The Steady Learners": [
-            "Give regular reminders and short recaps.",
-            "Provide practice quizzes and worked examples.",
-            "Encourage participation with low-stakes interactions."
-        ],
-        "The Silent Observers": [
-            "Add interactive polls and tiny quizzes during videos.",
-            "Use prompts or reflective questions to elicit responses.",
-            "Reach out with personalized, friendly nudges."
-        ],
-        "The Disengaged": [
-            "Provide very short, simplified materials and quick wins.",
-            "Offer targeted outreach (office hours, mentorship).",
-            "Consider adaptive content paths and scaffolded tasks."
-        ]
-    }
-
-    def map_cluster_label(label):
-        """Map cluster labels to recommendation keys, handling emojis and variations"""
-        if not label or label == "All":
-            return None
-        
-        clean_label = re.sub(r'[^\w\s]', '', str(label)).strip().lower()
-        
-        if "enthusiast" in clean_label:
-            return "The Enthusiasts"
-        elif "steady" in clean_label or "learner" in clean_label:
-            return "The Steady Learners"
-        elif "silent" in clean_label or "observer" in clean_label:
-            return "The Silent Observers"
-        elif "disengaged" in clean_label:
-            return "The Disengaged"
-        
-        # Fallback: try partial matching with recommendation keys
-        for key in recommendations.keys():
-            key_clean = re.sub(r'[^\w\s]', '', key).strip().lower()
-            if key_clean in clean_label or clean_label in key_clean:
-                return key
-        
-        return None
-
-    # Render recommendations as responsive cards
-    st.markdown('<div class="rec-grid">', unsafe_allow_html=True)
-
+    # Recommendation cards are pre-rendered (assets.py); the grid wraps them in one element
     if selected_cluster == "All":
         # Show all recommendation cards
-        for key, recs in recommendations.items():
-            html = f'<div class="rec-card"><h4 class="m-0">{key}</h4><ul>'
-            for r in recs:
-                html += f"<li>{r}</li>"
-            html += "</ul></div>"
-            st.markdown(html, unsafe_allow_html=True)
+        st.markdown(REC_GRID_HTML, unsafe_allow_html=True)
     else:
         # Show only the selected cluster's recommendations
-        mapped_cluster = map_cluster_label(selected_cluster)
-        
-        if mapped_cluster and mapped_cluster in recommendations:
-            recs = recommendations[mapped_cluster]
-            html = f'<div class="rec-card"><h4 class="m-0">{mapped_cluster}</h4><ul>'
-            for r in recs:
-                html += f"<li>{r}</li>"
-            html += "</ul></div>"
-            st.markdown(html, unsafe_allow_html=True)
+        rec_html = rec_grid_html(map_cluster_label(selected_cluster))
+        if rec_html is not None:
+            st.markdown(rec_html, unsafe_allow_html=True)
         else:
             # Fallback message if no matching recommendations found
             st.info(f"No specific recommendations available for '{selected_cluster}'. Please check the cluster name mapping.")
 
     st.markdown('</div>', unsafe_allow_html=True)
+
+
+@section_fragment
+def full_table_section(data, selected_cluster, selection, positions, cols_to_show):
+    perf.mark("full_table")
+    df = data.df
+    # Sort order and page size live in session state; only the visible page is sent
+    sort_options = [FILE_ORDER] + cols_to_show
+    if st.session_state.table_sort_col not in sort_options:
+        st.session_state.table_sort_col = FILE_ORDER
+
+    table_col1, table_col2, table_col3 = st.columns([2, 2, 1])
+    with table_col1:
+        sort_col = st.selectbox("Sort by", sort_options, key="table_sort_col")
+    with table_col2:
+        sort_dir = st.radio("Order", ["Ascending", "Descending"], key="table_sort_dir", horizontal=True)
+    with table_col3:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, key="table_page_size")
+
+    ordered = sorted_positions(
+        data, selected_cluster, None if sort_col == FILE_ORDER else sort_col, sort_dir == "Ascending",
+        positions=None if selection == selected_cluster else positions
+    )
+    n_pages = page_count(len(ordered), page_size)
+
+    # Go back to the first page whenever the rows or their order change
+    view_key = (data.version, selection, sort_col, sort_dir, page_size)
+    if st.session_state.get("table_view_key") != view_key or st.session_state.table_page > n_pages:
+        st.session_state.table_view_key = view_key
+        st.session_state.table_page = 1
+
+    page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, step=1, key="table_page")
+    st.dataframe(page_frame(df, ordered, page, page_size, cols_to_show), height=380, use_container_width=True)
+    first_row = (page - 1) * page_size
+    st.caption(f"Rows {min(first_row + 1, len(ordered))}–{min(first_row + page_size, len(ordered))} of {len(ordered)}")
+
+    # The file is only generated on request, then cached for every session
+    export_col1, export_col2 = st.columns([2, 1])
+    with export_col1:
+        export_format = st.selectbox("Download format", list(EXPORT_FORMATS), key="export_format")
+    with export_col2:
+        st.write("")
+        if st.button("Prepare download", key="prepare_export"):
+            st.session_state.export_request = (data.version, selection, export_format)
+
+    if st.session_state.get("export_request") == (data.version, selection, export_format):
+        payload = export_bytes(data, positions, export_format, selection=selection)
+        st.download_button(
+            f"Download shown students ({export_format})",
+            payload,
+            export_filename("students_subset", export_format),
+            export_mime(export_format)
+        )
+
+
+@section_fragment
+def similar_students_section(data):
+    perf.mark("similar_students")
+    search_index = get_search_index(data)
+    sim_col1, sim_col2 = st.columns([3, 1])
+    with sim_col1:
+        name = st.text_input("Students similar to", key="similar_name", placeholder="e.g. Student 12").strip()
+    with sim_col2:
+        k = st.number_input("How many", min_value=1, max_value=MAX_NEIGHBORS, value=DEFAULT_NEIGHBORS, step=1, key="similar_k")
+    if not name:
+        st.caption("Type a student's name to list the students with the closest engagement and grades, from any cluster.")
+        return
+
+    matches = search_index.prefix(name)
+    exact = matches[data.df[data.applicant_col].to_numpy()[matches].astype(str) == name] if len(matches) else matches
+    if len(exact):
+        row = int(exact[0])
+    elif len(matches):
+        candidates = matches[:50]
+        names = data.df[data.applicant_col].iloc[candidates].astype(str).tolist()
+        picked = st.selectbox(f"{len(matches):,} students match; pick one:", names, key="similar_pick")
+        row = int(candidates[names.index(picked)])
+    else:
+        st.info(f"No student named '{name}'.")
+        return
+
+    student = data.df[data.applicant_col].iat[row]
+    similar = get_neighbor_index(data).similar(data, row, int(k))
+    st.write(f"**{len(similar)}** students most similar to **{student}** ({data.df[data.cluster_col].iat[row]})")
+    st.dataframe(similar, hide_index=True, use_container_width=True)
+    st.download_button(
+        "📥 Download this group (CSV)",
+        similar.to_csv(index=False).encode("utf-8"),
+        f"similar_to_{re.sub(r'[^A-Za-z0-9]+', '_', str(student))}.csv",
+        "text/csv",
+        key="similar_download"
+    )
+
+
+@section_fragment
+def cluster_map_section(data):
+    perf.mark("cluster_map")
+    # SECTION 5: 2-D map of the engagement feature space (PCA, computed once per data version)
+    st.markdown('<div class="blue-card">', unsafe_allow_html=True)
+    st.markdown('<div class="section-chip"><span class="icon">🗺️</span>Cluster map</div>', unsafe_allow_html=True)
+
+    grades = False
+    if any(c in data.df.columns for c in GRADE_FEATURES):
+        grades = st.checkbox("Include grades (CW1, CW2, ESE, CGPA)", key="embedding_grades")
+    embedding, positions = get_embedding_sample(data, grades)
+
+    st.markdown('<div class="chart-card mb-12">', unsafe_allow_html=True)
+    st.plotly_chart(embedding_figure(data, embedding, positions, grades).figure, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
-    # Footer caption
-    st.caption("Tip: Use the cluster explorer to select a group and download the list for targeted interventions and quick response from online educators. Developed by Oluwatudimu Emmanuel Tobi - IFS/19/0622")
+    shown = f"{len(positions):,} of {data.total_students:,} students shown (dense areas thinned)" if len(positions) < data.total_students else f"All {data.total_students:,} students shown"
+    st.caption(f"{shown}. Nearby points have similar engagement{' and grades' if grades else ''}; the axes are the two directions of largest variation.")
+    with st.expander("What the axes are made of"):
+        st.dataframe(embedding.loadings().round(2), use_container_width=True)
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@section_fragment
+def cluster_quality_section(data):
+    perf.mark("cluster_quality")
+    # SECTION 6: How well separated the clusters are (computed once per data version)
+    st.markdown('<div class="blue-card">', unsafe_allow_html=True)
+    st.markdown('<div class="section-chip"><span class="icon">🧪</span>Cluster quality</div>', unsafe_allow_html=True)
+
+    quality = get_cluster_quality(data)
+    q_col1, q_col2, q_col3 = st.columns(3)
+    q_col1.metric("Silhouette", f"{quality.silhouette:.2f}", help="From -1 to 1; higher means students sit closer to their own cluster than to the next one")
+    q_col2.metric("Davies–Bouldin", f"{quality.davies_bouldin:.2f}", help="Lower is better; cluster spread relative to the distance between clusters")
+    q_col3.metric("Closest clusters", f"{quality.table['Distance to nearest centroid'].min():.2f}", help="Smallest distance between two cluster centres, in standard deviations")
+
+    st.markdown(f'<div class="callout"><strong>Reading:</strong> {quality.reading}</div>', unsafe_allow_html=True)
+    st.dataframe(quality.table.round(2), use_container_width=True)
+    if quality.sample_size < quality.n_rows:
+        st.caption(f"Silhouette estimated on a stratified sample of {quality.sample_size:,} of {quality.n_rows:,} students; the other metrics use every student. Switch the clustering engine to compare recomputed labels.")
+    else:
+        st.caption("All metrics use every student. Switch the clustering engine to compare recomputed labels.")
+    with st.expander("Distance between cluster centres"):
+        st.dataframe(quality.separation.round(2), use_container_width=True)
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@section_fragment
+def outcomes_section(data):
+    perf.mark("outcomes")
+    # SECTION 7: Engagement vs outcomes drill-down (all tables precomputed once per data version)
+    analytics = get_outcome_analytics(data)
+    if not analytics.outcome_cols:
+        return
+    st.markdown('<div class="blue-card">', unsafe_allow_html=True)
+    st.markdown('<div class="section-chip"><span class="icon">🎯</span>Engagement and outcomes</div>', unsafe_allow_html=True)
+
+    out_col1, out_col2 = st.columns([1, 2])
+    with out_col1:
+        group = st.selectbox("Students:", list(analytics.groups[-1:]) + list(analytics.groups[:-1]), key="outcome_group")
+    with out_col2:
+        views = ["Correlations"] + (["Pass rate by engagement"] if analytics.pass_features else []) + ["Grade distribution"]
+        view = st.radio("Show", views, key="outcome_view", horizontal=True)
+
+    st.markdown('<div class="chart-card mb-12">', unsafe_allow_html=True)
+    if view == "Correlations":
+        st.plotly_chart(outcome_correlation_figure(data.version, analytics, group).figure, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+        st.caption(f"Pearson correlation on {analytics.n_complete[group]:,} students with every value present. Grades count by band (Fail = 0 … Excellent = 5), Result as Pass = 1.")
+    elif view == "Pass rate by engagement":
+        feature = st.selectbox("Engagement measure:", analytics.pass_features, key="outcome_feature")
+        st.plotly_chart(pass_rate_figure(data.version, analytics, feature, group).figure, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+        st.dataframe(analytics.pass_rate(feature, group), use_container_width=True)
+        st.caption("Students are split at the quintiles of the whole roster; students with equal values share a bin, so there can be fewer than five.")
+    else:
+        outcome = st.selectbox("Outcome:", analytics.outcome_cols, key="outcome_grade")
+        st.plotly_chart(grade_distribution_figure(data.version, analytics, outcome, group).figure, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+        st.dataframe(analytics.grade_distribution(outcome, percent=False), use_container_width=True)
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@section_fragment
+def risk_section(data):
+    perf.mark("risk_flags")
+    # SECTION 8: Risk flags and outcomes by cluster
+    st.markdown('<div class="blue-card">', unsafe_allow_html=True)
+    st.markdown('<div class="section-chip"><span class="icon">🚩</span>Risk flags & outcomes by cluster</div>', unsafe_allow_html=True)
+
+    risk_cube = get_risk_cube(data)
+    if not risk_cube.columns:
+        st.info("No risk flag or Result columns were found in the CSV.")
+    else:
+        fig3 = risk_heatmap_figure(data.version, risk_cube).figure
+
+        st.markdown('<div class="chart-card">', unsafe_allow_html=True)
+        st.plotly_chart(fig3, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+        risk_col = st.selectbox("Breakdown by value:", risk_cube.columns, key="risk_breakdown")
+        st.dataframe(risk_cube.table(risk_col), use_container_width=True)
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@section_fragment
+def trends_section(snapshots, feature_cols):
+    perf.mark("trends")
+    # SECTION 9: Trends across snapshots of this cohort
+    st.markdown('<div class="blue-card">', unsafe_allow_html=True)
+    st.markdown('<div class="section-chip"><span class="icon">📅</span>Trends across snapshots</div>', unsafe_allow_html=True)
+
+    trend_store, trend_history = get_trends(snapshots)
+    if trend_history.empty:
+        st.info("No snapshot rollups are available yet.")
+    else:
+        trend_metric = st.selectbox("Metric:", list(TREND_METRICS), key="trend_metric")
+        metric_col = TREND_METRICS[trend_metric]
+        table = trend_table(trend_history, metric_col, include_overall=metric_col in feature_cols)
+        st.markdown('<div class="chart-card mb-12">', unsafe_allow_html=True)
+        st.plotly_chart(trend_figure(trend_store.version, table, trend_metric).figure, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+        st.caption(f"{table.shape[0]} snapshots, ordered by file name. Each export is summarized once when it first appears.")
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@section_fragment
+def migration_section(snapshots, data_path):
+    perf.mark("migration")
+    # SECTION 10: Students who moved between clusters from one snapshot to another
+    st.markdown('<div class="blue-card">', unsafe_allow_html=True)
+    st.markdown('<div class="section-chip"><span class="icon">🔀</span>Cluster migration between snapshots</div>', unsafe_allow_html=True)
+
+    snapshot_names = [name for name, _ in snapshots]
+    snapshot_paths = dict(snapshots)
+    current = snapshot_names.index(os.path.splitext(os.path.basename(data_path))[0])
+    mig_col1, mig_col2 = st.columns(2)
+    with mig_col1:
+        from_snapshot = st.selectbox("From snapshot:", snapshot_names, index=max(current - 1, 0), key="migration_from")
+    with mig_col2:
+        to_snapshot = st.selectbox("To snapshot:", snapshot_names, index=current if current > 0 else 1, key="migration_to")
+
+    if from_snapshot == to_snapshot:
+        st.info("Pick two different snapshots to compare.")
+    else:
+        try:
+            diff = get_migration(load_dataset(snapshot_paths[from_snapshot]), load_dataset(snapshot_paths[to_snapshot]))
+        except (DataError, ValueError) as e:
+            diff = None
+            st.error(str(e))
+        if diff is not None:
+            mig_cols = st.columns(4)
+            mig_cols[0].metric("Matched students", f"{diff.n_matched:,}")
+            mig_cols[1].metric("Changed cluster", f"{diff.n_moved:,}")
+            mig_cols[2].metric("New students", f"{diff.n_joined:,}")
+            mig_cols[3].metric("No longer listed", f"{diff.n_left:,}")
+
+            st.markdown('<div class="chart-card mb-12">', unsafe_allow_html=True)
+            st.plotly_chart(migration_sankey_figure(diff, from_snapshot, to_snapshot).figure, use_container_width=True)
+            st.markdown('</div>', unsafe_allow_html=True)
+
+            # The matrix and mover list are only built and sent while shown
+            if st.toggle("Transition matrix and movers", key="show_movers"):
+                st.dataframe(diff.matrix, use_container_width=True)
+                move_options = ["Any"] + [c for c in diff.rows if c in diff.cols]
+                move_col1, move_col2 = st.columns(2)
+                with move_col1:
+                    move_from = st.selectbox("Moved from:", move_options, key="movers_from")
+                with move_col2:
+                    move_to = st.selectbox("Moved to:", move_options, key="movers_to")
+                movers = diff.movers(None if move_from == "Any" else move_from, None if move_to == "Any" else move_to)
+                st.write(f"**{len(movers):,}** students changed cluster (first {min(len(movers), PAGE_SIZES[-1])} shown)")
+                st.dataframe(movers.head(PAGE_SIZES[-1]), height=300, hide_index=True, use_container_width=True)
+                st.download_button(
+                    "📥 Download all movers (CSV)",
+                    diff.movers_csv(),
+                    f"cluster_movers_{from_snapshot}_to_{to_snapshot}.csv",
+                    "text/csv"
+                )
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# ------------------------------------------------------------
+# Performance panel (admins only)
+# ------------------------------------------------------------
+def show_performance_panel():
+    with st.expander("⏱️ Rerun performance (admin)"):
+        summary = profiler.summary()
+        if not summary:
+            st.info("No reruns have been recorded yet.")
+            return
+        st.caption(f"Last {len(profiler.records())} reruns of this process. Times in ms, payload in bytes sent to the browser.")
+        st.dataframe(pd.DataFrame(summary), hide_index=True, use_container_width=True)
+        perf_col1, perf_col2 = st.columns(2)
+        with perf_col1:
+            st.download_button("Download JSON", profiler.to_json(), "rerun_profile.json", "application/json")
+        with perf_col2:
+            st.download_button("Download Prometheus metrics", profiler.to_prometheus(), "rerun_profile.prom", "text/plain")
+
+        loaded = cache_info()
+        st.caption(f"{len(loaded)} cohort file(s) loaded in memory (least recently used first).")
+        st.dataframe(pd.DataFrame(loaded), hide_index=True, use_container_width=True)
 
 # ------------------------------------------------------------
 # MAIN APP LOGIC
 # ------------------------------------------------------------
 
 # Show appropriate page based on state
-if not st.session_state.show_dashboard:
-    show_welcome_page()
-else:
-    show_dashboard()
+try:
+    if not st.session_state.show_dashboard:
+        perf.set_page("welcome")
+        show_welcome_page()
+    else:
+        perf.set_page("dashboard")
+        show_dashboard()
+finally:
+    # Also records reruns cut short by st.stop() / st.rerun()
+    perf.finish()
@@ -0,0 +1,297 @@
+# data_loader.py - Cached, version-keyed data access layer
+# ------------------------------------------------------------
+# The dashboard reruns its whole script on every widget interaction, for every
+# session. Parsing the CSV each time is wasteful, so the parsed frame and the
+# values derived from it are kept once per process and shared by all sessions.
+# A file is identified by (path, size, mtime); when any of those change the old
+# version is dropped and the file is parsed again on the next request.
+#
+# With many cohorts in one process, loaded files are kept in an LRU bounded by
+# count and by memory: each dataset's frame plus everything memoized on it
+# (cubes, indexes, embeddings, reclustered copies). Memoized values are sized
+# when they are built, except those that keep growing (reclustered datasets,
+# the live engagement stream), which report their current size. The least
+# recently used cohort is evicted first and is parsed again when it is next
+# selected.
+import os
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from clustering import DEFAULT_K, fit_engagement_clusters, label_frame
+from schema import apply_schema, csv_dtypes, split_descriptions
+from snapshot import fresh_snapshot, is_snapshot, read_snapshot
+
+DEFAULT_DATA_PATH = "clustered_students.csv"
+EXPECTED_FEATURES = ['Played', 'Paused', 'Likes', 'Segment']
+
+# Bounds of the process-wide dataset cache (the most recent file is always kept)
+MAX_DATASETS = int(os.environ.get("DASHBOARD_MAX_COHORTS", "8"))
+MAX_CACHE_BYTES = int(os.environ.get("DASHBOARD_CACHE_MB", "2048")) * 1024 * 1024
+
+
+class DataError(ValueError):
+    """Raised when a data file is missing columns the dashboard relies on"""
+
+
+# ------------------------------------------------------------
+# Dataset: one parsed version of a data file
+# ------------------------------------------------------------
+class Dataset:
+    """Parsed data file plus the derived values every rerun needs.
+
+    Instances are shared between sessions, so ``df`` must be treated as
+    read-only. Anything else that only depends on the file contents can be
+    attached with ``memo()`` and is discarded together with the dataset.
+    """
+
+    def __init__(self, path, key, df, cluster_descriptions=None, version=None):
+        self.path = path
+        self.key = key
+        # The path is part of the version: cohorts of equal size and mtime differ
+        self.version = version or "%x-%x-%x" % (zlib.crc32(key[0].encode()), key[1], key[2])
+        self.df = df
+        self.frame_nbytes = int(df.memory_usage(deep=True).sum())
+        # Cluster id -> description text (kept out of ``df``, see schema.py)
+        self.cluster_descriptions = cluster_descriptions
+
+        # Normalize cluster column name
+        self.cluster_col = "Cluster Name" if "Cluster Name" in df.columns else ("Cluster" if "Cluster" in df.columns else None)
+        if self.cluster_col is None:
+            raise DataError("No 'Cluster' or 'Cluster Name' column found in the CSV.")
+
+        # Ensure friendly applicant column
+        self.applicant_col = "ApplicantName" if "ApplicantName" in df.columns else ("Applicant Name" if "Applicant Name" in df.columns else None)
+
+        # Determine which numeric features are available
+        self.feature_cols = [c for c in EXPECTED_FEATURES if c in df.columns]
+
+        # Helpful derived values
+        self.total_students = len(df)
+        counts = df[self.cluster_col].value_counts().sort_index()
+        self.cluster_counts = counts[counts > 0]  # categoricals report unused levels too
+        self.cluster_pct = (self.cluster_counts / self.total_students * 100).round(1)
+
+        self._memo = {}
+        self._memo_sizes = {}
+        # One lock per name, so a slow build only blocks readers of that value;
+        # builders may memo() other values
+        self._memo_locks = {}
+        self._memo_lock = threading.Lock()
+
+    def memo(self, name, build):
+        """Return ``build(self)``, computing it at most once for this version"""
+        try:
+            return self._memo[name]
+        except KeyError:
+            pass
+        with self._memo_lock:
+            lock = self._memo_locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._memo:
+                value = build(self)
+                # Values that grow after they are built are sized live (see nbytes)
+                size = 0 if _sized_live(value) else _nbytes(value, {id(self)})
+                with self._memo_lock:
+                    self._memo[name] = value
+                    self._memo_sizes[name] = size
+            return self._memo[name]
+
+    @property
+    def nbytes(self):
+        """Memory of the frame plus every memoized value"""
+        with self._memo_lock:
+            memos = sum(self._memo_sizes.values())
+            live = [v for v in self._memo.values() if _sized_live(v)]
+        return self.frame_nbytes + memos + sum(v.nbytes for v in live)
+
+
+def _sized_live(value):
+    """True for memo values that report their own, current size: memoized
+    datasets (which grow memos too) and objects with an ``nbytes`` property,
+    such as the engagement stream"""
+    if isinstance(value, (np.ndarray, pd.DataFrame, pd.Series, pd.Index)):
+        return False
+    return isinstance(value, Dataset) or hasattr(value, "nbytes")
+
+
+def _nbytes(value, seen):
+    """Approximate memory held by ``value``: arrays, frames and the containers
+    and plain objects that hold them (shared parts may be counted twice)"""
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if _sized_live(value):
+        return value.nbytes
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return int(pd.Series(value.ravel()).memory_usage(deep=True, index=False))
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sum(_nbytes(k, seen) + _nbytes(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sum(_nbytes(v, seen) for v in value)
+    if hasattr(value, "__dict__"):
+        return _nbytes(vars(value), seen)
+    return 0
+
+
+# ------------------------------------------------------------
+# Process-wide cache
+# ------------------------------------------------------------
+_cache = OrderedDict()
+# Requested path -> lock held while parsing it (dropped with the entry)
+_path_locks = {}
+_cache_lock = threading.Lock()
+
+
+def file_key(path):
+    """Return the (path, size, mtime_ns) key identifying a file version"""
+    abspath = os.path.abspath(path)
+    st = os.stat(abspath)
+    return (abspath, st.st_size, st.st_mtime_ns)
+
+
+def _read_frame(path):
+    """Read ``path`` with the declared schema; returns (df, cluster_descriptions)"""
+    if is_snapshot(path):
+        df = read_snapshot(path)
+    else:
+        df = pd.read_csv(path, dtype=csv_dtypes())
+    df = apply_schema(df)
+
+    # Raw exports without cluster labels are clustered on load
+    if "Cluster Name" not in df.columns and "Cluster" not in df.columns:
+        features = [c for c in EXPECTED_FEATURES if c in df.columns]
+        if features and len(df):
+            result = fit_engagement_clusters(df, features)
+            return label_frame(df, result), result.descriptions
+    return split_descriptions(df)
+
+
+def resolve_source(path, prefer_snapshot=True):
+    """Return the file actually read for ``path``: a fresh snapshot if any"""
+    if prefer_snapshot:
+        snap = fresh_snapshot(path)
+        if snap is not None:
+            return snap
+    return path
+
+
+def load_dataset(path=DEFAULT_DATA_PATH, prefer_snapshot=True):
+    """Return the cached Dataset for ``path``, parsing it only if it changed.
+
+    When a Parquet/Feather snapshot of a CSV exists next to it and is not
+    older than the CSV, the snapshot is loaded instead. Raises
+    FileNotFoundError if no file exists and DataError if it has no cluster
+    column.
+    """
+    # Cache entries are per requested path, so switching between the CSV and
+    # its snapshot replaces the old version instead of keeping both
+    requested = os.path.abspath(path)
+    source = resolve_source(requested, prefer_snapshot)
+    key = file_key(source)
+
+    with _cache_lock:
+        cached = _cache.get(requested)
+        if cached is not None and cached.key == key:
+            _cache.move_to_end(requested)
+            # Memos built since the last request count against the bound too
+            _evict_locked()
+            return cached
+        lock = _path_locks.setdefault(requested, threading.Lock())
+
+    # Only one session parses a given file; the others wait for its result
+    with lock:
+        try:
+            source = resolve_source(requested, prefer_snapshot)
+            key = file_key(source)
+            cached = _cache.get(requested)
+            if cached is not None and cached.key == key:
+                return cached
+            df, descriptions = _read_frame(key[0])
+            dataset = Dataset(key[0], key, df, descriptions)
+        except Exception:
+            with _cache_lock:
+                if requested not in _cache:
+                    _path_locks.pop(requested, None)
+            raise
+        _store(requested, dataset)
+        return dataset
+
+
+def _evict_locked():
+    """Drop least recently used datasets until the cache is within its bounds"""
+    total = sum(d.nbytes for d in _cache.values())
+    while len(_cache) > 1 and (len(_cache) > MAX_DATASETS or total > MAX_CACHE_BYTES):
+        path, evicted = _cache.popitem(last=False)
+        total -= evicted.nbytes
+        # A session still waiting on the old lock at worst parses the file twice
+        _path_locks.pop(path, None)
+
+
+def _store(requested, dataset):
+    with _cache_lock:
+        # Replacing the entry evicts the previous version of this file
+        _cache.pop(requested, None)
+        _cache[requested] = dataset
+        _evict_locked()
+
+
+def cache_info():
+    """One dict per cached dataset (least recently used first)"""
+    with _cache_lock:
+        return [{"path": path, "version": d.version, "rows": d.total_students,
+                 "frame_bytes": d.frame_nbytes, "bytes": d.nbytes}
+                for path, d in _cache.items()]
+
+
+def read_dataset(path, prefer_snapshot=True):
+    """Return a Dataset for ``path`` without adding it to the cache.
+
+    For one-off batch work over many files (e.g. trend rollups), so loading
+    them does not evict the cohorts sessions are looking at. A version that is
+    already cached is returned as is.
+    """
+    requested = os.path.abspath(path)
+    source = resolve_source(requested, prefer_snapshot)
+    key = file_key(source)
+    with _cache_lock:
+        cached = _cache.get(requested)
+    if cached is not None and cached.key == key:
+        return cached
+    df, descriptions = _read_frame(source)
+    return Dataset(source, key, df, descriptions)
+
+
+def recluster_dataset(data, k=DEFAULT_K, method="kmeans", seed=0):
+    """Return a Dataset with clusters recomputed by the in-app engine.
+
+    The result is cached on ``data``, so each (k, method, seed) is computed at
+    most once per file version; all three are part of its ``version``, so
+    per-version caches never mix two labellings. Its ``clustering``
+    attribute holds the ClusteringResult (centroids, inertia, iterations).
+    """
+    def build(d):
+        result = fit_engagement_clusters(d.df, d.feature_cols, k=k, method=method, seed=seed)
+        labelled = Dataset(d.path, d.key, label_frame(d.df, result), result.descriptions,
+                           version="%s-%s%d-s%d" % (d.version, method, k, seed))
+        labelled.clustering = result
+        return labelled
+
+    return data.memo(("recluster", k, method, seed), build)
+
+
+def clear_cache():
+    """Drop every cached dataset"""
+    with _cache_lock:
+        _cache.clear()
+        _path_locks.clear()
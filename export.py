@@ -0,0 +1,141 @@
+# export.py - Lazy, chunked export of the students shown in the explorer
+# ------------------------------------------------------------
+# Files are only generated when an educator asks for them, written a chunk of
+# rows at a time, and kept in a small process-wide LRU keyed by (data version,
+# cluster, columns, format) so the same download requested from many sessions
+# is built once.
+#
+# The export is not streamed to the browser: st.download_button (Streamlit
+# 1.48) takes the finished bytes, so each file is materialized once in memory.
+# Chunking only avoids building intermediate copies on top of it (one text
+# chunk at a time instead of the whole CSV as a Python string), so peak memory
+# is about the file plus one chunk. Callers that can stream, such as an HTTP
+# response, can pass their own file object to write_export().
+import gzip
+import io
+import threading
+from collections import OrderedDict
+
+from schema import attach_descriptions
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+CHUNK_ROWS = 50000
+
+# label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+}
+if HAVE_PYARROW:
+    EXPORT_FORMATS["Parquet"] = (".parquet", "application/vnd.apache.parquet")
+
+# Upper bound on the bytes held by the export cache
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def _chunks(data, positions, columns, chunk_rows):
+    df = data.df
+    col_idx = None if columns is None else df.columns.get_indexer(columns)
+    for start in range(0, len(positions), chunk_rows):
+        rows = positions[start:start + chunk_rows]
+        chunk = df.iloc[rows] if col_idx is None else df.iloc[rows, col_idx]
+        if columns is None:
+            chunk = attach_descriptions(chunk, data.cluster_descriptions)
+        yield chunk
+
+
+def iter_csv(data, positions, columns=None, chunk_rows=CHUNK_ROWS):
+    """Yield the CSV for ``positions`` as UTF-8 byte chunks (header first).
+
+    With ``columns=None`` every column is exported, including the cluster
+    description that schema.py keeps out of the frame.
+    """
+    header = True
+    for chunk in _chunks(data, positions, columns, chunk_rows):
+        yield chunk.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+    if header:
+        # No rows: still emit the header line
+        empty = data.df.iloc[:0] if columns is None else data.df.iloc[:0][columns]
+        if columns is None:
+            empty = attach_descriptions(empty, data.cluster_descriptions)
+        yield empty.to_csv(index=False).encode("utf-8")
+
+
+def write_export(out, data, positions, fmt="CSV", columns=None, chunk_rows=CHUNK_ROWS):
+    """Write the export in format ``fmt`` to the binary file object ``out``"""
+    if fmt == "CSV":
+        for part in iter_csv(data, positions, columns, chunk_rows):
+            out.write(part)
+    elif fmt == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=6, mtime=0) as gz:
+            for part in iter_csv(data, positions, columns, chunk_rows):
+                gz.write(part)
+    elif fmt == "Parquet" and HAVE_PYARROW:
+        writer = None
+        for chunk in _chunks(data, positions, columns, chunk_rows):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema, compression="zstd")
+            writer.write_table(table)
+        if writer is None:
+            empty = data.df.iloc[:0] if columns is None else data.df.iloc[:0][columns]
+            pq.write_table(pa.Table.from_pandas(empty, preserve_index=False), out)
+        else:
+            writer.close()
+    else:
+        raise ValueError("Unknown export format %r" % fmt)
+
+
+# ------------------------------------------------------------
+# Process-wide cache of generated files
+# ------------------------------------------------------------
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+
+def export_bytes(data, positions, fmt="CSV", columns=None, selection=None):
+    """Return the whole export as bytes, generating it only on a cache miss.
+
+    The file is materialized in memory (st.download_button needs the bytes);
+    files up to MAX_CACHE_BYTES are then kept for other sessions. ``selection``
+    identifies ``positions`` in the cache key (e.g. the selected cluster);
+    without it the result is not cached.
+    """
+    global _cache_bytes
+    key = None
+    if selection is not None:
+        key = (data.version, selection, None if columns is None else tuple(columns), fmt)
+        with _cache_lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                return _cache[key]
+
+    out = io.BytesIO()
+    write_export(out, data, positions, fmt, columns)
+    payload = out.getvalue()
+
+    if key is not None and len(payload) <= MAX_CACHE_BYTES:
+        with _cache_lock:
+            if key not in _cache:
+                _cache[key] = payload
+                _cache_bytes += len(payload)
+            while _cache_bytes > MAX_CACHE_BYTES:
+                _, old = _cache.popitem(last=False)
+                _cache_bytes -= len(old)
+    return payload
+
+
+def export_filename(stem, fmt):
+    return stem + EXPORT_FORMATS[fmt][0]
+
+
+def export_mime(fmt):
+    return EXPORT_FORMATS[fmt][1]
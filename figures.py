@@ -0,0 +1,287 @@
+# figures.py - Memoized Plotly figures shared by all sessions
+# ------------------------------------------------------------
+# Building a figure with plotly.express (melt, trace validation, layout
+# updates) costs tens of milliseconds; handing an already built figure to
+# st.plotly_chart costs about one. Figures are therefore built once per
+# (aggregate version, chart kind, selection) and kept in a process-wide LRU.
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from aggregates import OVERALL
+
+MAX_FIGURES = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class CachedFigure:
+    """A built figure shared by all sessions; treat it as read-only"""
+
+    def __init__(self, figure):
+        self.figure = figure
+
+
+def cached_figure(key, build):
+    """Return the CachedFigure for ``key``, calling ``build()`` on a miss"""
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+            return entry
+    entry = CachedFigure(build())
+    with _cache_lock:
+        entry = _cache.setdefault(key, entry)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_FIGURES:
+            _cache.popitem(last=False)
+    return entry
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+# ------------------------------------------------------------
+# Dashboard charts
+# ------------------------------------------------------------
+def distribution_figure(cube):
+    """Bar chart of students per cluster (overview)"""
+    def build():
+        cluster_col = cube.cluster_col
+        cluster_counts_df = cube.counts.reset_index()
+        cluster_counts_df.columns = [cluster_col, 'Number of Students']
+        fig = px.bar(
+            cluster_counts_df,
+            x=cluster_col,
+            y='Number of Students',
+            color=cluster_col,
+            text='Number of Students',
+            color_discrete_sequence=px.colors.qualitative.Set2
+        )
+        fig.update_layout(
+            height=360,
+            margin=dict(l=10, r=10, t=40, b=20),
+            showlegend=False,
+            font=dict(size=10)  # Smaller font for mobile
+        )
+        fig.update_traces(textposition='outside')
+        return fig
+
+    return cached_figure((cube.version, "distribution", None), build)
+
+
+def comparison_figure(cube, selected_cluster):
+    """Grouped bars of the selected cluster's feature means vs the overall means"""
+    def build():
+        compare_df = pd.DataFrame({
+            'Feature': cube.feature_cols,
+            'Selected cluster mean': cube.means(selected_cluster).values,
+            'Overall mean': cube.means(OVERALL).values
+        })
+        fig = px.bar(
+            compare_df.melt(id_vars='Feature', var_name='Group', value_name='Value'),
+            x='Feature', y='Value', color='Group', barmode='group',
+            title=f"Selected cluster ({selected_cluster}) vs overall",
+            color_discrete_sequence=px.colors.qualitative.Set2
+        )
+        fig.update_layout(
+            height=380,
+            margin=dict(l=10, r=10, t=40, b=20),
+            plot_bgcolor="white",
+            paper_bgcolor="white",
+            font=dict(size=10)
+        )
+        return fig
+
+    return cached_figure((cube.version, "comparison", selected_cluster), build)
+
+
+def risk_heatmap_figure(version, risk_cube):
+    """Heatmap of the % of students flagged per cluster and risk column"""
+    def build():
+        fig = px.imshow(
+            risk_cube.flag_rates(),
+            text_auto=".1f",
+            aspect="auto",
+            color_continuous_scale="Blues",
+            labels=dict(x="Flag", y=risk_cube.cluster_col, color="% flagged")
+        )
+        fig.update_layout(
+            height=360,
+            margin=dict(l=10, r=10, t=40, b=20),
+            title="% of students flagged (Result: % failing)",
+            font=dict(size=10)
+        )
+        return fig
+
+    return cached_figure((version, "risk_heatmap", None), build)
+
+
+def trend_figure(version, table, metric_label):
+    """Line chart of a snapshot x cluster table (see trends.trend_table)"""
+    def build():
+        long_df = table.rename_axis(index="Snapshot", columns="Cluster").stack().rename(metric_label).reset_index()
+        fig = px.line(
+            long_df,
+            x="Snapshot", y=metric_label, color="Cluster", markers=True,
+            color_discrete_sequence=px.colors.qualitative.Set2
+        )
+        fig.update_layout(
+            height=380,
+            margin=dict(l=10, r=10, t=40, b=20),
+            plot_bgcolor="white",
+            paper_bgcolor="white",
+            font=dict(size=10)
+        )
+        return fig
+
+    return cached_figure((version, "trend", metric_label), build)
+
+
+def migration_sankey_figure(diff, old_label, new_label):
+    """Sankey of students flowing between clusters from one snapshot to another"""
+    def build():
+        sources = {name: i for i, name in enumerate(diff.rows)}
+        targets = {name: len(diff.rows) + i for i, name in enumerate(diff.cols)}
+        flows = diff.flows()
+        palette = px.colors.qualitative.Set2
+        fig = go.Figure(go.Sankey(
+            node=dict(
+                label=list(diff.rows) + list(diff.cols),
+                color=[palette[i % len(palette)] for i in range(len(diff.rows))] + [palette[i % len(palette)] for i in range(len(diff.cols))],
+                pad=12,
+                thickness=14
+            ),
+            link=dict(
+                source=[sources[f] for f, _, _ in flows],
+                target=[targets[t] for _, t, _ in flows],
+                value=[n for _, _, n in flows]
+            )
+        ))
+        fig.update_layout(
+            height=420,
+            margin=dict(l=10, r=10, t=40, b=20),
+            title=f"{old_label} → {new_label}",
+            font=dict(size=10)
+        )
+        return fig
+
+    return cached_figure((diff.old_version, diff.new_version, "migration_sankey"), build)
+
+
+def embedding_figure(data, embedding, positions, grades=False):
+    """WebGL scatter of the sampled rows of a projection.Embedding, one trace per cluster"""
+    def build():
+        labels = data.df[data.cluster_col].to_numpy()[positions]
+        names = data.df[data.applicant_col].to_numpy()[positions] if data.applicant_col else None
+        coords = embedding.coords[positions]
+        palette = px.colors.qualitative.Set2
+        fig = go.Figure()
+        # Same cluster order, and so the same colours, as the distribution chart
+        for i, cluster in enumerate(data.cluster_counts.index):
+            mask = labels == cluster
+            fig.add_trace(go.Scattergl(
+                x=coords[mask, 0],
+                y=coords[mask, 1],
+                mode="markers",
+                name=str(cluster),
+                text=names[mask] if names is not None else None,
+                hovertemplate="%{text}<extra>%{fullData.name}</extra>" if names is not None else None,
+                marker=dict(size=4, opacity=0.6, color=palette[i % len(palette)])
+            ))
+        pc1, pc2 = (list(embedding.explained) + [0.0, 0.0])[:2]
+        fig.update_layout(
+            height=480,
+            margin=dict(l=10, r=10, t=40, b=20),
+            xaxis_title=f"PC1 ({pc1:.0%} of variance)",
+            yaxis_title=f"PC2 ({pc2:.0%} of variance)",
+            plot_bgcolor="white",
+            paper_bgcolor="white",
+            legend=dict(itemsizing="constant"),
+            font=dict(size=10)
+        )
+        return fig
+
+    return cached_figure((data.version, "embedding", grades, len(positions)), build)
+
+
+def outcome_correlation_figure(version, analytics, group):
+    """Heatmap of engagement x outcome correlations for one group"""
+    def build():
+        fig = px.imshow(
+            analytics.engagement_outcome(group),
+            text_auto=".2f",
+            aspect="auto",
+            zmin=-1,
+            zmax=1,
+            color_continuous_scale="RdBu",
+            labels=dict(x="Outcome", y="Engagement", color="Correlation")
+        )
+        fig.update_layout(
+            height=360,
+            margin=dict(l=10, r=10, t=40, b=20),
+            title=f"Correlation of engagement with outcomes ({group})",
+            font=dict(size=10)
+        )
+        return fig
+
+    return cached_figure((version, "outcome_correlation", group), build)
+
+
+def pass_rate_figure(version, analytics, feature, group):
+    """Bars of the pass rate per quantile bin of an engagement feature"""
+    def build():
+        table = analytics.pass_rate(feature, group).reset_index()
+        fig = px.bar(
+            table,
+            x=feature, y="Pass rate (%)",
+            text="Pass rate (%)",
+            hover_data=["Students", "Passed"],
+            color_discrete_sequence=px.colors.qualitative.Set2
+        )
+        fig.update_layout(
+            height=360,
+            margin=dict(l=10, r=10, t=40, b=20),
+            title=f"Pass rate by {feature} ({group})",
+            yaxis_range=[0, 105],
+            xaxis_type="category",
+            plot_bgcolor="white",
+            paper_bgcolor="white",
+            font=dict(size=10)
+        )
+        fig.update_traces(textposition="outside")
+        return fig
+
+    return cached_figure((version, "pass_rate", feature, group), build)
+
+
+def grade_distribution_figure(version, analytics, outcome, group):
+    """Grouped bars of an outcome's grade distribution, one group vs overall"""
+    def build():
+        shares = analytics.grade_distribution(outcome)
+        groups = [group] if group == OVERALL else [group, OVERALL]
+        long_df = shares.loc[groups].rename_axis(index="Group").reset_index().melt(
+            id_vars="Group", var_name=outcome, value_name="% of students"
+        )
+        fig = px.bar(
+            long_df,
+            x=outcome, y="% of students", color="Group", barmode="group",
+            color_discrete_sequence=px.colors.qualitative.Set2
+        )
+        fig.update_layout(
+            height=360,
+            margin=dict(l=10, r=10, t=40, b=20),
+            title=f"{outcome} distribution",
+            plot_bgcolor="white",
+            paper_bgcolor="white",
+            font=dict(size=10)
+        )
+        return fig
+
+    return cached_figure((version, "grade_distribution", outcome, group), build)
@@ -0,0 +1,121 @@
+# interpretation.py - Plain-language interpretation of cluster feature means
+# ------------------------------------------------------------
+# The percentage difference of every cluster's feature means from the overall
+# means is one array operation on the ClusterCube. Sentences for all clusters
+# are rendered once per cube version, so the comparison callout is a lookup
+# and the "All" view can show a one-line summary per cluster.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from aggregates import OVERALL
+
+# feature (lower case) -> (what students have more/fewer of, verb)
+FEATURE_PHRASES = {
+    "played": ("videos", "watch"),
+    "paused": ("pauses", "have"),
+    "likes": ("likes", "give"),
+    "segment": ("forum messages", "post"),
+}
+DEFAULT_VERB = "have"
+
+# Differences smaller than this (in % of the overall mean) are not mentioned
+THRESHOLD_PCT = 5
+
+NEAR_AVERAGE = "This cluster's engagement is close to the overall average across the features."
+
+MAX_CACHED = 64
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def feature_phrase(feature):
+    """(noun, verb) used to describe ``feature``"""
+    return FEATURE_PHRASES.get(feature.lower(), (feature, DEFAULT_VERB))
+
+
+def delta_pct(cube):
+    """clusters x features frame of % difference from the overall mean.
+
+    Features whose overall mean is 0 are NaN.
+    """
+    means = cube.cluster_means()
+    overall = cube.means(OVERALL).to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = np.where(overall != 0, (means.to_numpy(dtype=float) - overall) / overall * 100, np.nan)
+    return pd.DataFrame(delta, index=means.index, columns=cube.feature_cols)
+
+
+def _join(parts):
+    if not parts:
+        return NEAR_AVERAGE
+    if len(parts) == 1:
+        return parts[0]
+    return ", ".join(parts[:-1]) + f", but {parts[-1]}"
+
+
+class Interpretations:
+    """Pre-rendered interpretation sentences for every cluster of a cube"""
+
+    def __init__(self, cube):
+        self.version = cube.version
+        self.deltas = delta_pct(cube)
+        phrases = [feature_phrase(f) for f in cube.feature_cols]
+
+        values = self.deltas.to_numpy()
+        with np.errstate(invalid="ignore"):
+            notable = np.abs(values) >= THRESHOLD_PCT
+        self.texts = {}
+        strongest = []
+        for i, cluster in enumerate(self.deltas.index):
+            parts = []
+            for j in np.flatnonzero(notable[i]):
+                noun, verb = phrases[j]
+                d = values[i, j]
+                direction = "more" if d > 0 else "fewer"
+                parts.append(f"{cluster} {verb} {abs(d):.0f}% {direction} {noun} than average")
+            self.texts[cluster] = _join(parts)
+
+            row = np.nan_to_num(np.abs(values[i]), nan=-1.0)
+            j = int(np.argmax(row)) if len(row) else -1
+            strongest.append(f"{cube.feature_cols[j]} {values[i, j]:+.0f}%" if j >= 0 and row[j] >= 0 else "")
+
+        self._summary = pd.DataFrame(
+            {"Strongest difference": strongest, "Interpretation": [self.texts[c] for c in self.deltas.index]},
+            index=self.deltas.index,
+        )
+
+    def text(self, cluster):
+        """Interpretation sentence for ``cluster`` (no trailing period)"""
+        return self.texts.get(cluster, NEAR_AVERAGE)
+
+    def summary(self):
+        """One row per cluster: its strongest difference and its sentence"""
+        return self._summary
+
+
+def get_interpretations(cube):
+    """Return the Interpretations for ``cube``, rendered once per cube version"""
+    key = cube.version
+    if key is None:
+        return Interpretations(cube)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+            return entry
+    entry = Interpretations(cube)
+    with _cache_lock:
+        entry = _cache.setdefault(key, entry)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return entry
+
+
+def interpret_cluster(cube, cluster):
+    """Interpretation sentence for one cluster of ``cube``"""
+    return get_interpretations(cube).text(cluster)
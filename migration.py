@@ -0,0 +1,146 @@
+# migration.py - Students moving between clusters from one snapshot to the next
+# ------------------------------------------------------------
+# Two exports are joined on ApplicantName with a hash index (no sort, no
+# merge of full frames): every student of the newer snapshot is looked up
+# once in the older one. Cluster labels are factorized into integer codes, so
+# the transition matrix is a single bincount over code pairs. Diffs are kept
+# per (old version, new version) in a small process-wide LRU.
+#
+# A name listed twice in the earlier snapshot matches its first row; rows of
+# the later snapshot are counted as they are. Students without a cluster label
+# are counted under UNASSIGNED.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+# Pseudo-clusters for students present in only one of the two snapshots
+JOINED = "(not in earlier snapshot)"
+LEFT = "(not in later snapshot)"
+# Pseudo-cluster for students whose cluster label is missing
+UNASSIGNED = "(no cluster)"
+
+MAX_CACHED = 16
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _lookup(old_names, new_names):
+    """Position of each later name in the earlier snapshot (-1 if absent)"""
+    if pa is not None:
+        found = pc.index_in(pa.array(new_names), value_set=pa.array(old_names))
+        return found.fill_null(-1).to_numpy().astype(np.int64)
+    old_names = old_names.astype(str).to_numpy()
+    first = ~pd.Series(old_names).duplicated().to_numpy()
+    pos = pd.Index(old_names[first]).get_indexer(new_names.astype(str).to_numpy())
+    return np.where(pos >= 0, np.flatnonzero(first)[pos], -1)
+
+
+def _labels(data):
+    codes, uniques = pd.factorize(data.df[data.cluster_col])
+    labels = [str(u) for u in uniques]
+    # factorize codes a missing label as -1, which would index the last cluster
+    missing = codes < 0
+    if missing.any():
+        codes = np.where(missing, len(labels), codes)
+        labels.append(UNASSIGNED)
+    return codes, np.asarray(labels, dtype=object)
+
+
+class MigrationDiff:
+    """Cluster transitions between an earlier and a later Dataset"""
+
+    def __init__(self, old, new):
+        if old.applicant_col is None or new.applicant_col is None:
+            raise ValueError("Both snapshots need an ApplicantName column to track students.")
+        self.old_version = old.version
+        self.new_version = new.version
+        self.applicant_col = new.applicant_col
+        new_names = new.df[new.applicant_col]
+
+        # Hash join: position of each later student in the earlier snapshot (-1 if new)
+        pos = _lookup(old.df[old.applicant_col], new_names)
+        matched = pos >= 0
+        seen = np.zeros(len(old.df), dtype=bool)
+        seen[pos[matched]] = True
+
+        # Both snapshots' labels as codes into one sorted list of clusters
+        old_codes, old_uniques = _labels(old)
+        new_codes, new_uniques = _labels(new)
+        clusters = sorted(set(old_uniques) | set(new_uniques))
+        index = {c: i for i, c in enumerate(clusters)}
+        old_codes = np.array([index[c] for c in old_uniques], dtype=np.int64)[old_codes]
+        new_codes = np.array([index[c] for c in new_uniques], dtype=np.int64)[new_codes]
+        self.rows = clusters + [JOINED]
+        self.cols = clusters + [LEFT]
+
+        k = len(clusters)
+        width = k + 1
+        from_codes = np.full(len(new_codes), k, dtype=np.int64)
+        from_codes[matched] = old_codes[pos[matched]]
+        pairs = np.concatenate([
+            from_codes * width + new_codes,
+            old_codes[~seen] * width + k,  # earlier cluster -> LEFT
+        ])
+        counts = np.bincount(pairs, minlength=width * width).reshape(width, width)
+        self.matrix = pd.DataFrame(counts, index=pd.Index(self.rows, name="From"),
+                                   columns=pd.Index(self.cols, name="To"))
+
+        moved = matched & (from_codes != new_codes)
+        self.n_matched = int(matched.sum())
+        self.n_moved = int(moved.sum())
+        self.n_joined = int((~matched).sum())
+        self.n_left = int((~seen).sum())
+        labels = np.asarray(clusters, dtype=object)
+        self._movers = pd.DataFrame({
+            self.applicant_col: new_names[moved].to_numpy(),
+            "From": labels[from_codes[moved]],
+            "To": labels[new_codes[moved]],
+        })
+        self._csv = None
+
+    def movers(self, from_cluster=None, to_cluster=None):
+        """Students whose cluster changed, optionally for one transition"""
+        out = self._movers
+        if from_cluster is not None:
+            out = out[out["From"] == from_cluster]
+        if to_cluster is not None:
+            out = out[out["To"] == to_cluster]
+        return out
+
+    def movers_csv(self):
+        """All movers as CSV bytes (built once)"""
+        if self._csv is None:
+            self._csv = self._movers.to_csv(index=False).encode("utf-8")
+        return self._csv
+
+    def flows(self):
+        """(from, to, students) for every non-empty transition, for Sankey charts"""
+        stacked = self.matrix.stack()
+        stacked = stacked[stacked > 0]
+        return [(f, t, int(n)) for (f, t), n in stacked.items()]
+
+
+def get_migration(old, new):
+    """Return the MigrationDiff from ``old`` to ``new``, computed once per version pair"""
+    key = (old.version, new.version)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+            return entry
+    entry = MigrationDiff(old, new)
+    with _cache_lock:
+        entry = _cache.setdefault(key, entry)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return entry
@@ -0,0 +1,95 @@
+# neighbors.py - "Similar students" nearest-neighbor index
+# ------------------------------------------------------------
+# Finds the k students closest to a given student on the standardized
+# engagement features plus the ordinal-encoded CW1/CW2/ESE/CGPA grades (the
+# matrix from projection.feature_matrix), across all clusters.
+#
+# The features are a handful of small integer scales, so many students share
+# exactly the same profile and a KD-tree degenerates; a blocked brute-force
+# search is both simpler and faster here. The index keeps the matrix as
+# contiguous float32 with precomputed squared norms, so a query is one
+# matrix-vector product per block (||x||^2 - 2 x.q) plus a partial sort; on
+# 500k rows that is a few milliseconds. Every candidate within float32 rounding
+# of the k-th distance is kept (with so many ties there can be more than k),
+# and only those get their distances recomputed exactly and are cut to k by
+# (distance, row). Built once per data version.
+import numpy as np
+
+from projection import feature_matrix
+
+DEFAULT_K = 10
+MAX_K = 100
+BLOCK_ROWS = 262144
+# Relative float32 error allowed on the ranking distances (see _near_kth)
+TIE_TOLERANCE = 1e-5
+
+
+def _near_kth(d, k, tol):
+    """Positions of finite ``d`` within ``tol`` of its k-th smallest value"""
+    finite = np.isfinite(d)
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    if len(d) <= k:
+        return np.flatnonzero(finite)
+    kth = np.partition(d, k - 1)[k - 1]
+    return np.flatnonzero((d <= kth + tol) & finite)
+
+
+class NeighborIndex:
+    """Blocked brute-force k-NN over the standardized feature and grade matrix"""
+
+    def __init__(self, data):
+        Z, self.columns = feature_matrix(data, grades=True)
+        self._Z = Z
+        self._X = np.ascontiguousarray(Z, dtype=np.float32)
+        self._sq = np.einsum("ij,ij->i", self._X, self._X)
+        self.n = len(Z)
+
+    def query(self, rows, k=DEFAULT_K, exclude_self=True, block_rows=BLOCK_ROWS):
+        """Return (neighbor rows, distances), each len(rows) x k, nearest first.
+
+        Results are deterministic; students at equal distance are listed by row position.
+        """
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        k = max(0, min(k, self.n - (1 if exclude_self else 0)))
+        Q = self._X[rows]
+        # Bound on the float32 rounding of ||x||^2 - 2 x.q for each query
+        tol = TIE_TOLERANCE * (float(self._sq.max(initial=0.0)) + np.einsum("ij,ij->i", Q, Q))
+        best_i = [np.empty(0, dtype=np.int64) for _ in rows]
+        best_d = [np.empty(0, dtype=np.float32) for _ in rows]
+        for start in range(0, self.n, block_rows):
+            block = self._X[start:start + block_rows]
+            # ||q||^2 is the same for every candidate, so it is left out of the ranking
+            d = self._sq[start:start + len(block)] - 2.0 * (Q @ block.T)
+            if exclude_self:
+                inside = (rows >= start) & (rows < start + len(block))
+                d[np.flatnonzero(inside), rows[inside] - start] = np.inf
+            for q in range(len(rows)):
+                near = _near_kth(d[q], k, tol[q])
+                cand_d = np.concatenate([best_d[q], d[q, near]])
+                cand_i = np.concatenate([best_i[q], near + start])
+                keep = _near_kth(cand_d, k, tol[q])
+                best_d[q], best_i[q] = cand_d[keep], cand_i[keep]
+
+        # Exact distances for the candidates only, then the first k by (distance, row)
+        found = np.empty((len(rows), k), dtype=np.int64)
+        dist = np.empty((len(rows), k))
+        for q, row in enumerate(rows):
+            diff = self._Z[best_i[q]] - self._Z[row]
+            exact = np.sqrt(np.einsum("kd,kd->k", diff, diff))
+            order = np.lexsort((best_i[q], np.round(exact, 9)))[:k]
+            found[q], dist[q] = best_i[q][order], exact[order]
+        return found, dist
+
+    def similar(self, data, row, k=DEFAULT_K):
+        """The ``k`` students most similar to ``row`` as a frame, nearest first"""
+        found, dist = self.query([row], k)
+        cols = [c for c in [data.applicant_col, data.cluster_col] if c] + self.columns
+        out = data.df.iloc[found[0]][cols].reset_index(drop=True)
+        out.insert(len([c for c in [data.applicant_col, data.cluster_col] if c]), "Distance", dist[0].round(3))
+        return out
+
+
+def get_neighbor_index(data):
+    """Return the NeighborIndex for ``data``, built at most once per data version"""
+    return data.memo("neighbor_index", NeighborIndex)
@@ -0,0 +1,172 @@
+# outcomes.py - Engagement-to-outcome analytics per cluster
+# ------------------------------------------------------------
+# Relates the engagement features (Played, Paused, Likes, Segment) to the
+# outcomes in the same export (CW1, CW2, ESE grade bands and Result). Grade
+# bands are used by their ordinal position (Fail = 0 ... Excellent = 5) and
+# Result as 0/1 for Fail/Pass.
+#
+# Everything comes from one vectorized pass per data version; every statistic
+# is a per-cluster sum (a bincount over (cluster code, ...) pairs, or a matrix
+# product over the cluster's rows) and the overall row is their sum:
+# - Pearson correlations, from per-cluster sums and cross-product matrices
+#   (complete cases only)
+# - pass rate per engagement quantile bin, for each feature and for an
+#   overall engagement score (mean of the standardized features)
+# - grade distributions of each outcome
+# The drill-down section only reads the result.
+import numpy as np
+import pandas as pd
+
+from aggregates import OVERALL
+from clustering import standardize
+from projection import ordinal_codes
+
+OUTCOME_COLUMNS = ["CW1", "CW2", "ESE", "Result"]
+PASS_COL = "Result"
+PASS_VALUE = "Pass"
+# Name of the combined engagement score offered next to the single features
+ENGAGEMENT_SCORE = "Engagement score"
+N_BINS = 5
+
+
+def _group_sums(codes, k, weights=None):
+    return np.bincount(codes, weights=weights, minlength=k)
+
+
+def _with_overall(table):
+    """Append the sum over clusters as the last (OVERALL) row"""
+    return np.concatenate([table, table.sum(axis=0, keepdims=True)])
+
+
+def _bin_label(lo, hi, integer):
+    fmt = "%d" if integer else "%.2f"
+    if integer and hi - lo <= 1:
+        return fmt % lo
+    return (fmt + "–" + fmt) % (lo, hi - 1 if integer else hi)
+
+
+def quantile_bins(x, n_bins=N_BINS):
+    """(bin index per row, bin labels) from the quantiles of ``x``; tied values share a bin"""
+    edges = np.unique(np.quantile(x, np.linspace(0, 1, n_bins + 1)))
+    integer = bool(np.all(x == np.round(x)))
+    if integer:
+        # Half-open integer ranges [lo, hi): each value lands in exactly one bin
+        edges = np.unique(np.append(np.ceil(edges[:-1]), edges[-1] + 1))
+    else:
+        edges[-1] = np.nextafter(edges[-1], np.inf)
+    if len(edges) < 2:
+        return np.zeros(len(x), dtype=np.int64), [_bin_label(x.min(), x.min() + 1, integer)]
+    bins = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, len(edges) - 2)
+    labels = [_bin_label(lo, hi, integer) for lo, hi in zip(edges[:-1], edges[1:])]
+    return bins, labels
+
+
+class OutcomeAnalytics:
+    """Correlations, pass rates by engagement bin and grade distributions, per cluster and ``OVERALL``"""
+
+    def __init__(self, data, outcome_cols=None):
+        df = data.df
+        self.cluster_col = data.cluster_col
+        self.engagement_cols = list(data.feature_cols)
+        self.outcome_cols = [c for c in (outcome_cols or OUTCOME_COLUMNS) if c in df.columns]
+        codes, clusters = pd.factorize(df[data.cluster_col], sort=True)
+        k = len(clusters)
+        known = codes >= 0
+        codes = codes[known]
+        self.groups = pd.Index(list(clusters) + [OVERALL], dtype=object, name=data.cluster_col)
+        self.sizes = pd.Series(_with_overall(_group_sums(codes, k)), index=self.groups, name="Students")
+
+        E = df[self.engagement_cols].to_numpy(dtype=np.float64)[known]
+        outcomes = {}
+        for col in self.outcome_cols:
+            values = ordinal_codes(df[col], fill_missing=False)[known]
+            if col == PASS_COL and isinstance(df[col].dtype, pd.CategoricalDtype) and PASS_VALUE in df[col].cat.categories:
+                pass_code = list(df[col].cat.categories).index(PASS_VALUE)
+                values = np.where(np.isnan(values), np.nan, (values == pass_code).astype(np.float64))
+            outcomes[col] = values
+        O = np.column_stack([outcomes[c] for c in self.outcome_cols]) if outcomes else np.empty((len(E), 0))
+
+        # --- Correlations from sums and cross-product sums (complete cases) ---
+        self.variables = self.engagement_cols + self.outcome_cols
+        V = np.hstack([E, O])
+        p = V.shape[1]
+        complete = ~np.isnan(V).any(axis=1)
+        cc = codes[complete]
+        order = np.argsort(cc, kind="stable")
+        Vc = V[complete][order]
+        counts = _group_sums(cc, k)
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        # Rows grouped by cluster: one matrix product per cluster gives its cross products
+        S = _with_overall(np.array([Vc[bounds[g]:bounds[g + 1]].sum(axis=0) for g in range(k)]).reshape(k, p))
+        C = _with_overall(np.array([Vc[bounds[g]:bounds[g + 1]].T @ Vc[bounds[g]:bounds[g + 1]] for g in range(k)]).reshape(k, p, p))
+        n = _with_overall(counts).astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = S / n[:, None]
+            cov = C / n[:, None, None] - mean[:, :, None] * mean[:, None, :]
+            sd = np.sqrt(np.clip(np.diagonal(cov, axis1=1, axis2=2), 0, None))
+            self._corr = np.clip(cov / (sd[:, :, None] * sd[:, None, :]), -1.0, 1.0)
+        self.n_complete = pd.Series(n.astype(np.int64), index=self.groups, name="Complete rows")
+
+        # --- Pass rate per engagement quantile bin ---
+        self._pass = {}
+        if PASS_COL in outcomes and self.engagement_cols:
+            passed = outcomes[PASS_COL]
+            has_result = ~np.isnan(passed)
+            Z, _, _ = standardize(E)
+            scores = {c: E[:, i] for i, c in enumerate(self.engagement_cols)}
+            scores[ENGAGEMENT_SCORE] = Z.mean(axis=1)
+            for name, x in scores.items():
+                bins, labels = quantile_bins(x)
+                m = len(labels)
+                pair = (codes * m + bins)[has_result]
+                students = _with_overall(np.bincount(pair, minlength=k * m).reshape(k, m))
+                passes = _with_overall(np.bincount(pair, weights=passed[has_result], minlength=k * m).reshape(k, m))
+                self._pass[name] = (labels, students, passes)
+
+        # --- Grade distributions ---
+        self._grades = {}
+        for col in self.outcome_cols:
+            series = df[col]
+            levels = list(series.cat.categories) if isinstance(series.dtype, pd.CategoricalDtype) else sorted(series.dropna().unique())
+            values = ordinal_codes(series, fill_missing=False)[known]
+            ok = ~np.isnan(values)
+            m = len(levels)
+            counts = np.bincount(codes[ok] * m + values[ok].astype(np.int64), minlength=k * m).reshape(k, m)
+            self._grades[col] = pd.DataFrame(_with_overall(counts), index=self.groups, columns=pd.Index(levels, name=col))
+
+    @property
+    def pass_features(self):
+        """Features offered for the pass-rate breakdown (empty without a Result column)"""
+        return list(self._pass)
+
+    def correlation(self, group=OVERALL):
+        """Full correlation matrix of engagement and outcome variables for ``group``"""
+        return pd.DataFrame(self._corr[self.groups.get_loc(group)], index=self.variables, columns=self.variables)
+
+    def engagement_outcome(self, group=OVERALL):
+        """Engagement features x outcomes block of the correlation matrix"""
+        return self.correlation(group).loc[self.engagement_cols, self.outcome_cols]
+
+    def pass_rate(self, feature, group=OVERALL):
+        """Students, passes and pass rate (%) per quantile bin of ``feature``"""
+        labels, students, passes = self._pass[feature]
+        g = self.groups.get_loc(group)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = passes[g] / students[g] * 100
+        return pd.DataFrame({
+            "Students": students[g].astype(np.int64),
+            "Passed": passes[g].astype(np.int64),
+            "Pass rate (%)": np.round(rate, 1),
+        }, index=pd.Index(labels, name=feature))
+
+    def grade_distribution(self, outcome, percent=True):
+        """Groups x levels counts of ``outcome`` (or % of each group's graded students)"""
+        counts = self._grades[outcome]
+        if not percent:
+            return counts
+        return (counts.div(counts.sum(axis=1).replace(0, np.nan), axis=0) * 100).round(1)
+
+
+def get_outcome_analytics(data):
+    """Return the OutcomeAnalytics for ``data``, built at most once per data version"""
+    return data.memo("outcome_analytics", OutcomeAnalytics)
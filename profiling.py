@@ -0,0 +1,237 @@
+# profiling.py - Per-rerun timing, payload and memory instrumentation
+# ------------------------------------------------------------
+# Every rerun of the app records how long each named section took, how many
+# bytes each section sent to the browser and the process' peak RSS so far
+# (a high-water mark since the process started, not per rerun). Records
+# go into a process-wide ring buffer; summary() gives per-section
+# percentiles, and to_json() / to_prometheus() dump them for tracking
+# regressions between releases.
+#
+# Sections are checkpoints rather than nested blocks: mark("explorer") ends
+# the section that was running and starts "explorer".
+#
+# Payload sizes come from wrapping ScriptRunContext._enqueue, which is private
+# to Streamlit: this matches the version pinned in requirements.txt
+# (streamlit==1.48.1). If a Streamlit upgrade removes it, payload sizes are
+# simply not recorded; re-check the hook when bumping the pin.
+import json
+import math
+import sys
+import threading
+import time
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:
+    get_script_run_ctx = None
+
+RING_SIZE = 2000
+PERCENTILES = (50, 90, 99)
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process since it started, in KiB.
+
+    ru_maxrss never decreases, so this is the process' high-water mark, not
+    the memory of the current rerun. None if unavailable.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+class RerunTrace:
+    """Timings and payload sizes of one rerun; create with Profiler.start()"""
+
+    def __init__(self, profiler, page):
+        self.profiler = profiler
+        self.page = page
+        self.started = time.time()
+        self.sections = {}
+        self.payload = {}
+        self._current = "startup"
+        self._t0 = self._t = time.perf_counter()
+        self._ctx = None
+        self._orig_enqueue = None
+        self._finished = False
+        self._hook_payload()
+
+    def _hook_payload(self):
+        # Count the serialized size of every message this rerun sends to the
+        # browser, attributed to the section that is running
+        ctx = get_script_run_ctx() if get_script_run_ctx else None
+        if ctx is None or not callable(getattr(ctx, "_enqueue", None)):
+            return
+        # A trace that was never finished leaves its wrapper in place; wrap
+        # the original instead of stacking on top of it
+        orig = getattr(ctx._enqueue, "_profiling_orig", ctx._enqueue)
+
+        def counting_enqueue(msg):
+            try:
+                size = msg.ByteSize()
+            except Exception:
+                size = 0
+            self.payload[self._current] = self.payload.get(self._current, 0) + size
+            return orig(msg)
+
+        counting_enqueue._profiling_orig = orig
+        self._ctx, self._orig_enqueue = ctx, orig
+        ctx._enqueue = counting_enqueue
+
+    def _unhook_payload(self):
+        if self._ctx is not None:
+            self._ctx._enqueue = self._orig_enqueue
+            self._ctx = None
+
+    def mark(self, name):
+        """End the running section and start ``name``"""
+        now = time.perf_counter()
+        self.sections[self._current] = self.sections.get(self._current, 0.0) + (now - self._t) * 1000
+        self._current = name
+        self._t = now
+
+    def set_page(self, page):
+        self.page = page
+
+    @property
+    def finished(self):
+        return self._finished
+
+    def finish(self):
+        """Close the last section and store the record (idempotent)"""
+        if self._finished:
+            return
+        self._finished = True
+        try:
+            self.mark(None)
+            self.sections.pop(None, None)
+            self.profiler.record({
+                "ts": self.started,
+                "page": self.page,
+                "total_ms": round((self._t - self._t0) * 1000, 3),
+                "sections_ms": {k: round(v, 3) for k, v in self.sections.items()},
+                "payload_bytes": dict(self.payload),
+                "peak_rss_kb": peak_rss_kb(),
+            })
+        finally:
+            # The session's context outlives this rerun: always hand back the
+            # original _enqueue
+            self._unhook_payload()
+
+
+class Profiler:
+    """Process-wide ring buffer of rerun records"""
+
+    def __init__(self, size=RING_SIZE):
+        self._records = deque(maxlen=size)
+        # section -> [reruns, total ms] since start/clear(), unlike the ring
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def start(self, page=None):
+        return RerunTrace(self, page)
+
+    def record(self, rec):
+        with self._lock:
+            self._records.append(rec)
+            times = dict(rec["sections_ms"], total=rec["total_ms"])
+            for name, ms in times.items():
+                entry = self._totals.setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += ms
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._totals.clear()
+
+    def summary(self):
+        """Per-section count, percentiles and max of time and payload.
+
+        Returns a list of dicts sorted by p90 time, slowest first; the
+        "total" row covers whole reruns.
+        """
+        samples = {}
+        for rec in self.records():
+            samples.setdefault("total", ([], []))[0].append(rec["total_ms"])
+            samples["total"][1].append(sum(rec["payload_bytes"].values()))
+            for name, ms in rec["sections_ms"].items():
+                entry = samples.setdefault(name, ([], []))
+                entry[0].append(ms)
+                entry[1].append(rec["payload_bytes"].get(name, 0))
+        rows = []
+        for name, (times, sizes) in samples.items():
+            row = {"section": name, "count": len(times)}
+            for p in PERCENTILES:
+                row["p%d_ms" % p] = round(_percentile(times, p), 3)
+            row["max_ms"] = round(max(times), 3)
+            row["p50_bytes"] = int(_percentile(sizes, 50))
+            row["max_bytes"] = max(sizes)
+            rows.append(row)
+        rows.sort(key=lambda r: -r["p90_ms"])
+        return rows
+
+    def totals(self):
+        """section -> (reruns, total ms) since the profiler started or was cleared"""
+        with self._lock:
+            return {name: tuple(entry) for name, entry in self._totals.items()}
+
+    def to_json(self):
+        return json.dumps({"summary": self.summary(), "records": self.records()}, indent=2)
+
+    def to_prometheus(self, prefix="dashboard_rerun"):
+        """Prometheus text exposition of the per-section summaries.
+
+        Quantiles cover the reruns in the ring buffer; _sum and _count are
+        running totals since the profiler started, as Prometheus expects.
+        """
+        totals = self.totals()
+        lines = [
+            "# HELP %s_section_seconds Time spent per dashboard section per rerun." % prefix,
+            "# TYPE %s_section_seconds summary" % prefix,
+        ]
+        payload_lines = [
+            "# HELP %s_section_payload_bytes Bytes sent to the browser per section per rerun (p50)." % prefix,
+            "# TYPE %s_section_payload_bytes gauge" % prefix,
+        ]
+        for row in self.summary():
+            label = 'section="%s"' % row["section"].replace('"', '\\"')
+            for p in PERCENTILES:
+                lines.append('%s_section_seconds{%s,quantile="%s"} %.6f' % (prefix, label, p / 100, row["p%d_ms" % p] / 1000))
+            count, total_ms = totals.get(row["section"], (row["count"], 0.0))
+            lines.append("%s_section_seconds_sum{%s} %.6f" % (prefix, label, total_ms / 1000))
+            lines.append("%s_section_seconds_count{%s} %d" % (prefix, label, count))
+            payload_lines.append("%s_section_payload_bytes{%s} %d" % (prefix, label, row["p50_bytes"]))
+        rss = peak_rss_kb()
+        if rss is not None:
+            lines += [
+                "# HELP %s_process_max_rss_bytes Peak resident set size of the app process since it started (ru_maxrss; never decreases)." % prefix,
+                "# TYPE %s_process_max_rss_bytes gauge" % prefix,
+                "%s_process_max_rss_bytes %d" % (prefix, rss * 1024),
+            ]
+        return "\n".join(lines + payload_lines) + "\n"
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # Nearest-rank percentile
+    rank = max(1, int(math.ceil(p / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+# Shared by every session of this process
+profiler = Profiler()
@@ -0,0 +1,193 @@
+# projection.py - 2-D embedding of the engagement feature space
+# ------------------------------------------------------------
+# Students are projected onto the first two principal components of the
+# standardized Played/Paused/Likes/Segment features, optionally with the
+# CW1/CW2/ESE/CGPA grade bands encoded by their ordinal position. The
+# projection is a NumPy SVD of the whole matrix; for large cohorts the
+# randomized variant fits the components on a random subset of rows (the
+# matrix has only a handful of columns, so N is what costs) and projects every
+# row with one matrix product. Embeddings are memoized on the Dataset, so each
+# file version is projected once.
+#
+# A million points would make any browser chart crawl, so the scatter is fed a
+# density-based sample: points are binned on a grid per cluster and each cell
+# keeps at most as many points as the budget allows. Dense cores are thinned,
+# while sparse regions and outliers are kept whole.
+import numpy as np
+import pandas as pd
+
+from clustering import standardize
+
+# Ordinal grade columns that can be added to the engagement features
+GRADE_FEATURES = ["CW1", "CW2", "ESE", "CGPA"]
+
+METHODS = ("auto", "svd", "randomized")
+# "auto" switches to the randomized solver from this many rows
+RANDOMIZED_MIN_ROWS = 200000
+# Rows the randomized solver fits the components on
+RANDOMIZED_SAMPLE = 50000
+
+MAX_POINTS = 30000
+GRID_BINS = 128
+
+
+# ------------------------------------------------------------
+# Feature matrix
+# ------------------------------------------------------------
+def ordinal_codes(series, fill_missing=True):
+    """Float codes of an ordered categorical (0 = lowest level).
+
+    Missing values get the median code, or stay NaN with ``fill_missing=False``.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy().astype(np.float64)
+        codes[codes < 0] = np.nan
+    else:
+        codes = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64)
+    if fill_missing and np.isnan(codes).any():
+        fill = np.nanmedian(codes) if not np.isnan(codes).all() else 0.0
+        codes[np.isnan(codes)] = fill
+    return codes
+
+
+def feature_matrix(data, grades=False):
+    """Return (standardized matrix, column names) of ``data``; memoized per version"""
+    def build(d):
+        cols = list(d.feature_cols)
+        blocks = [d.df[cols].to_numpy(dtype=np.float64)] if cols else []
+        if grades:
+            for col in GRADE_FEATURES:
+                if col in d.df.columns:
+                    cols.append(col)
+                    blocks.append(ordinal_codes(d.df[col])[:, None])
+        if not cols:
+            raise ValueError("No engagement features available to project.")
+        Z, _, _ = standardize(np.hstack(blocks))
+        return Z, cols
+
+    return data.memo(("feature_matrix", grades), build)
+
+
+# ------------------------------------------------------------
+# PCA
+# ------------------------------------------------------------
+def _flip_signs(components):
+    # The sign of a singular vector is arbitrary; make the largest loading
+    # positive so embeddings do not mirror between runs or solvers
+    signs = np.sign(components[np.arange(len(components)), np.abs(components).argmax(axis=1)])
+    signs[signs == 0] = 1.0
+    return components * signs[:, None]
+
+
+def pca_svd(Z, n_components=2):
+    """(components, explained variance ratios) of centred ``Z`` from the exact thin SVD"""
+    _, s, vt = np.linalg.svd(Z, full_matrices=False)
+    var = s ** 2
+    return vt[:n_components], var[:n_components] / (var.sum() or 1.0)
+
+
+def pca_randomized(Z, n_components=2, sample_rows=RANDOMIZED_SAMPLE, seed=0):
+    """(components, explained variance ratios) of centred ``Z`` fitted on a random row sample"""
+    if len(Z) > sample_rows:
+        rows = np.random.default_rng(seed).choice(len(Z), size=sample_rows, replace=False)
+        Z = Z[np.sort(rows)]
+    return pca_svd(Z, n_components)
+
+
+class Embedding:
+    """2-D coordinates of every row plus the projection that produced them"""
+
+    def __init__(self, coords, components, explained, columns, method):
+        self.coords = coords
+        self.components = components
+        self.explained = explained
+        self.columns = columns
+        self.method = method
+
+    def loadings(self):
+        """Feature x component table of the projection weights"""
+        return pd.DataFrame(self.components.T, index=self.columns, columns=["PC1", "PC2"][:len(self.components)])
+
+
+def compute_embedding(Z, columns, method="auto", seed=0):
+    if method not in METHODS:
+        raise ValueError("Unknown projection method %r (expected one of %s)" % (method, ", ".join(METHODS)))
+    if method == "auto":
+        method = "randomized" if len(Z) >= RANDOMIZED_MIN_ROWS else "svd"
+    n_components = min(2, Z.shape[1])
+    if method == "randomized":
+        components, explained = pca_randomized(Z, n_components, seed=seed)
+    else:
+        components, explained = pca_svd(Z, n_components)
+    components = _flip_signs(components)
+    coords = (Z @ components.T).astype(np.float32)
+    if n_components < 2:
+        coords = np.hstack([coords, np.zeros((len(Z), 1), dtype=np.float32)])
+    return Embedding(coords, components, explained, columns, method)
+
+
+def get_embedding(data, grades=False, method="auto"):
+    """Return the Embedding of ``data``, computed once per version and options"""
+    def build(d):
+        Z, columns = feature_matrix(d, grades)
+        return compute_embedding(Z, columns, method)
+
+    return data.memo(("embedding", grades, method), build)
+
+
+# ------------------------------------------------------------
+# Density-based downsampling
+# ------------------------------------------------------------
+def density_sample(coords, groups, max_points=MAX_POINTS, bins=GRID_BINS, seed=0):
+    """Row positions of at most ``max_points`` points, thinning dense grid cells first.
+
+    Points are binned on a ``bins`` x ``bins`` grid separately for each value
+    of ``groups`` (integer codes), so a small cluster inside a large one keeps
+    its points. Every cell keeps up to the same number of points, the largest
+    number that fits the budget; the kept points are a random subset. With
+    more occupied cells than the budget, one point per cell is kept and those
+    are sampled uniformly.
+    """
+    n = len(coords)
+    if n <= max_points:
+        return np.arange(n)
+    lo = coords.min(axis=0)
+    span = coords.max(axis=0) - lo
+    span[span == 0] = 1.0
+    cell = np.minimum(((coords - lo) / span * bins).astype(np.int64), bins - 1)
+    key = (groups.astype(np.int64) * bins + cell[:, 0]) * bins + cell[:, 1]
+
+    # Cap per cell: the largest c with sum(min(count, c)) <= max_points
+    _, inverse, counts = np.unique(key, return_inverse=True, return_counts=True)
+    sizes = np.sort(counts)
+    kept_below = np.concatenate([[0], np.cumsum(sizes)])
+    lo_cap, hi_cap = 1, int(sizes[-1])
+    while lo_cap < hi_cap:
+        cap = (lo_cap + hi_cap + 1) // 2
+        i = np.searchsorted(sizes, cap)
+        if kept_below[i] + cap * (len(sizes) - i) <= max_points:
+            lo_cap = cap
+        else:
+            hi_cap = cap - 1
+
+    # Rank of every point within its cell, in random order
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(n)
+    order = order[np.argsort(inverse[order], kind="stable")]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(n) - np.repeat(starts, counts)
+    keep = order[rank < lo_cap]
+    if len(keep) > max_points:
+        keep = rng.choice(keep, size=max_points, replace=False)
+    return np.sort(keep)
+
+
+def get_embedding_sample(data, grades=False, max_points=MAX_POINTS):
+    """(Embedding, sampled row positions) for the cluster map; memoized per version"""
+    embedding = get_embedding(data, grades)
+
+    def build(d):
+        codes, _ = pd.factorize(d.df[d.cluster_col])
+        return density_sample(embedding.coords, codes, max_points)
+
+    return embedding, data.memo(("embedding_sample", grades, max_points), build)
@@ -0,0 +1,67 @@
+# recommendations.py - Cluster personas and educator recommendations
+# ------------------------------------------------------------
+import re
+
+# Recommendations
+RECOMMENDATIONS = {
+    "The Enthusiasts": [
+        "Offer advanced readings or enrichment activities.",
+        "Invite them as peer mentors or group leaders.",
+        "Give formative challenges to keep them engaged."
+    ],
+    "The Steady Learners": [
+        "Give regular reminders and short recaps.",
+        "Provide practice quizzes and worked examples.",
+        "Encourage participation with low-stakes interactions."
+    ],
+    "The Silent Observers": [
+        "Add interactive polls and tiny quizzes during videos.",
+        "Use prompts or reflective questions to elicit responses.",
+        "Reach out with personalized, friendly nudges."
+    ],
+    "The Disengaged": [
+        "Provide very short, simplified materials and quick wins.",
+        "Offer targeted outreach (office hours, mentorship).",
+        "Consider adaptive content paths and scaffolded tasks."
+    ]
+}
+
+# Display labels and descriptions, as written by the offline clustering step
+PERSONA_LABELS = {
+    "The Enthusiasts": "⭐ The Enthusiasts",
+    "The Steady Learners": "📚 The Steady Learners",
+    "The Silent Observers": "👻 The Silent Observers",
+    "The Disengaged": "❌ The Disengaged",
+}
+
+PERSONA_DESCRIPTIONS = {
+    "The Enthusiasts": "Highly active across all content – they watch, pause to reflect, like content, and explore many segments. The ideal learners!",
+    "The Steady Learners": "Moderate engagement – they interact consistently but not intensely. They’re balanced and reliable.",
+    "The Silent Observers": "Present, but almost invisible – low likes and segment engagement. They view but rarely interact.",
+    "The Disengaged": "Barely active – minimal interaction across the board. Need targeted intervention or re-engagement.",
+}
+
+
+def map_cluster_label(label):
+    """Map cluster labels to recommendation keys, handling emojis and variations"""
+    if not label or label == "All":
+        return None
+
+    clean_label = re.sub(r'[^\w\s]', '', str(label)).strip().lower()
+
+    if "enthusiast" in clean_label:
+        return "The Enthusiasts"
+    elif "steady" in clean_label or "learner" in clean_label:
+        return "The Steady Learners"
+    elif "silent" in clean_label or "observer" in clean_label:
+        return "The Silent Observers"
+    elif "disengaged" in clean_label:
+        return "The Disengaged"
+
+    # Fallback: try partial matching with recommendation keys
+    for key in RECOMMENDATIONS.keys():
+        key_clean = re.sub(r'[^\w\s]', '', key).strip().lower()
+        if key_clean in clean_label or clean_label in key_clean:
+            return key
+
+    return None
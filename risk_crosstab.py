@@ -0,0 +1,95 @@
+# risk_crosstab.py - Per-cluster contingency cube of risk flags and outcomes
+# ------------------------------------------------------------
+# Counts every value of Probation, HighRisk, TermExceeded, AtRisk, AtRiskSSC,
+# PlagiarismHistory and Result within each cluster (and overall). Each column
+# is one bincount over (cluster code, value code) pairs, computed once per
+# data version; the dashboard's heatmap and tables only read the result.
+import numpy as np
+import pandas as pd
+
+from aggregates import OVERALL
+
+RISK_COLUMNS = ["Probation", "HighRisk", "TermExceeded", "AtRisk", "AtRiskSSC", "PlagiarismHistory", "Result"]
+
+# Values that count as "flagged" for the heatmap
+FLAGGED_VALUES = {
+    "Probation": ["Yes"],
+    "HighRisk": ["Yes"],
+    "TermExceeded": ["Yes"],
+    "AtRisk": ["Yes"],
+    "AtRiskSSC": ["Yes"],
+    "PlagiarismHistory": ["Medium", "High"],
+    "Result": ["Fail"],
+}
+
+
+class RiskCube:
+    """Counts of every (column, value) per cluster, plus an ``OVERALL`` row.
+
+    ``counts`` is indexed by cluster label and has ``(column, value)``
+    columns; ``sizes`` holds the number of students in each row's group.
+    """
+
+    def __init__(self, counts, sizes, cluster_col):
+        self.counts = counts
+        self.sizes = sizes
+        self.cluster_col = cluster_col
+
+    @property
+    def columns(self):
+        return list(dict.fromkeys(self.counts.columns.get_level_values(0)))
+
+    def rates(self):
+        """Share (0-100) of each group's students having each value"""
+        return (self.counts.div(self.sizes.replace(0, np.nan), axis=0) * 100).round(1)
+
+    def flag_rates(self):
+        """Groups x columns frame of the % of students flagged (see FLAGGED_VALUES)"""
+        rates = {}
+        for col in self.columns:
+            values = [v for v in FLAGGED_VALUES.get(col, []) if (col, v) in self.counts.columns]
+            flagged = self.counts[[(col, v) for v in values]].sum(axis=1) if values else self.sizes * 0
+            rates[col] = flagged / self.sizes.replace(0, np.nan) * 100
+        frame = pd.DataFrame(rates).round(1)
+        frame.index.name = self.cluster_col
+        return frame
+
+    def table(self, col):
+        """Counts and rates of ``col``'s values per group, for display"""
+        counts = self.counts[col]
+        rates = self.rates()[col]
+        out = pd.concat({"Students": counts, "%": rates}, axis=1).swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+        out.index.name = self.cluster_col
+        return out
+
+
+def build_risk_cube(data, columns=None):
+    """Build the RiskCube for a loaded Dataset"""
+    df = data.df
+    columns = [c for c in (columns or RISK_COLUMNS) if c in df.columns]
+    cluster_codes, clusters = pd.factorize(df[data.cluster_col], sort=True)
+    k = len(clusters)
+    valid = cluster_codes >= 0
+    index = pd.Index(list(clusters) + [OVERALL], dtype=object, name=data.cluster_col)
+
+    parts = {}
+    for col in columns:
+        codes, values = pd.factorize(df[col], sort=True)
+        m = len(values)
+        ok = valid & (codes >= 0)
+        flat = np.bincount(cluster_codes[ok] * m + codes[ok], minlength=k * m).reshape(k, m)
+        table = np.vstack([flat, flat.sum(axis=0)])
+        for j, value in enumerate(values):
+            parts[(col, value)] = table[:, j]
+
+    counts = pd.DataFrame(parts, index=index)
+    if parts:
+        counts.columns = pd.MultiIndex.from_tuples(counts.columns)
+    sizes = np.bincount(cluster_codes[valid], minlength=k)
+    sizes = pd.Series(np.append(sizes, sizes.sum()), index=index, name="Students")
+    return RiskCube(counts, sizes, data.cluster_col)
+
+
+def get_risk_cube(data):
+    """Return the RiskCube for ``data``, built at most once per data version"""
+    return data.memo("risk_cube", build_risk_cube)
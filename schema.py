@@ -0,0 +1,122 @@
+# schema.py - Column schema for the clustered student data
+# ------------------------------------------------------------
+# Every text column in the export is a small closed vocabulary (Yes/No, grade
+# bands, Low/Medium/High). Storing them as ordered categoricals keeps one byte
+# per row instead of one Python string, makes groupby/value_counts work on
+# integer codes, and lets grades be compared and sorted in their natural order.
+import warnings
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    TEXT_DTYPE = object
+
+# ------------------------------------------------------------
+# Ordered levels (lowest first)
+# ------------------------------------------------------------
+YES_NO = ["No", "Yes"]
+AMOUNT_LEVELS = ["Low", "Medium", "High"]
+GRADE_LEVELS = ["Fail", "Fair", "Adequate", "Good", "Very Good", "Excellent"]
+RATING_LEVELS = ["Poor", "Fair", "Adequate", "Good", "Very Good", "Excellent"]
+RESULT_LEVELS = ["Fail", "Pass"]
+
+ORDINAL_COLUMNS = {
+    "CGPA": RATING_LEVELS,
+    "AttemptCount": AMOUNT_LEVELS,
+    "RemoteStudent": YES_NO,
+    "Probation": YES_NO,
+    "HighRisk": YES_NO,
+    "TermExceeded": YES_NO,
+    "AtRisk": YES_NO,
+    "AtRiskSSC": YES_NO,
+    "OtherModules": AMOUNT_LEVELS,
+    "PlagiarismHistory": AMOUNT_LEVELS,
+    "CW1": GRADE_LEVELS,
+    "CW2": GRADE_LEVELS,
+    "ESE": GRADE_LEVELS,
+    "Online C": RATING_LEVELS,
+    "Online O": RATING_LEVELS,
+    "Result": RESULT_LEVELS,
+}
+
+# Unordered labels: stored as categoricals with sorted categories
+NOMINAL_COLUMNS = ["Cluster Name", "Cluster Description"]
+
+# Free text that is (nearly) unique per row
+TEXT_COLUMNS = ["ApplicantName", "Applicant Name"]
+
+INTEGER_COLUMNS = ["Played", "Paused", "Likes", "Segment", "Cluster"]
+
+DESCRIPTION_COL = "Cluster Description"
+CLUSTER_ID_COL = "Cluster"
+
+
+def csv_dtypes():
+    """dtype mapping for ``pd.read_csv`` so text columns are parsed straight into categoricals"""
+    dtypes = {col: "category" for col in list(ORDINAL_COLUMNS) + NOMINAL_COLUMNS}
+    dtypes.update({col: TEXT_DTYPE for col in TEXT_COLUMNS})
+    return dtypes
+
+
+def _to_ordered(s, levels):
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.astype("category")
+    unknown = [v for v in s.cat.categories if v not in levels]
+    if unknown:
+        # Codes are used as an ordinal scale downstream (projection, outcomes),
+        # so values outside the vocabulary become missing rather than break the order
+        warnings.warn("%s: %d row(s) with values outside %s treated as missing: %s"
+                      % (s.name, int(s.isin(unknown).sum()), levels, ", ".join(map(str, unknown))),
+                      stacklevel=3)
+    return s.cat.set_categories(levels, ordered=True)
+
+
+def apply_schema(df):
+    """Return ``df`` with declared dtypes applied to the columns it has"""
+    out = df.copy(deep=False)
+    for col, levels in ORDINAL_COLUMNS.items():
+        if col in out.columns:
+            out[col] = _to_ordered(out[col], levels)
+    for col in NOMINAL_COLUMNS:
+        if col in out.columns and not isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype("category")
+    for col in TEXT_COLUMNS:
+        if col in out.columns and out[col].dtype != TEXT_DTYPE:
+            out[col] = out[col].astype(TEXT_DTYPE)
+    for col in INTEGER_COLUMNS:
+        if col in out.columns and pd.api.types.is_integer_dtype(out[col].dtype):
+            out[col] = pd.to_numeric(out[col], downcast="integer")
+    return out
+
+
+# ------------------------------------------------------------
+# Cluster descriptions lookup
+# ------------------------------------------------------------
+def split_descriptions(df):
+    """Move the per-row cluster description into a lookup keyed by ``Cluster``.
+
+    Returns ``(frame_without_descriptions, descriptions)``; ``descriptions`` is
+    None when the frame has no description or cluster id column.
+    """
+    if DESCRIPTION_COL not in df.columns or CLUSTER_ID_COL not in df.columns:
+        return df, None
+    descriptions = (
+        df[[CLUSTER_ID_COL, DESCRIPTION_COL]]
+        .drop_duplicates(CLUSTER_ID_COL)
+        .set_index(CLUSTER_ID_COL)[DESCRIPTION_COL]
+        .astype(str)
+        .sort_index()
+    )
+    return df.drop(columns=[DESCRIPTION_COL]), descriptions
+
+
+def attach_descriptions(df, descriptions):
+    """Inverse of ``split_descriptions`` for exports that need the full row"""
+    if descriptions is None or CLUSTER_ID_COL not in df.columns:
+        return df
+    out = df.copy(deep=False)
+    out[DESCRIPTION_COL] = out[CLUSTER_ID_COL].map(descriptions)
+    return out
@@ -0,0 +1,229 @@
+# search_index.py - Student name search and attribute filter index
+# ------------------------------------------------------------
+# Built once per data version. Names are searchable by prefix (binary search
+# over the sorted, lower-cased names) or by substring (n-gram posting lists:
+# trigrams for longer queries, and unigrams/bigrams so the first keystrokes of
+# a search-as-you-type box are a lookup rather than a scan). Every value of
+# every categorical column has a packed bitmap, so a query such as cluster +
+# Probation=Yes + Result=Fail is a few bitwise ANDs over n/8 bytes instead of
+# repeated scans of the frame.
+import threading
+
+import numpy as np
+import pandas as pd
+
+from schema import ORDINAL_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+# Longest n-gram with posting lists; longer queries intersect their trigrams
+NGRAM = 3
+# Names encoded at a time when building postings (bounds the temporary arrays)
+POSTING_BLOCK_ROWS = 65536
+# Bits per code point in an n-gram key (Unicode stops below 2**21)
+CODE_BITS = 21
+
+
+def _bits_set(packed, n):
+    """Positions of the set bits of a packed bitmap, ascending.
+
+    Only the non-zero bytes are unpacked, so a selective filter costs about
+    one pass over n/8 bytes rather than over n booleans.
+    """
+    nonzero = np.flatnonzero(packed)
+    if len(nonzero) * 4 > len(packed):
+        return np.flatnonzero(np.unpackbits(packed, count=n))
+    byte, bit = np.nonzero(np.unpackbits(packed[nonzero]).reshape(-1, 8))
+    rows = nonzero[byte] * 8 + bit
+    return rows[rows < n]
+
+
+def _bits_get(packed, positions):
+    """Bitmap bits for ``positions`` without unpacking the whole bitmap"""
+    return (packed[positions >> 3] >> (7 - (positions & 7))) & 1
+
+
+def _gram_key(gram):
+    key = 0
+    for ch in gram:
+        key = (key << CODE_BITS) | ord(ch)
+    return key
+
+
+class NgramPostings:
+    """Rows (ascending) of the names containing each n-gram, built vectorized.
+
+    Names are encoded as fixed-width UTF-32 code points, every n-gram becomes
+    one int64 key, and one stable sort groups the (key, row) pairs.
+    """
+
+    def __init__(self, names, n, block_rows=POSTING_BLOCK_ROWS):
+        self.n = n
+        grams, rows = [], []
+        for start in range(0, len(names), block_rows):
+            block = np.asarray(names[start:start + block_rows], dtype=str)
+            width = block.dtype.itemsize // 4
+            if width < n:
+                continue
+            points = block.view(np.uint32).reshape(len(block), width).astype(np.int64)
+            key = np.zeros((len(block), width - n + 1), dtype=np.int64)
+            valid = np.ones(key.shape, dtype=bool)
+            for j in range(n):
+                part = points[:, j:width - n + 1 + j]
+                key = (key << CODE_BITS) | part
+                valid &= part != 0  # padding past the end of a shorter name
+            row = np.broadcast_to(np.arange(start, start + len(block))[:, None], key.shape)
+            grams.append(key[valid])
+            rows.append(row[valid])
+        grams = np.concatenate(grams) if grams else np.empty(0, dtype=np.int64)
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        # Pairs come in row order, so a stable sort keeps each posting list sorted
+        order = np.argsort(grams, kind="stable")
+        grams, rows = grams[order], rows[order]
+        first = np.ones(len(grams), dtype=bool)
+        first[1:] = (grams[1:] != grams[:-1]) | (rows[1:] != rows[:-1])
+        grams, self._rows = grams[first], rows[first]
+        self._keys, starts = np.unique(grams, return_index=True)
+        self._bounds = np.append(starts, len(grams))
+
+    def get(self, gram):
+        """Rows whose name contains ``gram`` (exactly ``n`` characters)"""
+        key = _gram_key(gram)
+        i = np.searchsorted(self._keys, key)
+        if i == len(self._keys) or self._keys[i] != key:
+            return np.empty(0, dtype=np.int64)
+        return self._rows[self._bounds[i]:self._bounds[i + 1]]
+
+
+class SearchIndex:
+    """Prefix/trigram name index plus per-value bitmaps for categorical columns"""
+
+    def __init__(self, data, columns=None):
+        df = data.df
+        self.n = len(df)
+        self.name_col = data.applicant_col
+
+        # Categorical columns: declared schema columns plus the cluster label
+        if columns is None:
+            columns = [c for c in ORDINAL_COLUMNS if c in df.columns] + [data.cluster_col]
+        self.bitmaps = {}
+        for col in columns:
+            codes, values = pd.factorize(df[col], sort=True)
+            by_value = {}
+            for i, value in enumerate(values):
+                by_value[value] = np.packbits(codes == i)
+            self.bitmaps[col] = by_value
+        self._all = np.packbits(np.ones(self.n, dtype=bool))
+
+        # Prefix index: lower-cased names in sorted order with their rows
+        if self.name_col is not None:
+            names = df[self.name_col].astype(str).str.lower().to_numpy(dtype=object)
+            self._names = names
+            # Candidates of long substring queries are checked in Arrow when available
+            self._arrow_names = pa.array(names, type=pa.string()) if pa is not None else None
+            self._name_order = np.argsort(names, kind="stable")
+            self._sorted_names = names[self._name_order]
+        else:
+            self._names = None
+        self._postings = {}
+        self._postings_lock = threading.Lock()
+
+    # ------------------------------------------------------------
+    # Names
+    # ------------------------------------------------------------
+    def prefix(self, text):
+        """Rows whose name starts with ``text`` (case-insensitive), in row order"""
+        if self._names is None:
+            return np.empty(0, dtype=np.int64)
+        text = text.lower()
+        lo = np.searchsorted(self._sorted_names, text, side="left")
+        hi = np.searchsorted(self._sorted_names, text + "\U0010ffff", side="left")
+        return np.sort(self._name_order[lo:hi])
+
+    def postings(self, n):
+        """NgramPostings of the names for n-grams of length ``n`` (built on first use)"""
+        found = self._postings.get(n)
+        if found is None:
+            with self._postings_lock:
+                found = self._postings.get(n)
+                if found is None:
+                    found = self._postings[n] = NgramPostings(self._names, n)
+        return found
+
+    def contains(self, text):
+        """Rows whose name contains ``text`` (case-insensitive), in row order.
+
+        Queries of up to NGRAM characters are one posting list lookup. Longer
+        ones intersect their trigrams' postings to get candidates, which are
+        then checked exactly. Postings are built on the first query needing them.
+        """
+        if self._names is None:
+            return np.empty(0, dtype=np.int64)
+        text = text.lower()
+        if not text:
+            return np.arange(self.n)
+        if len(text) <= NGRAM:
+            return self.postings(len(text)).get(text)
+        trigrams = self.postings(NGRAM)
+        grams = {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+        lists = sorted((trigrams.get(g) for g in grams), key=len)
+        candidates = lists[0]
+        for other in lists[1:]:
+            # A gram most names contain barely narrows the candidates; the exact
+            # check below removes what the skipped lists would have
+            if not len(candidates) or len(other) * 2 > self.n:
+                break
+            # Posting lists are sorted: keep the candidates found in ``other``
+            at = np.minimum(np.searchsorted(other, candidates), len(other) - 1)
+            candidates = candidates[other[at] == candidates] if len(other) else other
+        if self._arrow_names is not None:
+            keep = pc.match_substring(self._arrow_names.take(pa.array(candidates)), text)
+            return candidates[keep.to_numpy(zero_copy_only=False)]
+        names = self._names[candidates]
+        keep = np.fromiter((text in name for name in names), dtype=bool, count=len(names))
+        return candidates[keep]
+
+    # ------------------------------------------------------------
+    # Attribute filters
+    # ------------------------------------------------------------
+    def values(self, col):
+        return list(self.bitmaps.get(col, {}))
+
+    def mask(self, filters):
+        """Packed bitmap of rows matching every ``{column: value or [values]}``.
+
+        Several values for one column match any of them; an empty list (or
+        None) leaves the column unconstrained.
+        """
+        result = self._all
+        for col, wanted in filters.items():
+            if wanted is None:
+                continue
+            if not isinstance(wanted, (list, tuple, set)):
+                wanted = [wanted]
+            if not wanted:
+                continue
+            by_value = self.bitmaps[col]
+            either = np.zeros_like(self._all)
+            for value in wanted:
+                if value in by_value:
+                    either |= by_value[value]
+            result = result & either
+        return result
+
+    def query(self, filters=None, name=None, match="prefix"):
+        """Row positions (ascending) matching the name query and all filters"""
+        packed = self.mask(filters or {})
+        if name:
+            rows = self.contains(name) if match == "contains" else self.prefix(name)
+            return rows[_bits_get(packed, rows).astype(bool)]
+        return _bits_set(packed, self.n)
+
+
+def get_search_index(data):
+    """Return the SearchIndex for ``data``, built at most once per data version"""
+    return data.memo("search_index", SearchIndex)
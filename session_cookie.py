@@ -0,0 +1,131 @@
+# session_cookie.py - Keep the login session in an HttpOnly cookie
+# ------------------------------------------------------------
+# A Streamlit script talks to the browser over a websocket and cannot send
+# HTTP headers, so it cannot set an HttpOnly cookie itself. This module adds
+# two routes to the Tornado app that serves the dashboard:
+#
+#   POST <base>/_dashboard/session   body: one-time code -> session cookie
+#   POST <base>/_dashboard/logout    revokes the cookie's token and clears it
+#
+# After a login the script stores the token under a one-time code in the
+# shared session store (Authenticator.issue_code) and renders a zero-height
+# component that posts the code, never the token, to the first route. The
+# cookie is HttpOnly, Secure and SameSite=Strict: page scripts cannot read it,
+# and browsers only send it over HTTPS (or to http://localhost). On a reload,
+# or on another replica, the script reads it from st.context.cookies and
+# validates it against the secret and the session store.
+#
+# Streamlit does not expose its Tornado Application: it is looked up once per
+# process and the routes are added with Application.add_handlers. This matches
+# the version pinned in requirements.txt (streamlit==1.48.1); where no
+# Application exists (bare mode, AppTest) install() returns False and a login
+# lasts as long as the browser tab.
+import gc
+import json
+import re
+import threading
+import time
+
+import tornado.web
+
+COOKIE_NAME = "dashboard_session"
+SESSION_ROUTE = "_dashboard/session"
+LOGOUT_ROUTE = "_dashboard/logout"
+
+_installed = None
+_install_lock = threading.Lock()
+
+
+def base_path():
+    """URL path the app is served under, with leading and trailing slashes"""
+    try:
+        from streamlit import config
+        base = config.get_option("server.baseUrlPath").strip("/")
+    except ImportError:
+        base = ""
+    return "/%s/" % base if base else "/"
+
+
+def _cookie_options():
+    return {"path": base_path(), "httponly": True, "secure": True, "samesite": "Strict"}
+
+
+class _CookieHandler(tornado.web.RequestHandler):
+    def initialize(self, authenticator):
+        self.authenticator = authenticator
+
+    def check_xsrf_cookie(self):
+        # The one-time code (login) or the cookie itself (logout) is the proof;
+        # SameSite=Strict keeps other sites from sending the cookie
+        pass
+
+    def set_default_headers(self):
+        self.set_header("Cache-Control", "no-store")
+
+
+class SessionHandler(_CookieHandler):
+    """Trade a one-time login code for the session cookie"""
+
+    def post(self):
+        code = self.request.body.decode("ascii", "replace").strip()
+        token = self.authenticator.redeem_code(code)
+        session = self.authenticator.validate(token) if token else None
+        if session is None:
+            raise tornado.web.HTTPError(403)
+        max_age = max(0, int(session.expires - time.time()))
+        self.set_cookie(COOKIE_NAME, token, max_age=max_age, **_cookie_options())
+        self.set_status(204)
+
+
+class LogoutHandler(_CookieHandler):
+    """Revoke the cookie's session (on every replica) and delete the cookie"""
+
+    def post(self):
+        token = self.get_cookie(COOKIE_NAME)
+        if token:
+            self.authenticator.logout(token)
+        self.clear_cookie(COOKIE_NAME, **_cookie_options())
+        self.set_status(204)
+
+
+def routes(authenticator, base="/"):
+    args = {"authenticator": authenticator}
+    return [
+        (re.escape(base + SESSION_ROUTE), SessionHandler, args),
+        (re.escape(base + LOGOUT_ROUTE), LogoutHandler, args),
+    ]
+
+
+def _tornado_app():
+    for obj in gc.get_objects():
+        if isinstance(obj, tornado.web.Application):
+            return obj
+    return None
+
+
+def install(authenticator):
+    """Add the cookie routes to this process' Tornado app once; False if there is none"""
+    global _installed
+    with _install_lock:
+        if _installed is None:
+            app = _tornado_app()
+            if app is not None:
+                # Added rules are matched before Streamlit's catch-all static route
+                app.add_handlers(r".*$", routes(authenticator, base_path()))
+            _installed = app is not None
+        return _installed
+
+
+def _post_script(route, body=""):
+    return "<script>fetch(%s, {method: 'POST', body: %s, credentials: 'same-origin'});</script>" % (
+        json.dumps(base_path() + route), json.dumps(body))
+
+
+def login_script(code):
+    """Component HTML that stores the session cookie for ``code``"""
+    return _post_script(SESSION_ROUTE, code)
+
+
+def logout_script():
+    """Component HTML that revokes and deletes the session cookie"""
+    return _post_script(LOGOUT_ROUTE)
@@ -0,0 +1,117 @@
+# snapshot.py - Typed columnar snapshots of the student CSV
+# ------------------------------------------------------------
+# CSV parsing and object-dtype strings dominate startup time and memory on large
+# cohorts. A snapshot stores the same table in Parquet (or Feather) with text
+# columns dictionary-encoded and integer features narrowed to int8/int16, so it
+# loads several times faster and much smaller than the CSV it was made from.
+#
+# Usage:
+#   python snapshot.py clustered_students.csv              -> clustered_students.parquet
+#   python snapshot.py clustered_students.csv out.feather  -> Feather/Arrow IPC file
+import argparse
+import os
+
+import pandas as pd
+
+from schema import apply_schema
+
+try:
+    import pyarrow  # noqa: F401  (required by pandas' parquet/feather IO)
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+FEATHER_EXTENSIONS = (".feather", ".arrow")
+SNAPSHOT_EXTENSIONS = PARQUET_EXTENSIONS + FEATHER_EXTENSIONS
+
+# Text columns with at most this share of distinct values become categoricals;
+# near-unique columns such as ApplicantName stay plain strings.
+MAX_CATEGORY_RATIO = 0.5
+
+
+def is_snapshot(path):
+    return os.path.splitext(path)[1].lower() in SNAPSHOT_EXTENSIONS
+
+
+def snapshot_path_for(csv_path, ext=".parquet"):
+    """Return the snapshot file name that belongs next to ``csv_path``"""
+    return os.path.splitext(csv_path)[0] + ext
+
+
+def compact_frame(df):
+    """Return a copy of ``df`` with dictionary-encoded text and narrow integers.
+
+    Columns declared in schema.py get their ordered levels; any other text
+    column is dictionary-encoded if it is repetitive enough.
+    """
+    out = apply_schema(df)
+    n = max(len(out), 1)
+    for col in out.columns:
+        s = out[col]
+        if pd.api.types.is_integer_dtype(s.dtype):
+            out[col] = pd.to_numeric(s, downcast="integer")
+        elif pd.api.types.is_object_dtype(s.dtype):
+            if s.nunique(dropna=True) / n <= MAX_CATEGORY_RATIO:
+                out[col] = s.astype("category")
+    return out
+
+
+def write_snapshot(df, path):
+    """Write ``df`` as a compact Parquet or Feather file, chosen by extension"""
+    if not HAVE_PYARROW:
+        raise RuntimeError("Writing snapshots requires pyarrow (pip install pyarrow).")
+    df = compact_frame(df)
+    ext = os.path.splitext(path)[1].lower()
+    if ext in FEATHER_EXTENSIONS:
+        df.reset_index(drop=True).to_feather(path, compression="zstd")
+    else:
+        df.to_parquet(path, engine="pyarrow", index=False, compression="zstd")
+    return path
+
+
+def read_snapshot(path):
+    """Read a snapshot written by ``write_snapshot``; dtypes round-trip as stored"""
+    if not HAVE_PYARROW:
+        raise RuntimeError("Reading snapshots requires pyarrow (pip install pyarrow).")
+    ext = os.path.splitext(path)[1].lower()
+    if ext in FEATHER_EXTENSIONS:
+        return pd.read_feather(path)
+    return pd.read_parquet(path, engine="pyarrow")
+
+
+def convert(csv_path, out_path=None):
+    """Convert ``csv_path`` to a snapshot and return the snapshot path"""
+    out_path = out_path or snapshot_path_for(csv_path)
+    return write_snapshot(pd.read_csv(csv_path), out_path)
+
+
+def fresh_snapshot(csv_path):
+    """Return the snapshot to use instead of ``csv_path``, or None.
+
+    A snapshot is preferred when it exists and is at least as new as the CSV
+    (or the CSV is gone), so a re-exported CSV is never shadowed by a stale one.
+    """
+    if not HAVE_PYARROW or is_snapshot(csv_path):
+        return None
+    for ext in SNAPSHOT_EXTENSIONS:
+        candidate = snapshot_path_for(csv_path, ext)
+        if not os.path.exists(candidate):
+            continue
+        if not os.path.exists(csv_path) or os.path.getmtime(candidate) >= os.path.getmtime(csv_path):
+            return candidate
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the student CSV into a typed columnar snapshot.")
+    parser.add_argument("csv", help="input CSV file")
+    parser.add_argument("out", nargs="?", help="output .parquet or .feather file (default: next to the CSV)")
+    args = parser.parse_args(argv)
+
+    out = convert(args.csv, args.out)
+    print(f"Wrote {out} ({os.path.getsize(out):,} bytes, from {os.path.getsize(args.csv):,} bytes of CSV)")
+
+
+if __name__ == "__main__":
+    main()
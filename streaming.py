@@ -0,0 +1,266 @@
+# streaming.py - Incremental cluster assignment for live engagement events
+# ------------------------------------------------------------
+# Played/Paused/Likes/Segment in the export are snapshots, but in production
+# they grow as video events arrive. EngagementStream keeps every student's
+# feature vector, their nearest-centroid assignment and running per-cluster
+# sums, so a batch of events only touches the students it mentions. Centroids
+# are refitted from all students every ``refit_every`` events.
+#
+# Events are (student, feature, delta) triples, e.g. ("Student 7", "Likes", 1).
+# They can be pushed with apply_events() or appended to a CSV event log
+# (header: ApplicantName,Feature,Delta) that poll() tails.
+import io
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from aggregates import OVERALL, ClusterCube
+from clustering import assign, standardize
+
+EVENT_COLUMNS = ["ApplicantName", "Feature", "Delta"]
+
+
+class EngagementStream:
+    """Live per-student features, assignments and per-cluster aggregates.
+
+    Built from a loaded Dataset; its clusters (from the file or recomputed by
+    the engine) give the initial assignments and centroids.
+    """
+
+    def __init__(self, data, refit_every=10000, refit_iter=3):
+        if not data.feature_cols:
+            raise ValueError("No engagement features available to stream.")
+        df = data.df
+        self.data_version = data.version
+        self.cluster_col = data.cluster_col
+        self.feature_cols = list(data.feature_cols)
+        self.refit_every = refit_every
+        self.refit_iter = refit_iter
+
+        X = df[self.feature_cols].to_numpy(dtype=np.float64)
+        # The scaler stays fixed so refits and assignments share one space
+        _, self._mean, self._scale = standardize(X)
+
+        codes, names = pd.factorize(df[self.cluster_col], sort=True)
+        self.names = [str(n) for n in names]
+        k = len(self.names)
+
+        self._n = len(X)
+        self._X = X
+        self._labels = codes.astype(np.int32)
+        Z = self._z(X)
+        counts = np.bincount(self._labels, minlength=k)
+        self.centroids = np.zeros((k, len(self.feature_cols)))
+        for j in range(len(self.feature_cols)):
+            self.centroids[:, j] = np.bincount(self._labels, weights=Z[:, j], minlength=k)
+        self.centroids /= np.maximum(counts, 1)[:, None]
+
+        ids = df[data.applicant_col].astype(str) if data.applicant_col else pd.Series(df.index.astype(str))
+        self._rows = dict(zip(ids, range(self._n)))
+        # Memory of the id -> row entries (key strings and row ints), kept up to date
+        self._id_bytes = sum(sys.getsizeof(sid) for sid in self._rows) + self._n * sys.getsizeof(self._n)
+        self._feature_index = {f: i for i, f in enumerate(self.feature_cols)}
+
+        self.n_events = 0
+        self.n_refits = 0
+        self._since_refit = 0
+        self._log_offset = 0
+        self._lock = threading.Lock()
+        # Held for a whole poll(); apply_events() takes _lock inside it
+        self._poll_lock = threading.Lock()
+        self._recount()
+
+    # ------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------
+    def _z(self, X):
+        return (X - self._mean) / self._scale
+
+    def _recount(self):
+        """Rebuild the running aggregates from all students"""
+        k = len(self.names)
+        X = self._X[:self._n]
+        labels = self._labels[:self._n]
+        self._counts = np.bincount(labels, minlength=k).astype(np.float64)
+        self._sums = np.zeros((k, X.shape[1]))
+        self._sumsq = np.zeros((k, X.shape[1]))
+        for j in range(X.shape[1]):
+            self._sums[:, j] = np.bincount(labels, weights=X[:, j], minlength=k)
+            self._sumsq[:, j] = np.bincount(labels, weights=X[:, j] ** 2, minlength=k)
+
+    def _accumulate(self, labels, X, sign):
+        k = len(self.names)
+        self._counts += sign * np.bincount(labels, minlength=k)
+        for j in range(X.shape[1]):
+            self._sums[:, j] += sign * np.bincount(labels, weights=X[:, j], minlength=k)
+            self._sumsq[:, j] += sign * np.bincount(labels, weights=X[:, j] ** 2, minlength=k)
+
+    def _row_ids(self, students):
+        """Map student ids to rows, appending rows for students not seen before"""
+        rows = np.empty(len(students), dtype=np.int64)
+        new = 0
+        for i, sid in enumerate(students):
+            row = self._rows.get(sid)
+            if row is None:
+                row = self._rows[sid] = self._n + new
+                self._id_bytes += sys.getsizeof(sid) + sys.getsizeof(row)
+                new += 1
+            rows[i] = row
+        if new:
+            need = self._n + new
+            if need > len(self._X):
+                cap = max(need, 2 * len(self._X))
+                self._X = np.concatenate([self._X, np.zeros((cap - len(self._X), self._X.shape[1]))])
+                self._labels = np.concatenate([self._labels, np.full(cap - len(self._labels), -1, dtype=np.int32)])
+            self._labels[self._n:need] = -1
+            self._n = need
+        return rows
+
+    # ------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------
+    def apply_events(self, students, features, deltas):
+        """Apply a batch of events; returns the number of events applied.
+
+        Only the students named in the batch are re-assigned and only their
+        old and new contributions are moved between the cluster aggregates.
+        Events for unknown features are ignored.
+        """
+        fidx = np.array([self._feature_index.get(f, -1) for f in features], dtype=np.int64)
+        keep = fidx >= 0
+        if not keep.any():
+            return 0
+        students = [s for s, k in zip(students, keep) if k]
+        fidx = fidx[keep]
+        deltas = np.asarray(deltas, dtype=np.float64)[keep]
+
+        with self._lock:
+            rows = self._row_ids([str(s) for s in students])
+            touched = np.unique(rows)
+            old_labels = self._labels[touched]
+            known = old_labels >= 0
+            self._accumulate(old_labels[known], self._X[touched[known]], -1)
+
+            np.add.at(self._X, (rows, fidx), deltas)
+
+            X_new = self._X[touched]
+            new_labels, _ = assign(self._z(X_new), self.centroids)
+            self._labels[touched] = new_labels
+            self._accumulate(new_labels, X_new, +1)
+
+            self.n_events += len(rows)
+            self._since_refit += len(rows)
+            if self.refit_every and self._since_refit >= self.refit_every:
+                self._refit()
+        return len(rows)
+
+    def _refit(self):
+        # Warm-started Lloyd iterations: centroid ids (and names) stay put
+        Z = self._z(self._X[:self._n])
+        k = len(self.names)
+        for _ in range(self.refit_iter):
+            labels, _ = assign(Z, self.centroids)
+            counts = np.bincount(labels, minlength=k)
+            for j in range(Z.shape[1]):
+                sums = np.bincount(labels, weights=Z[:, j], minlength=k)
+                filled = counts > 0
+                self.centroids[filled, j] = sums[filled] / counts[filled]
+        self._labels[:self._n], _ = assign(Z, self.centroids)
+        self._recount()
+        self._since_refit = 0
+        self.n_refits += 1
+
+    def refit(self):
+        """Refit centroids on all students now and rebuild the aggregates"""
+        with self._lock:
+            self._refit()
+
+    def poll(self, path):
+        """Apply events appended to the CSV event log at ``path`` since the last poll.
+
+        Polls are serialized from reading the offset to applying the events,
+        so overlapping calls never apply the same lines twice.
+        """
+        with self._poll_lock:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                return 0
+            if size < self._log_offset:
+                # The log was rotated or truncated: start again from the top
+                self._log_offset = 0
+            start = self._log_offset
+            if size == start:
+                return 0
+            with open(path, "rb") as f:
+                f.seek(start)
+                chunk = f.read(size - start)
+            # Only consume complete lines; a partly written line is read next time
+            end = chunk.rfind(b"\n") + 1
+            if end == 0:
+                return 0
+            chunk = chunk[:end]
+            self._log_offset = start + end
+            events = pd.read_csv(io.BytesIO(chunk), header=None, names=EVENT_COLUMNS, skip_blank_lines=True)
+            if start == 0 and len(events) and str(events.iloc[0, 0]) == EVENT_COLUMNS[0]:
+                events = events.iloc[1:]
+            events = events.dropna()
+            if events.empty:
+                return 0
+            return self.apply_events(events["ApplicantName"].astype(str).tolist(),
+                                     events["Feature"].astype(str).tolist(),
+                                     pd.to_numeric(events["Delta"], errors="coerce").fillna(0).to_numpy())
+
+    @property
+    def nbytes(self):
+        """Memory held by the live state; it grows as new students appear"""
+        with self._lock:
+            arrays = (self._X, self._labels, self.centroids, self._counts, self._sums, self._sumsq)
+            return sum(a.nbytes for a in arrays) + sys.getsizeof(self._rows) + self._id_bytes
+
+    def labels(self):
+        """Current cluster name for every student, indexed by student id"""
+        with self._lock:
+            ids = sorted(self._rows, key=self._rows.get)
+            names = np.asarray(self.names, dtype=object)[self._labels[:self._n]]
+        return pd.Series(names, index=ids, name=self.cluster_col)
+
+    def to_cube(self):
+        """Current aggregates as a ClusterCube (count, pct, sum, mean, std).
+
+        Quantiles cannot be maintained incrementally and are not included.
+        """
+        with self._lock:
+            counts = self._counts.copy()
+            sums = self._sums.copy()
+            sumsq = self._sumsq.copy()
+        counts = np.vstack([counts[:, None], [[counts.sum()]]])[:, 0]
+        sums = np.vstack([sums, sums.sum(axis=0)])
+        sumsq = np.vstack([sumsq, sumsq.sum(axis=0)])
+
+        n = np.maximum(counts, 1)[:, None]
+        mean = sums / n
+        var = (sumsq - n * mean ** 2) / np.maximum(n - 1, 1)
+        std = np.sqrt(np.maximum(var, 0))
+
+        index = pd.Index(self.names + [OVERALL], dtype=object, name=self.cluster_col)
+        total = counts[-1] or 1
+        parts = {
+            ("count", ""): pd.Series(counts, index=index),
+            ("pct", ""): pd.Series((counts / total * 100).round(1), index=index),
+        }
+        for stat, values in (("sum", sums), ("mean", mean), ("std", std)):
+            for j, f in enumerate(self.feature_cols):
+                parts[(stat, f)] = pd.Series(values[:, j], index=index)
+        table = pd.DataFrame(parts)
+        table.columns = pd.MultiIndex.from_tuples(table.columns)
+        return ClusterCube(table, self.cluster_col, self.feature_cols,
+                           "%s+live%d" % (self.data_version, self.n_events))
+
+
+def get_stream(data):
+    """Return the EngagementStream for ``data``, created once per data version"""
+    return data.memo("engagement_stream", EngagementStream)
@@ -0,0 +1,93 @@
+# table_view.py - Paginated, sortable views over the cached student frame
+# ------------------------------------------------------------
+# The explorer used to copy the selected cluster out of the frame and send the
+# whole thing to the browser. Instead, each cluster and sort order is kept as
+# an array of row positions (computed once per data version), and only the
+# rows of the visible page are materialized with ``iloc``.
+import numpy as np
+import pandas as pd
+
+ALL = "All"
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def _cluster_positions(data):
+    codes, names = pd.factorize(data.df[data.cluster_col], sort=True)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+    return {name: order[bounds[i]:bounds[i + 1]] for i, name in enumerate(names)}
+
+
+def cluster_positions(data, selected=ALL):
+    """Row positions of the students in ``selected`` (every row for "All")"""
+    if selected == ALL:
+        return data.memo("positions:all", lambda d: np.arange(d.total_students))
+    by_cluster = data.memo("positions:clusters", _cluster_positions)
+    return by_cluster.get(selected, np.empty(0, dtype=np.int64))
+
+
+def _sort_key(s):
+    # Ordered categoricals sort by level (Fail < ... < Excellent), not by text
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy()
+    return s.to_numpy()
+
+
+def _descending_key(key):
+    """Key whose ascending stable sort is ``key`` descending with ties in file order"""
+    if key.dtype.kind in "iub":
+        return -key.astype(np.int64)
+    if key.dtype.kind == "f":
+        return -key
+    # Text and other values: negate their sorted rank (missing values last)
+    codes, _ = pd.factorize(key, sort=True)
+    return np.where(codes < 0, 1, -codes)
+
+
+def sorted_positions(data, selected=ALL, sort_col=None, ascending=True, positions=None):
+    """Row positions of ``selected`` ordered by ``sort_col``.
+
+    The full-column sort is computed once per (column, direction) and each
+    cluster's order is filtered out of it, so sorting never copies the frame.
+    ``positions`` (e.g. a search result) replaces ``selected``; such ad-hoc
+    selections are filtered on every call instead of being cached.
+    """
+    if positions is None:
+        positions = cluster_positions(data, selected)
+        cache = True
+    else:
+        cache = False
+    if not sort_col or sort_col not in data.df.columns:
+        return positions
+
+    def build_order(d):
+        key = _sort_key(d.df[sort_col])
+        # Stable in both directions: tied rows stay in file order
+        return np.argsort(key if ascending else _descending_key(key), kind="stable")
+
+    def build_selected(d):
+        order = d.memo(("sort", sort_col, ascending), build_order)
+        if cache and selected == ALL:
+            return order
+        mask = np.zeros(d.total_students, dtype=bool)
+        mask[positions] = True
+        return order[mask[order]]
+
+    if not cache:
+        return build_selected(data)
+    return data.memo(("sort", selected, sort_col, ascending), build_selected)
+
+
+def page_count(n_rows, page_size):
+    return max(1, -(-n_rows // page_size))
+
+
+def page_frame(df, positions, page=1, page_size=PAGE_SIZES[0], columns=None):
+    """Materialize one page (1-based) of ``positions`` from ``df``"""
+    page = min(max(1, page), page_count(len(positions), page_size))
+    start = (page - 1) * page_size
+    rows = positions[start:start + page_size]
+    if columns is None:
+        return df.iloc[rows]
+    # Select rows and columns in one step; df[columns] would copy whole columns
+    return df.iloc[rows, df.columns.get_indexer(columns)]
@@ -0,0 +1,40 @@
+# conftest.py - Make the dashboard modules importable and build small cohorts
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import Dataset  # noqa: E402
+from schema import GRADE_LEVELS, RESULT_LEVELS, apply_schema  # noqa: E402
+
+
+def cohort_frame(n=200, seed=0, k=3):
+    """Synthetic export: ``k`` engagement blobs, grades and a Result per student"""
+    rng = np.random.default_rng(seed)
+    cluster = rng.integers(0, k, size=n)
+    centers = rng.uniform(0, 40, size=(k, 4))
+    features = np.clip(np.rint(centers[cluster] + rng.normal(0, 2, size=(n, 4))), 0, None).astype(np.int64)
+    df = pd.DataFrame(features, columns=["Played", "Paused", "Likes", "Segment"])
+    df.insert(0, "ApplicantName", ["Student %d" % i for i in range(n)])
+    df["Cluster"] = cluster
+    for col in ("CW1", "CW2", "ESE"):
+        df[col] = rng.choice(GRADE_LEVELS, size=n)
+    df["Result"] = rng.choice(RESULT_LEVELS, size=n)
+    return apply_schema(df)
+
+
+@pytest.fixture
+def make_dataset():
+    """Factory for Datasets over cohort_frame(); every call gets its own version"""
+    made = []
+
+    def make(n=200, seed=0, k=3, df=None, path="students.csv"):
+        frame = cohort_frame(n, seed, k) if df is None else df
+        made.append(frame)
+        return Dataset(path, (path, len(made), seed), frame)
+
+    return make
@@ -0,0 +1,115 @@
+# test_api.py - Token checks and conditional requests of the JSON API
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import api
+
+TOKEN = "s3cret"
+
+
+@pytest.fixture(autouse=True)
+def dataset(make_dataset, monkeypatch):
+    """Serve one cohort, "c", whose Dataset the test can swap"""
+    current = {"data": make_dataset(n=300)}
+    monkeypatch.setattr(api, "discover_cohorts", lambda: {"c": "students.csv"})
+    monkeypatch.setattr(api, "load_dataset", lambda path: current["data"])
+    return current
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = api.make_server("127.0.0.1", 0)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%d" % srv.server_address[1]
+    srv.shutdown()
+    srv.server_close()
+
+
+def get(base, path, token=None, etag=None, method="GET"):
+    req = urllib.request.Request(base + path, method=method)
+    if token is not None:
+        req.add_header("Authorization", "Bearer " + token)
+    if etag is not None:
+        req.add_header("If-None-Match", etag)
+    try:
+        with urllib.request.urlopen(req) as r:
+            return r.status, r.headers, r.read()
+    except urllib.error.HTTPError as e:
+        with e:
+            return e.code, e.headers, e.read()
+
+
+def test_students_disabled_without_configured_token(server, monkeypatch):
+    monkeypatch.setattr(api, "API_TOKEN", None)
+    assert get(server, "/api/students")[0] == 403
+    assert get(server, "/api/students", token="anything")[0] == 403
+    assert get(server, "/api/clusters")[0] == 200
+
+
+@pytest.mark.parametrize("path", ["/api/students", "/api/clusters", "/api/means", "/api/cohorts"])
+def test_token_required_when_configured(server, monkeypatch, path):
+    monkeypatch.setattr(api, "API_TOKEN", TOKEN)
+    for token in (None, "", "wrong", TOKEN + "x", TOKEN[:-1]):
+        status, headers, body = get(server, path, token=token)
+        assert status == 401
+        assert "ETag" not in headers
+        assert json.loads(body) == {"error": "missing or invalid token"}
+    assert get(server, path, token=TOKEN)[0] == 200
+
+
+def test_bad_token_rejected_before_conditional_check(server, monkeypatch):
+    monkeypatch.setattr(api, "API_TOKEN", TOKEN)
+    etag = get(server, "/api/students", token=TOKEN)[1]["ETag"]
+    assert get(server, "/api/students", etag=etag)[0] == 401
+    assert get(server, "/api/students", token="wrong", etag=etag)[0] == 401
+
+
+def test_if_none_match_returns_304_without_building(server, monkeypatch):
+    monkeypatch.setattr(api, "API_TOKEN", None)
+    status, headers, body = get(server, "/api/clusters")
+    etag = headers["ETag"]
+    assert status == 200 and etag.startswith('"') and json.loads(body)["total_students"] == 300
+
+    def fail(data):
+        raise AssertionError("a 304 must not build the response")
+
+    monkeypatch.setattr(api, "get_cluster_cube", fail)
+    for sent in (etag, '"other", ' + etag, "%s,%s" % ('"x"', etag)):
+        status, headers, body = get(server, "/api/clusters", etag=sent)
+        assert status == 304
+        assert headers["ETag"] == etag
+        assert body == b""
+
+
+def test_etag_follows_query_and_data_version(server, dataset, make_dataset, monkeypatch):
+    monkeypatch.setattr(api, "API_TOKEN", TOKEN)
+    first = get(server, "/api/students?page=1", token=TOKEN)[1]["ETag"]
+    assert get(server, "/api/students?page=1", token=TOKEN)[1]["ETag"] == first
+    assert get(server, "/api/students?page=2", token=TOKEN)[1]["ETag"] != first
+    assert get(server, "/api/students?page=1", token=TOKEN, etag='"stale"')[0] == 200
+
+    # A new version of the file invalidates every earlier ETag
+    dataset["data"] = make_dataset(n=300)
+    status, headers, _ = get(server, "/api/students?page=1", token=TOKEN, etag=first)
+    assert status == 200 and headers["ETag"] != first
+
+
+def test_head_sends_headers_only(server, monkeypatch):
+    monkeypatch.setattr(api, "API_TOKEN", None)
+    status, headers, body = get(server, "/api/clusters", method="HEAD")
+    assert status == 200 and headers["ETag"] and body == b""
+    assert int(headers["Content-Length"]) > 0
+
+
+def test_errors(server, monkeypatch):
+    monkeypatch.setattr(api, "API_TOKEN", TOKEN)
+    assert get(server, "/api/nope", token=TOKEN)[0] == 404
+    assert get(server, "/api/clusters?cohort=zzz", token=TOKEN)[0] == 404
+    assert get(server, "/api/students?page=x", token=TOKEN)[0] == 400
+    assert get(server, "/api/students?sort=nope", token=TOKEN)[0] == 400
+    assert get(server, "/api/students?bogus=1", token=TOKEN)[0] == 400
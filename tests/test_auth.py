@@ -0,0 +1,166 @@
+# test_auth.py - Password hashes, signed session tokens, logout and configuration
+import json
+
+import pytest
+
+import auth
+from auth import (
+    Authenticator, ConfigError, MemorySessionStore, MemoryUserStore, SqliteSessionStore, SqliteUserStore, _b64,
+    _unb64, authenticator_from_env, hash_password, verify_password,
+)
+
+SECRET = "x" * 32
+
+
+@pytest.fixture(autouse=True)
+def fast_hashes(monkeypatch):
+    # Keep the scrypt cost low: the tests are about the logic, not the work factor
+    monkeypatch.setattr(auth, "SCRYPT_N", 2 ** 8)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def authenticator(request, tmp_path):
+    if request.param == "memory":
+        users, sessions = MemoryUserStore(), MemorySessionStore()
+    else:
+        users = SqliteUserStore(str(tmp_path / "users.db"))
+        sessions = SqliteSessionStore(str(tmp_path / "sessions.db"))
+    users.add("alice", "correct horse", roles=["admin"])
+    return Authenticator(users, sessions, SECRET)
+
+
+def _resign(authenticator, token, **changes):
+    payload = json.loads(_unb64(token.split(".")[0]))
+    payload.update(changes)
+    body = _b64(json.dumps(payload).encode())
+    return body, "%s.%s" % (body, authenticator._sign(body))
+
+
+def test_hash_round_trip_and_malformed_hashes():
+    encoded = hash_password("s3cret")
+    assert encoded.startswith("scrypt$") and verify_password("s3cret", encoded)
+    assert not verify_password("S3cret", encoded)
+    assert encoded != hash_password("s3cret")  # salted
+    for bad in ("", "scrypt$1$2", "scrypt$x$8$1$AAAA$AAAA", "scrypt$16$8$1$!!$AAAA", "md5$abc", encoded[:-4] + "$$"):
+        assert not verify_password("s3cret", bad)
+
+
+def test_login_issues_a_token_that_validates(authenticator):
+    assert authenticator.login("alice", "wrong") is None
+    assert authenticator.login("bob", "correct horse") is None
+    assert authenticator.login("", "correct horse") is None
+    token = authenticator.login("alice", "correct horse")
+    session = authenticator.validate(token)
+    assert session.username == "alice" and session.roles == ("admin",) and session.token == token
+
+
+def test_tampered_or_foreign_tokens_are_rejected(authenticator):
+    token = authenticator.login("alice", "correct horse")
+    payload, signature = token.split(".")
+    forged, _ = _resign(authenticator, token, sub="mallory")
+    assert authenticator.validate("%s.%s" % (forged, signature)) is None
+    assert authenticator.validate(payload + "." + signature[:-2] + "AA") is None
+    other = Authenticator(authenticator.users, authenticator.sessions, "y" * 32)
+    assert other.validate(token) is None
+    for junk in (None, "", "abc", "a.b.c", "!!!.???"):
+        assert authenticator.validate(junk) is None
+    # A correctly signed payload that is not JSON
+    body = _b64(b"not json")
+    assert authenticator.validate("%s.%s" % (body, authenticator._sign(body))) is None
+
+
+def test_expired_tokens_are_rejected(authenticator, monkeypatch):
+    token = authenticator.login("alice", "correct horse")
+    _, expired = _resign(authenticator, token, exp=1)
+    assert authenticator.validate(expired) is None
+
+    expires = authenticator.validate(token).expires
+    monkeypatch.setattr(auth.time, "time", lambda: expires + 1)
+    assert authenticator.validate(token) is None
+
+
+def test_logout_revokes_only_that_session(authenticator):
+    first = authenticator.login("alice", "correct horse")
+    second = authenticator.login("alice", "correct horse")
+    authenticator.logout(first)
+    assert authenticator.validate(first) is None
+    assert authenticator.validate(second) is not None
+    # Logging out an invalid token is a no-op
+    authenticator.logout("garbage")
+
+
+def test_logout_applies_to_every_replica(tmp_path):
+    users = SqliteUserStore(str(tmp_path / "users.db"))
+    users.add("alice", "pw")
+    path = str(tmp_path / "sessions.db")
+    a = Authenticator(users, SqliteSessionStore(path), SECRET)
+    b = Authenticator(SqliteUserStore(str(tmp_path / "users.db")), SqliteSessionStore(path), SECRET)
+    token = a.login("alice", "pw")
+    assert b.validate(token) is not None
+    b.logout(token)
+    assert a.validate(token) is None
+
+
+def test_login_codes_work_once_and_expire(authenticator, monkeypatch):
+    token = authenticator.login("alice", "correct horse")
+    code = authenticator.issue_code(token)
+    assert authenticator.redeem_code("nope") is None
+    assert authenticator.redeem_code(code) == token
+    assert authenticator.redeem_code(code) is None
+
+    late = authenticator.issue_code(token)
+    now = auth.time.time()
+    monkeypatch.setattr(auth.time, "time", lambda: now + auth.CODE_SECONDS + 1)
+    assert authenticator.redeem_code(late) is None
+
+
+def test_code_of_a_revoked_token_is_useless(authenticator):
+    token = authenticator.login("alice", "correct horse")
+    code = authenticator.issue_code(token)
+    authenticator.logout(token)
+    assert authenticator.redeem_code(code) is None
+
+
+def test_file_user_store_is_reread(tmp_path):
+    path = str(tmp_path / "users.json")
+    writer, reader = auth.FileUserStore(path), auth.FileUserStore(path)
+    assert reader.get("alice") is None
+    writer.add("alice", "pw", roles=["admin"])
+    user = reader.get("alice")
+    assert user.roles == ("admin",) and verify_password("pw", user.password_hash)
+
+
+def _env(tmp_path, **overrides):
+    env = {
+        "DASHBOARD_SECRET_KEY": SECRET,
+        "DASHBOARD_USER_STORE": "sqlite:%s" % (tmp_path / "users.db"),
+        "DASHBOARD_SESSION_STORE": "sqlite:%s" % (tmp_path / "sessions.db"),
+    }
+    env.update(overrides)
+    return {k: v for k, v in env.items() if v is not None}
+
+
+def test_config_from_env(tmp_path):
+    assert isinstance(authenticator_from_env(_env(tmp_path)), Authenticator)
+
+
+@pytest.mark.parametrize("overrides", [
+    {"DASHBOARD_SECRET_KEY": None},
+    {"DASHBOARD_SECRET_KEY": "short"},
+    {"DASHBOARD_USER_STORE": None},
+    {"DASHBOARD_SESSION_STORE": None},
+    {"DASHBOARD_USER_STORE": "memory"},
+    {"DASHBOARD_SESSION_STORE": "memory"},
+    {"DASHBOARD_SESSION_STORE": "redis://x"},
+    {"DASHBOARD_SESSION_STORE": "sqlite:/nonexistent/dir/sessions.db"},
+])
+def test_missing_or_local_config_is_refused(tmp_path, overrides):
+    with pytest.raises(ConfigError):
+        authenticator_from_env(_env(tmp_path, **overrides))
+
+
+def test_config_error_does_not_leak_credentials(tmp_path, capsys):
+    with pytest.raises(ConfigError) as info:
+        authenticator_from_env(_env(tmp_path, DASHBOARD_SECRET_KEY="tooshort"))
+    assert "tooshort" not in str(info.value)
+    assert capsys.readouterr() == ("", "")
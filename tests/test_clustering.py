@@ -0,0 +1,47 @@
+# test_clustering.py - In-app clustering engine
+import numpy as np
+import pandas as pd
+import pytest
+
+from clustering import METHODS, fit_engagement_clusters, kmeans, minibatch_kmeans, standardize
+from conftest import cohort_frame
+
+FEATURES = ["Played", "Paused", "Likes", "Segment"]
+
+
+@pytest.fixture
+def Z():
+    return standardize(cohort_frame(n=3000, seed=1, k=4)[FEATURES].to_numpy(dtype=np.float64))[0]
+
+
+@pytest.mark.parametrize("fit", [kmeans, minibatch_kmeans])
+def test_same_seed_same_result(Z, fit):
+    centers_a, labels_a, inertia_a, _ = fit(Z, 4, seed=7)
+    centers_b, labels_b, inertia_b, _ = fit(Z, 4, seed=7)
+    np.testing.assert_array_equal(labels_a, labels_b)
+    np.testing.assert_array_equal(centers_a, centers_b)
+    assert inertia_a == inertia_b
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_fit_is_deterministic_and_renumbered(method):
+    df = cohort_frame(n=3000, seed=2, k=4)
+    a = fit_engagement_clusters(df, FEATURES, k=4, method=method, seed=3)
+    b = fit_engagement_clusters(df, FEATURES, k=4, method=method, seed=3)
+    np.testing.assert_array_equal(a.labels, b.labels)
+    assert a.names == b.names
+    assert a.k == 4 and set(np.unique(a.labels)) == set(range(4))
+
+
+def test_recovers_well_separated_blobs():
+    df = cohort_frame(n=2000, seed=4, k=3)
+    result = fit_engagement_clusters(df, FEATURES, k=3, seed=0)
+    # Nearly every student of a blob lands in that blob's cluster
+    crosstab = pd.crosstab(df["Cluster"], result.labels).to_numpy()
+    assert crosstab.shape == (3, 3)
+    assert crosstab.max(axis=1).sum() / len(df) > 0.95
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        fit_engagement_clusters(cohort_frame(), FEATURES, method="dbscan")
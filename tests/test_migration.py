@@ -0,0 +1,101 @@
+# test_migration.py - MigrationDiff totals against a pandas merge
+import numpy as np
+import pandas as pd
+import pytest
+
+import migration
+from migration import JOINED, LEFT, UNASSIGNED, MigrationDiff, get_migration
+
+
+@pytest.fixture(params=["pyarrow", "pandas"])
+def lookup(request, monkeypatch):
+    if request.param == "pandas":
+        monkeypatch.setattr(migration, "pa", None)
+    return request.param
+
+
+def _snapshots(make_dataset, n=500):
+    """Earlier and later exports: some students leave, some join, some move"""
+    old = make_dataset(n=n, seed=1).df
+    new = make_dataset(n=n, seed=2).df
+    new = new.iloc[50:].copy()
+    new.iloc[-40:, new.columns.get_loc("ApplicantName")] = ["New %d" % i for i in range(40)]
+    return make_dataset(df=old), make_dataset(df=new)
+
+
+def _expected_matrix(old, new):
+    merged = new.df[["ApplicantName", "Cluster"]].merge(
+        old.df[["ApplicantName", "Cluster"]], on="ApplicantName", how="outer",
+        suffixes=("_new", "_old"), indicator=True)
+    frm = merged["Cluster_old"].map(lambda c: JOINED if pd.isna(c) else str(int(c)))
+    to = merged["Cluster_new"].map(lambda c: LEFT if pd.isna(c) else str(int(c)))
+    return pd.crosstab(frm, to)
+
+
+def test_matrix_matches_merge(make_dataset, lookup):
+    old, new = _snapshots(make_dataset)
+    diff = MigrationDiff(old, new)
+    expected = _expected_matrix(old, new)
+    got = diff.matrix.loc[expected.index, expected.columns]
+    assert np.array_equal(got.to_numpy(), expected.to_numpy())
+    # Cells the merge never produced are empty
+    assert diff.matrix.to_numpy().sum() == expected.to_numpy().sum()
+
+
+def test_totals(make_dataset, lookup):
+    old, new = _snapshots(make_dataset)
+    diff = MigrationDiff(old, new)
+    m = diff.matrix
+    clusters = [r for r in diff.rows if r != JOINED]
+
+    # Every later student lands in exactly one column, every earlier one in one row
+    new_counts = new.df["Cluster"].astype(str).value_counts()
+    old_counts = old.df["Cluster"].astype(str).value_counts()
+    assert m[clusters].sum().to_dict() == new_counts.reindex(clusters, fill_value=0).to_dict()
+    assert m.loc[clusters].sum(axis=1).to_dict() == old_counts.reindex(clusters, fill_value=0).to_dict()
+    assert m.to_numpy().sum() == len(new.df) + diff.n_left
+
+    assert diff.n_matched + diff.n_joined == len(new.df)
+    assert diff.n_joined == m.loc[JOINED].sum() == 40
+    assert diff.n_left == m[LEFT].sum() == 90
+    stayed = np.trace(m.loc[clusters, clusters].to_numpy())
+    assert diff.n_moved == diff.n_matched - stayed == len(diff.movers())
+    assert sum(n for _, _, n in diff.flows()) == m.to_numpy().sum()
+
+
+def test_missing_cluster_counted_as_unassigned(make_dataset, lookup):
+    old, new = _snapshots(make_dataset)
+    df = new.df.copy()
+    df["Cluster"] = df["Cluster"].astype("Float64")
+    df.iloc[:7, df.columns.get_loc("Cluster")] = pd.NA
+    new = make_dataset(df=df)
+    diff = MigrationDiff(old, new)
+    assert UNASSIGNED in diff.rows and UNASSIGNED in diff.cols
+    assert diff.matrix[UNASSIGNED].sum() == 7
+    assert diff.matrix.loc[UNASSIGNED].sum() == 0
+    assert diff.matrix.to_numpy().sum() == len(df) + diff.n_left
+
+
+def test_duplicate_names_match_first_earlier_row(make_dataset, lookup):
+    old = pd.DataFrame({"ApplicantName": ["a", "a", "b"], "Cluster": [0, 1, 1]})
+    new = pd.DataFrame({"ApplicantName": ["a", "b", "a"], "Cluster": [0, 0, 1]})
+    diff = MigrationDiff(make_dataset(df=old), make_dataset(df=new))
+    m = diff.matrix
+    assert m.loc["0", "0"] == 1 and m.loc["0", "1"] == 1
+    assert m.loc["1", "0"] == 1
+    # The second "a" of the earlier snapshot is never matched
+    assert m.loc["1", LEFT] == 1 and diff.n_left == 1
+    assert diff.n_moved == 2
+
+
+def test_requires_names(make_dataset):
+    old, new = _snapshots(make_dataset)
+    nameless = make_dataset(df=new.df.drop(columns=["ApplicantName"]))
+    with pytest.raises(ValueError):
+        MigrationDiff(old, nameless)
+
+
+def test_cached_per_version_pair(make_dataset):
+    old, new = _snapshots(make_dataset)
+    assert get_migration(old, new) is get_migration(old, new)
+    assert get_migration(new, old) is not get_migration(old, new)
@@ -0,0 +1,45 @@
+# test_neighbors.py - NeighborIndex against a brute-force search
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_loader import Dataset
+from neighbors import NeighborIndex
+
+
+def _tied_dataset(n=5000, seed=0):
+    # Few small integer values: many students share a profile or a distance
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Cluster": rng.integers(0, 3, size=n),
+        "Played": rng.integers(0, 4, size=n),
+        "Paused": rng.integers(0, 4, size=n),
+        "Likes": rng.integers(0, 4, size=n),
+    })
+    return Dataset("students.csv", ("students.csv", 0, 0), df)
+
+
+def _brute_force(Z, row, k):
+    dist = np.sqrt(((Z - Z[row]) ** 2).sum(axis=1))
+    dist[row] = np.inf
+    order = np.lexsort((np.arange(len(Z)), np.round(dist, 9)))[:k]
+    return order, dist[order]
+
+
+@pytest.mark.parametrize("block_rows", [64, 777, 1000, 4096, 262144])
+def test_query_matches_brute_force_on_ties(block_rows):
+    index = NeighborIndex(_tied_dataset())
+    queries = [0, 1, 17, 2500, 4999]
+    for k in (1, 5, 40):
+        found, dist = index.query(queries, k=k, block_rows=block_rows)
+        for q, row in enumerate(queries):
+            expected, expected_dist = _brute_force(index._Z, row, k)
+            assert found[q].tolist() == expected.tolist()
+            np.testing.assert_allclose(dist[q], expected_dist)
+
+
+def test_query_keeps_self_when_asked():
+    index = NeighborIndex(_tied_dataset(n=200))
+    found, dist = index.query([3], k=1, exclude_self=False)
+    assert dist[0, 0] == 0.0
+    assert found[0, 0] == np.flatnonzero(np.all(index._Z == index._Z[3], axis=1))[0]
@@ -0,0 +1,79 @@
+# test_profiling.py - Rerun traces, payload hook and Prometheus output
+import pytest
+
+import profiling
+from profiling import Profiler
+
+
+class FakeContext:
+    def __init__(self):
+        self.sent = []
+
+    def _enqueue(self, msg):
+        self.sent.append(msg)
+
+
+class FakeMessage:
+    def ByteSize(self):
+        return 10
+
+
+@pytest.fixture
+def ctx(monkeypatch):
+    ctx = FakeContext()
+    monkeypatch.setattr(profiling, "get_script_run_ctx", lambda: ctx)
+    return ctx
+
+
+def test_payload_counted_per_section_and_hook_restored(ctx):
+    orig = ctx._enqueue
+    trace = Profiler().start("dashboard")
+    trace.mark("explorer")
+    ctx._enqueue(FakeMessage())
+    ctx._enqueue(FakeMessage())
+    trace.finish()
+    assert trace.payload == {"explorer": 20}
+    assert ctx._enqueue == orig
+    assert len(ctx.sent) == 2
+
+
+def test_unfinished_trace_does_not_stack_hooks(ctx):
+    orig = ctx._enqueue
+    profiler = Profiler()
+    profiler.start()  # e.g. a rerun that died before finish()
+    trace = profiler.start()
+    ctx._enqueue(FakeMessage())
+    trace.finish()
+    assert ctx._enqueue == orig
+    assert trace.payload == {"startup": 10}
+
+
+def test_hook_restored_when_recording_fails(ctx, monkeypatch):
+    orig = ctx._enqueue
+    profiler = Profiler()
+    trace = profiler.start()
+    monkeypatch.setattr(profiler, "record", lambda rec: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        trace.finish()
+    assert ctx._enqueue == orig
+
+
+def test_context_without_enqueue_is_not_hooked(monkeypatch):
+    monkeypatch.setattr(profiling, "get_script_run_ctx", lambda: object())
+    trace = Profiler().start()
+    trace.finish()
+    assert trace.payload == {}
+
+
+def test_prometheus_sum_and_count_outlive_the_ring(monkeypatch):
+    monkeypatch.setattr(profiling, "get_script_run_ctx", lambda: None)
+    profiler = Profiler(size=2)
+    for _ in range(5):
+        profiler.start().finish()
+    text = profiler.to_prometheus()
+    assert 'dashboard_rerun_section_seconds_count{section="total"} 5' in text
+    assert 'dashboard_rerun_section_seconds_sum{section="total"}' in text
+    assert "# TYPE dashboard_rerun_section_seconds summary" in text
+    assert profiler.summary()[0]["count"] == 2
+    profiler.clear()
+    assert profiler.totals() == {}
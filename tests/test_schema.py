@@ -0,0 +1,19 @@
+# test_schema.py - Declared column types
+import pandas as pd
+import pytest
+
+from schema import GRADE_LEVELS, apply_schema
+
+
+def test_grades_keep_their_order():
+    df = apply_schema(pd.DataFrame({"CW1": ["Good", "Fail", "Excellent"]}))
+    assert df["CW1"].dtype.ordered
+    assert list(df["CW1"].cat.categories) == GRADE_LEVELS
+    assert df["CW1"].cat.codes.tolist() == [3, 0, 5]
+
+
+def test_unknown_values_become_missing_and_keep_the_order():
+    with pytest.warns(UserWarning, match="A\\+"):
+        df = apply_schema(pd.DataFrame({"CW1": ["Good", "A+", "Fail"]}))
+    assert df["CW1"].dtype.ordered
+    assert df["CW1"].cat.codes.tolist() == [3, -1, 0]
@@ -0,0 +1,64 @@
+# test_search_index.py - SearchIndex against plain pandas filtering
+import numpy as np
+import pytest
+
+from search_index import NgramPostings, _bits_set, get_search_index
+
+
+def _names_dataset(make_dataset, n=3000, seed=0):
+    df = make_dataset(n=n, seed=seed).df.copy()
+    rng = np.random.default_rng(seed)
+    # Mixed case, repeated grams and a few non-ASCII names
+    extra = np.array(["Zoë Ng", "ÅSA", "aaaa", "Ann-Marie", "li"])
+    picks = rng.random(n) < 0.05
+    df.loc[picks, "ApplicantName"] = rng.choice(extra, size=int(picks.sum()))
+    return make_dataset(df=df)
+
+
+def _expected(data, text):
+    names = data.df[data.applicant_col].astype(str).str.lower()
+    return np.flatnonzero(names.str.contains(text.lower(), regex=False).to_numpy())
+
+
+@pytest.mark.parametrize("text", ["", "1", "S", "12", "ë", "t 1", "aaa", "aaaa", "ent 12",
+                                  "student 29", "zoë ng", "ann-m", "xyz", "li"])
+@pytest.mark.parametrize("arrow", [True, False])
+def test_contains_matches_pandas(make_dataset, monkeypatch, text, arrow):
+    data = _names_dataset(make_dataset)
+    index = get_search_index(data)
+    if not arrow:
+        monkeypatch.setattr(index, "_arrow_names", None)
+    assert np.array_equal(index.contains(text), _expected(data, text))
+
+
+def test_postings_independent_of_block_size():
+    names = np.array(["anna", "hannah", "bob", "", "ab", "nana"], dtype=object)
+    for n in (1, 2, 3):
+        whole = NgramPostings(names, n)
+        blocked = NgramPostings(names, n, block_rows=2)
+        for gram in ("a", "n", "an", "na", "nna", "ann", "bob", "zz"):
+            if len(gram) == n:
+                expected = [i for i, name in enumerate(names) if gram in name]
+                assert whole.get(gram).tolist() == expected
+                assert blocked.get(gram).tolist() == expected
+
+
+@pytest.mark.parametrize("n", [1, 7, 8, 9, 1000, 4099])
+@pytest.mark.parametrize("density", [0.0, 0.01, 0.5, 1.0])
+def test_bits_set_matches_unpacked(n, density):
+    bits = np.random.default_rng(n).random(n) < density
+    assert np.array_equal(_bits_set(np.packbits(bits), n), np.flatnonzero(bits))
+
+
+def test_query_combines_filters_and_name(make_dataset):
+    data = make_dataset(n=2000, seed=3)
+    index = get_search_index(data)
+    df = data.df
+    filters = {"Cluster": [0, 2], "Result": df["Result"].iloc[0], "CW1": []}
+    expected = (df["Cluster"].isin([0, 2]) & (df["Result"] == df["Result"].iloc[0])).to_numpy()
+    assert np.array_equal(index.query(filters), np.flatnonzero(expected))
+
+    name = df[data.applicant_col].str.lower().str.contains("1", regex=False).to_numpy()
+    assert np.array_equal(index.query(filters, "1", match="contains"), np.flatnonzero(expected & name))
+    starts = df[data.applicant_col].str.lower().str.startswith("student 1").to_numpy()
+    assert np.array_equal(index.query(filters, "Student 1"), np.flatnonzero(expected & starts))
@@ -0,0 +1,64 @@
+# test_session_cookie.py - The login/logout cookie routes
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+import auth
+import session_cookie
+from auth import Authenticator, MemorySessionStore, MemoryUserStore
+from session_cookie import COOKIE_NAME
+
+
+class CookieRoutesTest(AsyncHTTPTestCase):
+    def get_app(self):
+        self.scrypt_n, auth.SCRYPT_N = auth.SCRYPT_N, 2 ** 8
+        users = MemoryUserStore()
+        users.add("alice", "pw")
+        self.authenticator = Authenticator(users, MemorySessionStore(), "x" * 32)
+        # xsrf_cookies as in Streamlit's own app: the routes must not need the xsrf token
+        return tornado.web.Application(session_cookie.routes(self.authenticator), xsrf_cookies=True)
+
+    def tearDown(self):
+        auth.SCRYPT_N = self.scrypt_n
+        super().tearDown()
+
+    def post(self, route, body="", cookie=None):
+        headers = {"Cookie": "%s=%s" % (COOKIE_NAME, cookie)} if cookie else {}
+        return self.fetch("/" + route, method="POST", body=body, headers=headers)
+
+    def test_code_sets_a_locked_down_cookie_once(self):
+        token = self.authenticator.login("alice", "pw")
+        code = self.authenticator.issue_code(token)
+        response = self.post(session_cookie.SESSION_ROUTE, code)
+        self.assertEqual(response.code, 204)
+        cookie = response.headers["Set-Cookie"]
+        self.assertTrue(cookie.startswith("%s=%s;" % (COOKIE_NAME, token)))
+        for attribute in ("HttpOnly", "Secure", "SameSite=Strict", "Path=/", "Max-Age="):
+            self.assertIn(attribute, cookie)
+        self.assertEqual(response.headers["Cache-Control"], "no-store")
+        # The code is spent
+        self.assertEqual(self.post(session_cookie.SESSION_ROUTE, code).code, 403)
+
+    def test_bad_codes_and_tokens_are_refused(self):
+        token = self.authenticator.login("alice", "pw")
+        for body in ("", "nope", token):
+            response = self.post(session_cookie.SESSION_ROUTE, body)
+            self.assertEqual(response.code, 403)
+            self.assertNotIn("Set-Cookie", response.headers)
+
+    def test_logout_revokes_and_clears(self):
+        token = self.authenticator.login("alice", "pw")
+        response = self.post(session_cookie.LOGOUT_ROUTE, cookie=token)
+        self.assertEqual(response.code, 204)
+        self.assertIsNone(self.authenticator.validate(token))
+        cookie = response.headers["Set-Cookie"]
+        self.assertTrue(cookie.startswith('%s="";' % COOKIE_NAME) or cookie.startswith("%s=;" % COOKIE_NAME))
+        for attribute in ("expires=", "HttpOnly", "Secure", "SameSite=Strict", "Path=/"):
+            self.assertIn(attribute, cookie)
+        # Without a cookie it only clears
+        self.assertEqual(self.post(session_cookie.LOGOUT_ROUTE).code, 204)
+
+
+def test_scripts_post_to_the_routes():
+    script = session_cookie.login_script("abc")
+    assert '"/_dashboard/session"' in script and '"abc"' in script
+    assert '"/_dashboard/logout"' in session_cookie.logout_script()
@@ -0,0 +1,69 @@
+# test_streaming.py - EngagementStream event log tailing
+import builtins
+import threading
+import time
+
+import streaming
+from streaming import EngagementStream, get_stream
+
+
+def test_concurrent_polls_apply_each_event_once(tmp_path, monkeypatch, make_dataset):
+    def slow_open(*args, **kwargs):
+        # Widen the window between reading the offset and advancing it
+        time.sleep(0.02)
+        return builtins.open(*args, **kwargs)
+
+    monkeypatch.setattr(streaming, "open", slow_open, raising=False)
+    data = make_dataset()
+    log = tmp_path / "events.csv"
+    n_events = 5000
+    lines = ["ApplicantName,Feature,Delta"] + ["Student %d,Likes,1" % (i % 200) for i in range(n_events)]
+    log.write_text("\n".join(lines) + "\n")
+
+    for _ in range(5):
+        stream = EngagementStream(data, refit_every=0)
+        before = stream._X[:stream._n, stream.feature_cols.index("Likes")].sum()
+        barrier = threading.Barrier(2)
+        applied = []
+
+        def poll():
+            barrier.wait()
+            applied.append(stream.poll(str(log)))
+
+        threads = [threading.Thread(target=poll) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sorted(applied) == [0, n_events]
+        assert stream.n_events == n_events
+        after = stream._X[:stream._n, stream.feature_cols.index("Likes")].sum()
+        assert after - before == n_events
+        assert stream.to_cube().table[("count", "")].iloc[-1] == len(data.df)
+
+
+def test_poll_reads_only_appended_lines(tmp_path, make_dataset):
+    stream = EngagementStream(make_dataset(), refit_every=0)
+    log = tmp_path / "events.csv"
+    log.write_text("ApplicantName,Feature,Delta\nStudent 1,Played,2\n")
+    assert stream.poll(str(log)) == 1
+    with open(log, "a") as f:
+        f.write("Student 2,Played,3\nStudent 3,Pla")
+    assert stream.poll(str(log)) == 1
+    with open(log, "a") as f:
+        f.write("yed,1\n")
+    assert stream.poll(str(log)) == 1
+    assert stream.poll(str(log)) == 0
+    assert stream.n_events == 3
+
+
+def test_new_students_count_against_the_dataset_size(make_dataset):
+    data = make_dataset()
+    stream = get_stream(data)
+    before_stream, before_data = stream.nbytes, data.nbytes
+    n_new = 5000
+    stream.apply_events(["New student %d" % i for i in range(n_new)], ["Likes"] * n_new, [1] * n_new)
+    grown = stream.nbytes - before_stream
+    assert grown > n_new * 50
+    assert data.nbytes - before_data == grown
@@ -0,0 +1,22 @@
+# test_table_view.py - Sorted explorer positions
+import numpy as np
+import pandas as pd
+import pytest
+
+from table_view import sorted_positions
+
+
+@pytest.mark.parametrize("col", ["Cluster", "CW1", "ApplicantName", "Score"])
+def test_descending_sort_keeps_ties_in_file_order(make_dataset, col):
+    df = make_dataset().df.copy()
+    df["Score"] = np.where(np.arange(len(df)) % 7 == 0, np.nan, (np.arange(len(df)) % 5).astype(float))
+    data = make_dataset(df=df)
+    for ascending in (True, False):
+        order = sorted_positions(data, sort_col=col, ascending=ascending)
+        assert sorted(order.tolist()) == list(range(len(df)))
+        ranked = df.iloc[order].assign(_row=order)
+        key = ranked[col].cat.codes if isinstance(ranked[col].dtype, pd.CategoricalDtype) else ranked[col]
+        for _, rows in ranked.groupby(key, sort=False, dropna=False)["_row"]:
+            assert rows.is_monotonic_increasing
+        values = pd.Series(key.dropna().to_numpy())
+        assert values.is_monotonic_increasing if ascending else values.is_monotonic_decreasing
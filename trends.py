@@ -0,0 +1,145 @@
+# trends.py - Per-snapshot cluster rollups for trends across exports
+# ------------------------------------------------------------
+# A cohort directory that receives a new export every week is a time series of
+# snapshots. For each snapshot we keep one small rollup (students, share and
+# mean engagement per cluster, plus the "All" row) in an append-only CSV next
+# to the exports. A new export is parsed once, when it first appears, and its
+# rows are appended; earlier snapshots are never re-read, so drawing a term's
+# history reads k+1 rows per snapshot regardless of cohort size.
+#
+# Snapshots are ordered by file name, so date-stamped exports
+# (2024-09-02.csv, 2024-09-09.csv, ...) sort chronologically.
+import os
+import threading
+import zlib
+
+import pandas as pd
+
+from aggregates import OVERALL, build_cluster_cube
+from data_loader import EXPECTED_FEATURES, file_key, read_dataset, resolve_source
+
+ROLLUP_FILE = ".cluster_rollups.csv"
+# Write rollups here instead of into the data directory (e.g. if it is read-only)
+ROLLUP_DIR = os.environ.get("DASHBOARD_ROLLUP_DIR")
+
+KEY_COLUMNS = ["snapshot", "size", "mtime_ns"]
+STORE_COLUMNS = KEY_COLUMNS + ["cluster", "count", "pct"] + EXPECTED_FEATURES
+
+# Metric shown in the trend chart -> store column
+TREND_METRICS = {"Students": "count", "% of students": "pct"}
+TREND_METRICS.update({f"Mean {f}": f for f in EXPECTED_FEATURES})
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def series_snapshots(cohorts, path):
+    """[(snapshot name, path)] of the cohorts in the same directory as ``path``"""
+    folder = os.path.dirname(os.path.abspath(path))
+    series = [p for p in cohorts.values() if os.path.dirname(p) == folder]
+    return sorted((os.path.splitext(os.path.basename(p))[0], p) for p in series)
+
+
+def snapshot_rollup(name, path):
+    """Rollup rows (one per cluster plus OVERALL) for the snapshot at ``path``"""
+    data = read_dataset(path)
+    table = build_cluster_cube(data).table
+    rows = pd.DataFrame({
+        "cluster": table.index.astype(str),
+        "count": table[("count", "")].astype(int).to_numpy(),
+        "pct": table[("pct", "")].to_numpy(),
+    })
+    for f in EXPECTED_FEATURES:
+        rows[f] = table[("mean", f)].to_numpy() if f in data.feature_cols else float("nan")
+    rows.insert(0, "snapshot", name)
+    rows.insert(1, "size", data.key[1])
+    rows.insert(2, "mtime_ns", data.key[2])
+    return rows[STORE_COLUMNS]
+
+
+class RollupStore:
+    """Append-only CSV of snapshot rollups for one cohort directory"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._key = None
+        self._frame = pd.DataFrame(columns=STORE_COLUMNS)
+
+    def read(self):
+        """All stored rows, re-read only when the file changed"""
+        with self._lock:
+            try:
+                key = file_key(self.path)
+            except OSError:
+                return self._frame
+            if key != self._key:
+                self._frame = pd.read_csv(self.path, dtype={"snapshot": str, "cluster": str})
+                self._key = key
+            return self._frame
+
+    def append(self, rows):
+        with self._lock:
+            new = not os.path.exists(self.path)
+            rows.to_csv(self.path, mode="a", header=new, index=False)
+
+    def update(self, snapshots):
+        """Append rollups for snapshots not stored yet (or changed since); returns how many"""
+        with self._update_lock:
+            stored = self.read()
+            known = set(zip(stored["snapshot"], stored["size"], stored["mtime_ns"]))
+            added = 0
+            for name, path in snapshots:
+                key = file_key(resolve_source(os.path.abspath(path)))
+                if (name, key[1], key[2]) in known:
+                    continue
+                self.append(snapshot_rollup(name, path))
+                added += 1
+            return added
+
+    def history(self, snapshots):
+        """Rows of the current version of each snapshot, in snapshot order"""
+        stored = self.read()
+        if stored.empty:
+            return stored
+        # A re-exported snapshot appends new rows; the last version wins
+        latest = stored.drop_duplicates(["snapshot"], keep="last")[KEY_COLUMNS]
+        current = stored.merge(latest, on=KEY_COLUMNS)
+        current = current.drop_duplicates(["snapshot", "cluster"], keep="last")
+        order = {name: i for i, (name, _) in enumerate(snapshots)}
+        current = current[current["snapshot"].isin(order)]
+        return current.sort_values("snapshot", key=lambda s: s.map(order), kind="stable").reset_index(drop=True)
+
+    @property
+    def version(self):
+        """Identifies the stored contents (used as a cache key)"""
+        return self._key
+
+
+def rollup_store_for(path):
+    """Return the shared RollupStore for the cohort directory containing ``path``"""
+    folder = os.path.dirname(os.path.abspath(path))
+    if ROLLUP_DIR:
+        store_path = os.path.join(ROLLUP_DIR, "%s-%08x.csv" % (os.path.splitext(ROLLUP_FILE)[0], zlib.crc32(folder.encode())))
+    else:
+        store_path = os.path.join(folder, ROLLUP_FILE)
+    with _stores_lock:
+        store = _stores.get(store_path)
+        if store is None:
+            store = _stores[store_path] = RollupStore(store_path)
+    return store
+
+
+def get_trends(snapshots):
+    """Bring the rollups of ``snapshots`` up to date and return (store, history)"""
+    store = rollup_store_for(snapshots[0][1])
+    store.update(snapshots)
+    return store, store.history(snapshots)
+
+
+def trend_table(history, metric, include_overall=False):
+    """snapshot x cluster table of ``metric`` (a TREND_METRICS value)"""
+    rows = history if include_overall else history[history["cluster"] != OVERALL]
+    table = rows.pivot(index="snapshot", columns="cluster", values=metric)
+    return table.reindex(pd.unique(rows["snapshot"]))